@@ -0,0 +1,59 @@
+"""Benchmark the columnar tree storage against GlarfForest.
+
+Measures the memory taken by a forest of synthetic trees, as the growth of
+the resident set size of the process (Linux only), and the time taken by
+`rels()` and `nps()` over the whole forest.
+"""
+from __future__ import print_function
+
+import gc
+import os
+import sys
+from time import time
+
+from pyglarf import GlarfForest
+from pyglarf.columnar import ColumnarForest
+
+from synthetic import make_glarf_trees
+
+
+def rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def build(make_forest, raw):
+    gc.collect()
+    mem_start = rss()
+    tstart = time()
+    forest = make_forest(raw)
+    build_time = time() - tstart
+    gc.collect()
+    return forest, build_time, rss() - mem_start
+
+
+def timed(func, forest):
+    gc.collect()
+    tstart = time()
+    for tree in forest:
+        list(func(tree))
+    return time() - tstart
+
+
+if __name__ == '__main__':
+    n_trees = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    raw = make_glarf_trees(n_trees, n_tokens=50)
+    print('%d trees of 50 tokens' % n_trees)
+    print('%-10s %10s %10s %10s %10s' % ('', 'memory', 'build', 'rels', 'nps'))
+    # columnar first, so that memory freed by the other one is not reused
+    for name, make_forest in (('columnar', ColumnarForest.from_glarf),
+                              ('GlarfTree', GlarfForest)):
+        forest, build_time, memory = build(make_forest, raw)
+        if isinstance(forest, ColumnarForest):
+            n_rows = forest.n_rows()
+        print('%-10s %8.1fMB %9.3fs %9.3fs %9.3fs' % (
+            name, memory / 1e6, build_time,
+            timed(lambda tree: tree.rels(), forest),
+            timed(lambda tree: tree.nps(), forest)))
+        del forest
+    print('%d rows (nodes and leaves)' % n_rows)
@@ -0,0 +1,34 @@
+"""Benchmark relation and NP extraction on synthetic GLARF trees.
+
+Times `GlarfTree.glarf_parse`, `rels()` and `nps()` for a few sentence
+lengths.  Only public methods are used, so the script can be run against
+older checkouts to compare versions.
+"""
+from __future__ import print_function
+
+import gc
+import sys
+from time import time
+
+from pyglarf import GlarfTree
+
+from synthetic import make_glarf_trees
+
+
+def timed(func, items):
+    gc.collect()
+    tstart = time()
+    res = [func(item) for item in items]
+    return res, time() - tstart
+
+
+if __name__ == '__main__':
+    n_trees = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print('%8s %12s %12s %12s' % ('tokens', 'parse', 'rels', 'nps'))
+    for n_tokens in (25, 100, 400):
+        raw = make_glarf_trees(n_trees, n_tokens=n_tokens)
+        trees, parse_time = timed(GlarfTree.glarf_parse, raw)
+        _, rels_time = timed(lambda tree: list(tree.rels()), trees)
+        _, nps_time = timed(lambda tree: list(tree.nps()), trees)
+        print('%8d %11.3fs %11.3fs %11.3fs' % (n_tokens, parse_time,
+                                               rels_time, nps_time))
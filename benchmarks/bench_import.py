@@ -0,0 +1,51 @@
+"""Benchmark the time to import pyglarf in a fresh interpreter.
+
+Every statement is run in a new process, and the time is measured inside
+it, so the interpreter start-up is not counted.  Run it with NLTK on the
+path to see the cost of the nltk tree backend.
+"""
+from __future__ import print_function
+
+import os
+import subprocess
+import sys
+
+STATEMENTS = [
+    'import pyglarf',
+    'from pyglarf import GlarfTree',
+    'from pyglarf import GlarfForest',
+    'from pyglarf import GlarfWrapper',
+]
+
+_template = """\
+import time
+tstart = time.time()
+%s
+print(time.time() - tstart)
+"""
+
+
+def import_time(statement, repeat=10, env=None):
+    """Best time of `statement` in `repeat` fresh interpreters, in seconds"""
+    return min(float(subprocess.check_output(
+        [sys.executable, '-c', _template % statement], env=env))
+        for _ in range(repeat))
+
+
+def has_nltk():
+    return subprocess.call([sys.executable, '-c', 'import nltk.tree'],
+                           stderr=open(os.devnull, 'w')) == 0
+
+
+if __name__ == '__main__':
+    backends, statements = ['backport'], list(STATEMENTS)
+    if has_nltk():
+        backends.append('nltk')
+        statements.append('import nltk.tree')
+    print('%-35s' % 'statement' + ''.join('%12s' % b for b in backends))
+    for statement in statements:
+        times = [import_time(statement, env=dict(os.environ,
+                                                 PYGLARF_TREE_BACKEND=b))
+                 for b in backends]
+        print('%-35s' % statement + ''.join('%10.1fms' % (t * 1000)
+                                            for t in times))
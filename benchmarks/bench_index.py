@@ -0,0 +1,55 @@
+"""Benchmark RelationIndex queries against parsing the corpus again.
+
+The question is "which sentences have the predicate SAY with an ARG0": the
+baseline parses every tree and walks its rels(), the index answers from
+its SQLite postings.  Synthetic trees have no tuples, hence no argument
+lemmas, so the query is on the predicate and the argument label only.
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+from time import time
+
+from pyglarf import GlarfForest
+from pyglarf.index import RelationIndex
+
+from synthetic import make_glarf_trees
+
+
+def scan(glarf_parses):
+    found = [('doc', tree_num, rel.index) for tree_num, tree
+             in enumerate(GlarfForest(glarf_parses))
+             for rel in tree.rels()
+             if rel.head == 'SAY' and 'P-ARG0' in rel.args]
+    # the index sorts relations by the position of their predicate
+    return sorted(found, key=lambda (doc, tree, rel): (doc, tree, int(rel)))
+
+
+if __name__ == '__main__':
+    n_trees = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    glarf_parses = make_glarf_trees(n_trees, n_tokens=60)
+    tmp = tempfile.mkdtemp()
+    try:
+        with RelationIndex(os.path.join(tmp, 'index.db')) as index:
+            tstart = time()
+            index.add_document('doc', GlarfForest(glarf_parses))
+            index_time = time() - tstart
+
+            tstart = time()
+            expected = scan(glarf_parses)
+            scan_time = time() - tstart
+
+            tstart = time()
+            found = index.search('SAY', ARG0=None)
+            query_time = time() - tstart
+            assert found == expected
+    finally:
+        shutil.rmtree(tmp)
+
+    print('%d trees, %d matching relations' % (n_trees, len(found)))
+    print('parse and index: %.2fs' % index_time)
+    print('parse and rels(): %.3fs, index query: %.4fs, speedup %.0fx'
+          % (scan_time, query_time, scan_time / query_time))
@@ -0,0 +1,40 @@
+"""Benchmark GlarfTree.glarf_parse on a corpus of synthetic trees.
+
+Compares the dedicated single-pass parser with the generic `Tree.parse`
+followed by separate lemma attachment and indexing passes.
+"""
+from __future__ import print_function
+
+import gc
+import sys
+from time import time
+
+from pyglarf import GlarfTree
+from pyglarf.glarf_tree import leaf_pattern
+
+from synthetic import make_glarf_trees
+
+
+def generic_parse(s):
+    tree = GlarfTree.parse(s, leaf_pattern=leaf_pattern,
+                           remove_empty_top_bracketing=True)
+    tree._initialize_tuples(None)._set_lemmas()._build_index()
+    return tree
+
+
+if __name__ == '__main__':
+    n_trees = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print('%8s %8s %12s %12s %8s' % ('trees', 'tokens', 'generic',
+                                     'glarf_parse', 'speedup'))
+    for n_tokens in (25, 50):
+        raw = make_glarf_trees(n_trees, n_tokens=n_tokens)
+        timings = []
+        for parse in (generic_parse, GlarfTree.glarf_parse):
+            gc.collect()
+            tstart = time()
+            for s in raw:
+                parse(s)
+            timings.append(time() - tstart)
+        print('%8d %8d %11.3fs %11.3fs %7.2fx' % (n_trees, n_tokens,
+                                                  timings[0], timings[1],
+                                                  timings[0] / timings[1]))
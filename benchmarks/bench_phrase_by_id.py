@@ -0,0 +1,71 @@
+"""Benchmark INDEX lookups on long synthetic GLARF trees.
+
+Compares the INDEX -> phrase table built by `GlarfTree.glarf_parse` with the
+former strategy of scanning every subtree on each `phrase_by_id` call, both
+for resolving every INDEX of a tree and for a full `rels()` extraction.
+"""
+from __future__ import print_function
+
+import gc
+import sys
+from time import time
+
+from pyglarf import GlarfTree
+from pyglarf.nltkbackports import Tree
+
+from synthetic import make_glarf_trees
+
+
+def scan_phrase_by_id(tree, id_nr):
+    """The full-traversal lookup that the INDEX table replaces."""
+    res = list(tree.subtrees(lambda tr: any(isinstance(subtr, Tree)
+                                            and subtr.node == 'INDEX'
+                                            and subtr[0] == id_nr
+                                            for subtr in tr)
+                             and not any(isinstance(subtr, Tree)
+                                         and subtr.node == 'EC-TYPE'
+                                         for subtr in tr)))
+    if len(res) == 1:
+        parent = tree.parent(res[0])
+        return parent if parent is not None else res[0]
+    elif len(res) > 1:
+        return GlarfTree('', res)
+    else:
+        return GlarfTree('?', [])
+
+
+class ScanGlarfTree(GlarfTree):
+    def phrase_by_id(self, id_nr):
+        return scan_phrase_by_id(self, id_nr)
+
+
+def bench(trees, lookup, extract):
+    gc.collect()
+    all_ids = [[t[0] for t in tree.subtrees(lambda t: t.node == 'INDEX')]
+               for tree in trees]
+    tstart = time()
+    for tree, ids in zip(trees, all_ids):
+        for id_nr in ids:
+            lookup(tree, id_nr)
+    lookup_time = time() - tstart
+
+    tstart = time()
+    for tree in trees:
+        list(extract(tree))
+    rels_time = time() - tstart
+    return lookup_time, rels_time
+
+
+if __name__ == '__main__':
+    n_trees = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print('%8s %14s %14s %14s %14s' % ('tokens', 'scan lookup', 'table lookup',
+                                       'scan rels', 'table rels'))
+    for n_tokens in (100, 200, 400):
+        raw = make_glarf_trees(n_trees, n_tokens=n_tokens)
+        trees = [GlarfTree.glarf_parse(s) for s in raw]
+        scan_trees = [ScanGlarfTree.glarf_parse(s) for s in raw]
+        scan = bench(scan_trees, scan_phrase_by_id, ScanGlarfTree.rels)
+        table = bench(trees, GlarfTree.phrase_by_id, GlarfTree.rels)
+        print('%8d %13.3fs %13.3fs %13.3fs %13.3fs' % (n_tokens, scan[0],
+                                                       table[0], scan[1],
+                                                       table[1]))
@@ -0,0 +1,45 @@
+"""Benchmark GlarfTree.rels() on increasingly deep synthetic trees.
+
+Compares the single-pass traversal with the former implementation, which
+walked `treepositions()` and indexed every position from the root.
+"""
+from __future__ import print_function
+
+import gc
+import sys
+from time import time
+
+from pyglarf import GlarfTree
+
+from synthetic import make_glarf_trees
+
+
+def treepositions_rels(tree):
+    with_args = lambda tr: any([daughter.startswith('P-ARG')
+                                for daughter in tr.daughters()])
+    for pos in tree.treepositions():
+        if isinstance(tree[pos], GlarfTree) and with_args(tree[pos]):
+            yield tree._build_rel(tree[pos[:-2]], tree[pos])
+
+
+def timed(rels, trees):
+    gc.collect()
+    tstart = time()
+    for tree in trees:
+        for _ in rels(tree):
+            pass
+    return time() - tstart
+
+
+if __name__ == '__main__':
+    n_trees = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print('%10s %10s %14s %12s %8s' % ('max_depth', 'height', 'treepositions',
+                                       'single-pass', 'speedup'))
+    for max_depth in (2, 8, 32):
+        trees = [GlarfTree.glarf_parse(s) for s in
+                 make_glarf_trees(n_trees, n_tokens=400, max_depth=max_depth)]
+        height = sum(tree.height() for tree in trees) / float(n_trees)
+        old = timed(treepositions_rels, trees)
+        new = timed(GlarfTree.rels, trees)
+        print('%10d %10.1f %13.3fs %11.3fs %7.1fx' % (max_depth, height, old,
+                                                      new, old / new))
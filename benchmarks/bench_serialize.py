@@ -0,0 +1,62 @@
+"""Benchmark reloading a parsed corpus of synthetic trees.
+
+Compares parsing the GLARF output again, unpickling a GlarfForest and
+loading the binary format of `pyglarf.serialize`, eagerly and lazily.
+"""
+from __future__ import print_function
+
+import cPickle
+import gc
+import os
+import shutil
+import sys
+import tempfile
+from time import time
+
+from pyglarf import GlarfForest
+from pyglarf.serialize import save_forest, load_forest
+
+from synthetic import make_glarf_trees
+
+
+def timed(func):
+    gc.collect()
+    tstart = time()
+    func()
+    return time() - tstart
+
+
+if __name__ == '__main__':
+    n_trees = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    raw = make_glarf_trees(n_trees, n_tokens=50)
+    forest = GlarfForest(raw)
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        paths = dict((name, os.path.join(tmp_dir, name))
+                     for name in ('text', 'pickle', 'binary'))
+        with open(paths['text'], 'w') as f:
+            f.write('\n'.join(raw))
+        with open(paths['pickle'], 'wb') as f:
+            cPickle.dump(forest, f, cPickle.HIGHEST_PROTOCOL)
+        save_forest(forest, paths['binary'])
+
+        def load_pickle():
+            with open(paths['pickle'], 'rb') as f:
+                cPickle.load(f)
+
+        def load_lazy():
+            for tree in load_forest(paths['binary'], lazy=True):
+                pass
+
+        print('%d trees of 50 tokens' % n_trees)
+        print('%-16s %10s %10s' % ('', 'size', 'load'))
+        for name, path, func in (
+                ('glarf_parse', 'text', lambda: GlarfForest(raw)),
+                ('cPickle', 'pickle', load_pickle),
+                ('binary', 'binary', lambda: load_forest(paths['binary'])),
+                ('binary, lazy', 'binary', load_lazy)):
+            print('%-16s %9.1fM %9.3fs' % (name,
+                                           os.path.getsize(paths[path]) / 1e6,
+                                           timed(func)))
+    finally:
+        shutil.rmtree(tmp_dir)
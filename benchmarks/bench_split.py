@@ -0,0 +1,70 @@
+"""Benchmark splitting GLARF output into trees.
+
+Compares the DOTALL regular expression GlarfWrapper used to split the
+`.ns-autopb101e` output, keyed on (SENTENCE-OFFSET n), with GlarfSplitter,
+on whole outputs and on 64KB chunks.  Then both split outputs whose trees
+have no SENTENCE-OFFSET: the regex scans to the end of the output from
+every tree, and finds nothing.
+"""
+from __future__ import print_function
+
+import gc
+import re
+import sys
+from time import time
+
+from pyglarf.reader import iter_glarf_trees, split_glarf_trees
+
+from synthetic import make_glarf_trees
+
+_glarf_regex = re.compile('(\(\(\*\*\*ERROR\*\*\*\)\)|'
+                          '\(\(.*?\(SENTENCE-OFFSET [0-9]+\)+)', re.DOTALL)
+
+
+def regex_split(text):
+    return filter(len, (s.strip() for s in re.split(_glarf_regex, text)))
+
+
+def regex_findall(text):
+    return [s.strip() for s in re.findall(_glarf_regex, text)]
+
+
+def chunked_split(text, chunk_size=65536):
+    return list(iter_glarf_trees(text[i:i + chunk_size]
+                                 for i in xrange(0, len(text), chunk_size)))
+
+
+def timed(split, text):
+    gc.collect()
+    tstart = time()
+    split(text)
+    return time() - tstart
+
+
+if __name__ == '__main__':
+    n_trees = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print('%8s %8s %10s %10s %10s %10s' % ('trees', 'tokens', 'MB', 'regex',
+                                            'splitter', 'chunks'))
+    for n_tokens in (25, 100, 400):
+        trees = make_glarf_trees(n_trees, n_tokens=n_tokens)
+        trees[1::10] = ['((***ERROR***))'] * len(trees[1::10])
+        text = '\n'.join(trees) + '\n'
+        assert regex_split(text) == split_glarf_trees(text) == trees
+        assert chunked_split(text) == trees
+        timings = [timed(split, text) for split in (regex_split,
+                                                    split_glarf_trees,
+                                                    chunked_split)]
+        print('%8d %8d %10.1f %9.3fs %9.3fs %9.3fs' % (
+            (n_trees, n_tokens, len(text) / 2. ** 20) + tuple(timings)))
+
+    print('\nwithout SENTENCE-OFFSET')
+    print('%8s %8s %10s %10s %10s' % ('trees', 'tokens', 'MB', 'regex',
+                                      'splitter'))
+    for n in (100, 200, 400, 800):
+        trees = [tree.replace(' (SENTENCE-OFFSET 0)', '')
+                 for tree in make_glarf_trees(n, n_tokens=100)]
+        text = '\n'.join(trees) + '\n'
+        assert regex_findall(text) == [] and split_glarf_trees(text) == trees
+        print('%8d %8d %10.1f %9.3fs %9.3fs' % (
+            n, 100, len(text) / 2. ** 20, timed(regex_findall, text),
+            timed(split_glarf_trees, text)))
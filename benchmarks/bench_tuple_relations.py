@@ -0,0 +1,51 @@
+"""Benchmark relation extraction from the tuples against GlarfTree.rels().
+
+Both paths start from the raw GLARF output of "A man arrived.": the tree
+path parses every tree with its tuples and calls rels(), the tuple path
+only reads the tuple lines.
+"""
+from __future__ import print_function
+
+import gc
+import sys
+from time import time
+
+from pyglarf import GlarfTree
+from pyglarf.tuples import TupleTable, tuple_relations, tree_relations
+from pyglarf.tests.test_glarf_tree import tuple_sentence, tuple_lines
+
+
+def from_trees(parses, blocks):
+    return [tree_relations(GlarfTree.glarf_parse(s, t), tree_num)
+            for tree_num, (s, t) in enumerate(zip(parses, blocks))]
+
+
+def from_tuples(parses, blocks):
+    return [tuple_relations(t, tree_num) for tree_num, t in enumerate(blocks)]
+
+
+def from_table(parses, blocks):
+    return list(TupleTable(enumerate(blocks)).relations())
+
+
+def timed(extract, parses, blocks):
+    gc.collect()
+    tstart = time()
+    relations = extract(parses, blocks)
+    return time() - tstart, relations
+
+
+if __name__ == '__main__':
+    n_trees = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    parses = [tuple_sentence] * n_trees
+    blocks = [tuple_lines] * n_trees
+    tree_time, tree_rels = timed(from_trees, parses, blocks)
+    tuple_time, tuple_rels = timed(from_tuples, parses, blocks)
+    table_time, table_rels = timed(from_table, parses, blocks)
+    assert tree_rels == tuple_rels
+    assert sum(tuple_rels, []) == table_rels
+    print('%10s %12s %12s %12s' % ('trees', 'rels()', 'tuples', 'TupleTable'))
+    print('%10d %11.3fs %11.3fs %11.3fs' % (n_trees, tree_time, tuple_time,
+                                            table_time))
+    print('%10s %12s %11.0fx %11.0fx' % ('speedup', '', tree_time / tuple_time,
+                                          tree_time / table_time))
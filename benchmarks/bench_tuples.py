@@ -0,0 +1,80 @@
+"""Benchmark TupleTable against the tuples of strings kept by GlarfTree.
+
+Compares parsing, memory, a role and head lemma query and lemma alignment
+on synthetic tuple blocks.
+"""
+from __future__ import print_function
+
+import gc
+import random
+import sys
+from time import time
+
+from pyglarf.glarf_tree import _parse_tuples, _lemma_table
+from pyglarf.tuples import TupleTable
+from pyglarf.tests.test_glarf_tree import tuple_lines
+
+ROLES = ['SBJ', 'OBJ', 'COMP', 'Q-POS', 'T-POS', 'ADV']
+LEMMAS = ['ARRIVE', 'SAY', 'BUY', 'SELL', 'REPORT', 'EXPECT', 'ACQUIRE']
+
+
+def make_tuple_blocks(n_trees, n_tuples=20, random_state=0):
+    rng = random.Random(random_state)
+    blocks = []
+    for tree_num in xrange(n_trees):
+        lines = []
+        for k in xrange(n_tuples):
+            fields = tuple_lines[k % 2].split('|')
+            fields[0] = '%s ' % rng.choice(ROLES)
+            fields[7] = ' %d ' % rng.randrange(40)
+            fields[9] = ' %s ' % rng.choice(LEMMAS)
+            fields[19] = ' %d ' % rng.randrange(40)
+            lines.append('|'.join(fields))
+        blocks.append((tree_num, lines))
+    return blocks
+
+
+def rss():
+    """Resident memory in MB, Linux only"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * 4096 / 2. ** 20
+
+
+def timed(func, *args, **kwargs):
+    gc.collect()
+    tstart = time()
+    result = func(*args, **kwargs)
+    return time() - tstart, result
+
+
+def scan(tuples):
+    return [(tree_num, k) for tree_num, block in enumerate(tuples)
+            for k, t in enumerate(block) if t[0] == 'SBJ' and t[9] == 'SAY']
+
+
+if __name__ == '__main__':
+    n_trees = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    blocks = make_tuple_blocks(n_trees)
+
+    start = rss()
+    parse_tuples, tuples = timed(lambda: [_parse_tuples(lines)
+                                          for _, lines in blocks])
+    tuples_mem = rss() - start
+    start = rss()
+    parse_table, table = timed(TupleTable, blocks)
+    table_mem = rss() - start
+
+    scan_time, matches = timed(scan, tuples)
+    first_query, rows = timed(table.rows, role='SBJ', head_lemma='SAY')
+    next_query, _ = timed(table.rows, role='OBJ', head_lemma='BUY')
+    assert len(rows) == len(matches)
+    lemmas_tuples, _ = timed(lambda: [_lemma_table(t) for t in tuples])
+    lemmas_table, _ = timed(table.lemma_tables)
+
+    print('%d tuples' % len(table))
+    print('%12s %10s %10s' % ('', 'tuples', 'TupleTable'))
+    print('%12s %9.2fs %9.2fs' % ('parse', parse_tuples, parse_table))
+    print('%12s %8.0fMB %8.0fMB' % ('memory', tuples_mem, table_mem))
+    print('%12s %9.3fs %9.3fs (%.3fs for the next one)'
+          % ('query', scan_time, first_query, next_query))
+    print('%12s %9.2fs %9.2fs' % ('lemmas', lemmas_tuples, lemmas_table))
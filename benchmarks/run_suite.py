@@ -0,0 +1,224 @@
+"""Benchmark suite, with machine-readable results to track regressions.
+
+Generates synthetic documents for a grid of sentence lengths, depths,
+numbers of predicates and cross-sentence links, then times `glarf_parse`,
+GlarfForest construction, `phrase_by_id` within trees and across the
+forest, `rels()`, `nps()`, `entities()` and `print_flat()`, and measures
+the memory taken by the forest.  Only public methods are used, so the
+suite can be run against older checkouts.
+
+Usage::
+
+    python run_suite.py --output new.json
+    python run_suite.py --output new.json --baseline old.json
+
+Every timing is the best of `--repeat` runs, in seconds.  With
+`--baseline`, the ratios to the baseline are printed and the exit status
+is 1 if a timing, or the memory use, grew by more than `--tolerance`.
+"""
+from __future__ import print_function
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import pyglarf
+from pyglarf import GlarfForest, GlarfTree
+
+from synthetic import make_glarf_corpus
+
+# (n_trees, n_tokens, max_depth, n_predicates, n_cross_links)
+CONFIGS = [
+    (200, 25, 2, None, 0),
+    (100, 100, 4, None, 0),
+    (25, 400, 4, None, 0),
+    (25, 400, 32, None, 0),
+    (100, 100, 4, 8, 0),
+    (100, 100, 4, None, 4),
+]
+QUICK_CONFIGS = [(20, 25, 2, None, 0), (10, 100, 4, None, 2)]
+
+
+def config_name(config):
+    return ('trees=%d,tokens=%d,depth=%d,predicates=%s,links=%d' % config)
+
+
+def rss():
+    """Resident memory in MB, or None where /proc is not available"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 2. ** 20
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def forest_memory(glarf_parses, glarf_tuples):
+    """Memory taken by a GlarfForest, in MB, built in a forked process so
+    that earlier allocations do not hide it"""
+    if not hasattr(os, 'fork') or rss() is None:
+        return None
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read)
+        gc.collect()
+        start = rss()
+        forest = GlarfForest(glarf_parses, glarf_tuples)
+        os.write(write, repr(rss() - start))
+        del forest
+        os._exit(0)
+    os.close(write)
+    result = os.read(read, 64)
+    os.close(read)
+    os.waitpid(pid, 0)
+    return float(result) if result else None
+
+
+def best_time(func, repeat):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        tstart = time.time()
+        func()
+        times.append(time.time() - tstart)
+    return min(times)
+
+
+def run_config(config, repeat):
+    n_trees, n_tokens, max_depth, n_predicates, n_cross_links = config
+    glarf_parses, glarf_tuples = make_glarf_corpus(
+        n_trees, n_tokens, max_depth, n_predicates, n_cross_links)
+    forest = GlarfForest(glarf_parses, glarf_tuples)
+    is_index = lambda t: t.node == 'INDEX'
+    is_reference = lambda t: t.node == 'TREE+INDEX'
+    ids = [[index[0] for index in tree.subtrees(is_index)]
+           for tree in forest]
+    references = [ref[0].strip('|').split('+') for tree in forest
+                  for ref in tree.subtrees(is_reference)]
+
+    def parse():
+        for s, t in zip(glarf_parses, glarf_tuples):
+            GlarfTree.glarf_parse(s, t)
+
+    def phrase_by_id():
+        for tree, tree_ids in zip(forest, ids):
+            for id_nr in tree_ids:
+                tree.phrase_by_id(id_nr)
+
+    def forest_phrase_by_id():
+        for tree_id, id_nr in references:
+            forest.phrase_by_id(tree_id, id_nr)
+
+    def each_tree(method):
+        return lambda: [list(method(tree)) for tree in forest]
+
+    timings = [
+        ('glarf_parse', parse),
+        ('GlarfForest', lambda: GlarfForest(glarf_parses, glarf_tuples)),
+        ('phrase_by_id', phrase_by_id),
+        ('forest.phrase_by_id', forest_phrase_by_id),
+        ('rels', each_tree(GlarfTree.rels)),
+        ('nps', each_tree(GlarfTree.nps)),
+        ('entities', each_tree(GlarfTree.entities)),
+        ('print_flat', lambda: [tree.print_flat() for tree in forest]),
+    ]
+    return {
+        'config': dict(zip(('n_trees', 'n_tokens', 'max_depth',
+                            'n_predicates', 'n_cross_links'), config)),
+        'counts': {'leaves': sum(len(tree.leaves()) for tree in forest),
+                   'indices': sum(len(tree_ids) for tree_ids in ids),
+                   'cross_links': len(references)},
+        'timings': dict((name, best_time(func, repeat))
+                        for name, func in timings),
+        'memory_mb': forest_memory(glarf_parses, glarf_tuples),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=open(os.devnull, 'w'),
+            cwd=os.path.dirname(os.path.abspath(pyglarf.__file__))).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Print the ratios to the baseline, returns the number of metrics
+    that grew more than `tolerance` allows"""
+    old = dict((config_name(tuple(r['config'][key] for key in (
+        'n_trees', 'n_tokens', 'max_depth', 'n_predicates',
+        'n_cross_links'))), r) for r in baseline['results'])
+    n_slower = 0
+    print('\nratio to baseline %s (> 1 is worse)'
+          % (baseline.get('git_revision') or baseline.get('version')))
+    for name, result in results:
+        if name not in old:
+            continue
+        print(name)
+        metrics = sorted(result['timings'].items())
+        metrics.append(('memory_mb', result['memory_mb']))
+        previous_metrics = dict(old[name]['timings'],
+                                memory_mb=old[name].get('memory_mb'))
+        for metric, value in metrics:
+            previous = previous_metrics.get(metric)
+            if not previous or not value:
+                continue
+            ratio = value / previous
+            flag = ''
+            if ratio > 1 + tolerance:
+                flag = ' regression'
+                n_slower += 1
+            print('    %-20s %6.2f%s' % (metric, ratio, flag))
+    return n_slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--output', help='JSON file to write the results to')
+    parser.add_argument('--baseline', help='JSON results to compare with')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='relative growth reported as a regression')
+    parser.add_argument('--quick', action='store_true',
+                        help='only run small configurations')
+    args = parser.parse_args(argv)
+
+    results = []
+    for config in QUICK_CONFIGS if args.quick else CONFIGS:
+        name = config_name(config)
+        result = run_config(config, args.repeat)
+        results.append((name, result))
+        print(name)
+        for metric, value in sorted(result['timings'].items()):
+            print('    %-20s %9.4fs' % (metric, value))
+        if result['memory_mb'] is not None:
+            print('    %-20s %8.1fMB' % ('memory', result['memory_mb']))
+
+    report = {
+        'version': pyglarf.__version__,
+        'git_revision': git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeat': args.repeat,
+        'results': [result for _, result in results],
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        return 1 if compare(results, baseline, args.tolerance) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
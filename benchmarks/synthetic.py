@@ -0,0 +1,234 @@
+"""Generator of synthetic GLARF trees for benchmarking.
+
+The trees mimic the shape of real `.ns-autopb101e` output: clauses with
+subject and object NPs, verb groups carrying PropBank-style P-ARG pointers
+to indexed phrases, prepositional complements and adverbials, names,
+apposites, embedded clauses and punctuation.  `make_glarf_corpus` also
+generates the matching `.ns-2005-fast-ace-n-tuple101e` blocks and links
+sentences with TREE+INDEX arguments.
+"""
+
+# License: BSD
+
+import random
+
+NOUNS = ['man', 'company', 'market', 'deal', 'city', 'report', 'price',
+         'official', 'share', 'year', 'bank', 'country', 'team', 'plan']
+NAMES = ['Yahoo', 'Boston', 'Overture', 'Mary', 'John', 'Brendan',
+         'Alex', 'Europe']
+NE_TYPES = ['ORGANIZATION', 'GPE', 'PERSON']
+VERBS = [('acquired', 'ACQUIRE'), ('reported', 'REPORT'), ('said', 'SAY'),
+         ('sold', 'SELL'), ('bought', 'BUY'), ('expected', 'EXPECT'),
+         ('announced', 'ANNOUNCE')]
+PREPS = ['in', 'for', 'of', 'with', 'after', 'at']
+
+
+class _SentenceBuilder(object):
+    """Emits the tokens of one sentence in surface order."""
+
+    def __init__(self, rng, max_depth, max_predicates=None, cross_refs=()):
+        self.rng = rng
+        self.max_depth = max_depth
+        self.max_predicates = max_predicates
+        self.cross_refs = list(cross_refs)
+        self.n_tokens = 0
+        self.n_indices = 0
+        self.n_predicates = 0
+        self.offset = 0
+        self.np_indices = []
+        self.tuples = []
+
+    def token(self, tag, form, lemma=None):
+        """Emit a token, returns it along with its (form, index, offset,
+        tag, lemma) for the tuples"""
+        tok = '(%s %s %d)' % (tag, form, self.n_tokens)
+        info = (form, self.n_tokens, self.offset, tag,
+                lemma or form.upper())
+        self.n_tokens += 1
+        self.offset += len(form) + 1
+        return tok, info
+
+    def add_tuple(self, role, arg_label, head, arg):
+        """Record the tuple of a dependency between two tokens"""
+        head_form, head_token, head_offset, head_pos, head_lemma = head
+        arg_form, arg_token, arg_offset, arg_pos, arg_lemma = arg
+        fields = [role, role, arg_label or 'NIL', 'NIL', 'NIL', head_form,
+                  head_offset, head_token, head_pos, head_lemma, 'NIL', 'NIL',
+                  'NIL', '1' if head_pos.startswith('VB') else 'NIL', 'NIL',
+                  'NIL', 'NIL', arg_form, arg_offset, arg_token, arg_pos,
+                  arg_lemma, 'NIL', 'NIL', 'NIL']
+        self.tuples.append(' | '.join(map(str, fields)) + ' ')
+
+    def index(self):
+        self.n_indices += 1
+        return self.n_indices
+
+    def name(self):
+        first = self.n_tokens
+        name, head = self.token('NNP', self.rng.choice(NAMES))
+        return ('(NAME %s) (PTB2-POINTER |%d+1|) (SEM-FEATURE NHUMAN) '
+                '(NE-TYPE %s) (PATTERN NAME)' % (name, first,
+                                                 self.rng.choice(NE_TYPES)),
+                head)
+
+    def np(self, depth):
+        """Returns the NP, its INDEX and its head token"""
+        idx = self.index()
+        self.np_indices.append(idx)
+        if self.rng.random() < 0.3:
+            name, head = self.name()
+            parts = [name]
+        else:
+            first = self.n_tokens
+            det, det_info = self.token('DT', 'the')
+            noun, head = self.token('NN', self.rng.choice(NOUNS))
+            self.add_tuple('Q-POS', None, head, det_info)
+            parts = ['(Q-POS %s)' % det, '(HEAD %s)' % noun,
+                     '(PTB2-POINTER |%d+1|)' % first]
+            if depth < self.max_depth and self.rng.random() < 0.3:
+                pp, prep = self.pp(depth + 1)
+                self.add_tuple('COMP', None, head, prep)
+                parts.append('(COMP %s)' % pp)
+            if self.rng.random() < 0.1:
+                parts.append('(PUNCTUATION %s)'
+                             % self.token('|,|', '|,|')[0])
+                apposite_idx = self.index()
+                name, apposite = self.name()
+                self.add_tuple('APPOSITE', None, head, apposite)
+                parts.append('(APPOSITE (NP %s (INDEX %d)))'
+                             % (name, apposite_idx))
+        return '(NP %s (INDEX %d))' % (' '.join(parts), idx), idx, head
+
+    def pp(self, depth):
+        """Returns the PP and its head token"""
+        idx = self.index()
+        head, prep = self.token('IN', self.rng.choice(PREPS))
+        obj, _, noun = self.np(depth)
+        self.add_tuple('OBJ', None, prep, noun)
+        return '(PP (HEAD %s) (OBJ %s) (INDEX %d))' % (head, obj, idx), prep
+
+    def can_add_predicate(self):
+        return (self.max_predicates is None or
+                self.n_predicates < self.max_predicates)
+
+    def clause(self, depth, budget):
+        """Returns the clause and the token of its verb"""
+        self.n_predicates += 1
+        sbj, sbj_idx, sbj_head = self.np(depth)
+        form, base = self.rng.choice(VERBS)
+        verb, verb_info = self.token('VBD', form, base)
+        obj, obj_idx, obj_head = self.np(depth)
+        self.add_tuple('SBJ', 'ARG0', verb_info, sbj_head)
+        self.add_tuple('OBJ', 'ARG1', verb_info, obj_head)
+        vg_idx = self.index()
+        cross_arg = ''
+        if self.cross_refs:
+            cross_arg = ('(P-ARG2 (NP (EC-TYPE PB) (TREE+INDEX |%d+%d|))) '
+                         % self.cross_refs.pop())
+        vg = ('(VG (HEAD %s) (P-ARG0 (NP (EC-TYPE PB) (INDEX %d))) '
+              '(P-ARG1 (NP (EC-TYPE PB) (INDEX %d))) %s(INDEX %d) (BASE %s) '
+              '(VERB-SENSE 1) (SENSE-NAME "%s"))'
+              % (verb, sbj_idx, obj_idx, cross_arg, vg_idx, base, base))
+        vp = ['(HEAD %s)' % vg, '(OBJ %s)' % obj]
+        if self.rng.random() < 0.4:
+            adv, prep = self.pp(depth)
+            self.add_tuple('ADV', None, verb_info, prep)
+            vp.append('(ADV %s)' % adv)
+        if (depth < self.max_depth and self.n_tokens < budget
+                and self.can_add_predicate() and self.rng.random() < 0.5):
+            comp, comp_verb = self.clause(depth + 1, budget)
+            self.add_tuple('COMP', None, verb_info, comp_verb)
+            vp.append('(COMP %s)' % comp)
+        return ('(S (SBJ %s) (PRD (VP %s)) (INDEX %d))'
+                % (sbj, ' '.join(vp), self.index()), verb_info)
+
+
+def _build_sentence(n_tokens, max_depth, tree_num, seed, n_predicates=None,
+                    cross_refs=()):
+    """Returns the GLARF string of a sentence and its builder"""
+    rng = random.Random(seed)
+    builder = _SentenceBuilder(rng, max_depth, n_predicates, cross_refs)
+    conjuncts = []
+    while (builder.n_tokens < n_tokens if n_predicates is None
+           else builder.can_add_predicate()):
+        if conjuncts:
+            conjuncts.append('(CONJ %s)' % builder.token('CC', 'and')[0])
+        clause, _ = builder.clause(0, n_tokens)
+        conjuncts.append('(CONJOINED%d %s)' % (len(conjuncts) // 2 + 1,
+                                               clause))
+    punct, _ = builder.token('|.|', '|.|')
+    return ('((S %s (PUNCTUATION %s) (TREE-NUM %d) (FILE-NAME "synthetic") '
+            '(INDEX 0) (SENTENCE-OFFSET 0)))' % (' '.join(conjuncts), punct,
+                                                  tree_num)), builder
+
+
+def make_glarf_tree(n_tokens=100, max_depth=4, tree_num=0, seed=None,
+                    n_predicates=None):
+    """Generate the GLARF string of a sentence of about `n_tokens` tokens.
+
+    Parameters
+    ----------
+    n_tokens, int:
+        minimum number of PTB tokens in the sentence.
+    max_depth, int:
+        maximum nesting of embedded clauses and prepositional complements.
+    tree_num, int:
+        value of the TREE-NUM attribute.
+    seed, int or None:
+        seed for the random generator.
+    n_predicates, int or None:
+        number of verb predicates of the sentence.  Clauses are then added
+        until there are `n_predicates` of them, and `n_tokens` only limits
+        the embedding of clauses.
+
+    Returns
+    -------
+    glarf, string:
+        the sentence, formatted like GLARF's `.ns-autopb101e` output.
+    """
+    return _build_sentence(n_tokens, max_depth, tree_num, seed,
+                           n_predicates)[0]
+
+
+def make_glarf_trees(n_trees, n_tokens=100, max_depth=4, seed=0,
+                     n_predicates=None):
+    """Generate a list of `n_trees` synthetic GLARF strings."""
+    return [make_glarf_tree(n_tokens, max_depth, tree_num=i, seed=seed + i,
+                            n_predicates=n_predicates)
+            for i in xrange(n_trees)]
+
+
+def make_glarf_corpus(n_trees, n_tokens=100, max_depth=4, n_predicates=None,
+                      n_cross_links=0, seed=0):
+    """Generate the GLARF strings and the tuple blocks of a document.
+
+    Parameters
+    ----------
+    n_trees, n_tokens, max_depth, n_predicates, seed:
+        as in `make_glarf_trees`, which generates the same trees when
+        `n_cross_links` is 0.
+    n_cross_links, int:
+        number of predicates of every sentence, but the first, with a
+        P-ARG2 pointing to an NP of the previous sentence by TREE+INDEX.
+
+    Returns
+    -------
+    glarf_parses, list of strings:
+        the trees, as returned by GlarfWrapper.
+    glarf_tuples, list of lists of strings:
+        the tuple lines of every tree.
+    """
+    glarf_parses, glarf_tuples = [], []
+    np_indices = []
+    for tree_num in xrange(n_trees):
+        targets = np_indices[::max(1, len(np_indices) // max(1,
+                                                             n_cross_links))]
+        cross_refs = [(tree_num - 1, idx) for idx in
+                      reversed(targets[:n_cross_links])]
+        glarf, builder = _build_sentence(n_tokens, max_depth, tree_num,
+                                         seed + tree_num, n_predicates,
+                                         cross_refs)
+        glarf_parses.append(glarf)
+        glarf_tuples.append(builder.tuples)
+        np_indices = builder.np_indices
+    return glarf_parses, glarf_tuples
@@ -4,14 +4,73 @@ pyglarf: making sense of GLARF's output
 
 Python utilities for working on top of GLARF_'s output.
 
+The classes below are imported from their modules the first time they are
+accessed, so that `import pyglarf` stays cheap for workers that only use a
+part of the package.
+
+GlarfTree extends the `Tree` of the bundled NLTK backport by default.  To
+build it on NLTK's own Tree instead (NLTK 2, as GlarfTree uses `Tree.node`),
+set the environment variable PYGLARF_TREE_BACKEND=nltk, or call
+`pyglarf.use_tree_backend('nltk')` before GlarfTree is first accessed.
+
 .. _GLARF: http://nlp.cs.nyu.edu/meyers/GLARF.html
 """
 
-from relation import Relation
-from nounphrase import NounPhrase
-from glarf_tree import GlarfTree
-from wrapper import GlarfWrapper
-from glarf_forest import GlarfForest
+import os
+import sys
+from types import ModuleType
 
-__all__ = ['Relation', 'GlarfTree', 'GlarfForest', 'NounPhrase', 'GlarfWrapper']
+__all__ = ['Relation', 'GlarfTree', 'GlarfForest', 'LazyGlarfForest',
+           'NounPhrase', 'GlarfWrapper']
 __version__ = '0.1.1a'
+
+# module defining each name of __all__
+_exports = {'Relation': 'pyglarf.relation',
+            'NounPhrase': 'pyglarf.nounphrase',
+            'GlarfTree': 'pyglarf.glarf_tree',
+            'GlarfWrapper': 'pyglarf.wrapper',
+            'GlarfForest': 'pyglarf.glarf_forest',
+            'LazyGlarfForest': 'pyglarf.glarf_forest'}
+
+tree_backends = ('backport', 'nltk')
+tree_backend = os.environ.get('PYGLARF_TREE_BACKEND', 'backport')
+
+
+def use_tree_backend(name):
+    """Build GlarfTree on the Tree class of `name`, 'backport' or 'nltk'.
+
+    Must be called before GlarfTree is first accessed.
+    """
+    if name not in tree_backends:
+        raise ValueError('Unknown tree backend %r, expected one of %s.'
+                         % (name, ', '.join(tree_backends)))
+    package = sys.modules[__name__]
+    if 'pyglarf.glarf_tree' in sys.modules and package.tree_backend != name:
+        raise ValueError('GlarfTree is already built on the %s backend.'
+                         % package.tree_backend)
+    package.tree_backend = name
+
+
+class _LazyPackage(ModuleType):
+    """The pyglarf package, importing the module of a public name on its
+    first access"""
+
+    def __getattr__(self, name):
+        if name not in _exports:
+            raise AttributeError("'module' object has no attribute '%s'"
+                                 % name)
+        value = getattr(__import__(_exports[name], fromlist=[name]), name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_exports))
+
+
+_package = _LazyPackage(__name__, __doc__)
+_package.__dict__.update((key, value) for key, value in globals().items()
+                         if key not in ('_package', '__doc__'))
+# the functions above keep these globals, which Python 2 clears when the
+# original module object is garbage collected
+_package._module = sys.modules[__name__]
+sys.modules[__name__] = _package
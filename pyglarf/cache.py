@@ -0,0 +1,117 @@
+"""Content-addressed on-disk cache of Glarf outputs.
+
+Glarf takes seconds per sentence, and overlapping corpora are processed over
+and over.  A GlarfCache stores the outputs of every sentence in an SQLite
+database, keyed by a hash of the text and of the Glarf installation, so
+that GlarfWrapper only sends the sentences it has never seen to Glarf.
+
+"""
+
+# License: BSD
+
+import cPickle
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+class GlarfCache(object):
+    """On-disk cache of Glarf outputs, with least-recently-used eviction.
+
+    Pass it to GlarfWrapper to cache the outputs of `make_sentences` per
+    sentence and the outputs of `make_paragraphs` per call.  The tree
+    numbers and offsets of cached sentences are renumbered to their place
+    in each call, as if the call was a single Glarf run.  Sentences
+    whose trees refer to other trees (TREE+INDEX) are not cached, as the
+    reference depends on the rest of the batch.
+
+    Parameters
+    ----------
+    path, string:
+        SQLite database file, created if it does not exist.
+    max_size, int, default=1GB:
+        the least recently used entries are evicted when the pickled
+        outputs take more than `max_size` bytes.
+
+    Attributes
+    ----------
+    hits, misses, int:
+        number of lookups that were found, resp. not found, in the cache.
+
+    Examples
+    --------
+    >>> cache = GlarfCache('glarf-cache.db')
+    >>> with GlarfWrapper(cache=cache) as gw:
+    ...     _, _, glarf_out, _ = gw.make_sentences(sentences)
+    """
+    def __init__(self, path, max_size=2 ** 30):
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.text_factory = str
+        with self._db:
+            self._db.execute('CREATE TABLE IF NOT EXISTS outputs '
+                             '(key TEXT PRIMARY KEY, outputs BLOB, '
+                             'size INTEGER, last_used REAL)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS outputs_last_used '
+                             'ON outputs (last_used)')
+
+    @staticmethod
+    def key(installation, kind, text):
+        """Hash of the input text and of the Glarf installation"""
+        return hashlib.sha1('\0'.join((installation, kind, text))).hexdigest()
+
+    def get(self, key):
+        """Return the outputs stored under `key`, or None"""
+        with self._lock:
+            row = self._db.execute('SELECT outputs FROM outputs WHERE key = ?',
+                                   (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self._db:
+                self._db.execute('UPDATE outputs SET last_used = ? '
+                                 'WHERE key = ?', (time.time(), key))
+        return cPickle.loads(str(row[0]))
+
+    def put_many(self, items):
+        """Store `(key, outputs)` pairs, then evict entries if needed"""
+        rows = []
+        now = time.time()
+        for key, outputs in items:
+            blob = cPickle.dumps(outputs, cPickle.HIGHEST_PROTOCOL)
+            rows.append((key, sqlite3.Binary(blob), len(blob), now))
+        with self._lock:
+            with self._db:
+                self._db.executemany('INSERT OR REPLACE INTO outputs '
+                                     'VALUES (?, ?, ?, ?)', rows)
+                self._evict()
+
+    def put(self, key, outputs):
+        self.put_many([(key, outputs)])
+
+    def _evict(self):
+        size, = self._db.execute('SELECT COALESCE(SUM(size), 0) '
+                                 'FROM outputs').fetchone()
+        if size <= self.max_size:
+            return
+        evicted = []
+        for key, entry_size in self._db.execute('SELECT key, size FROM outputs '
+                                                'ORDER BY last_used'):
+            if size <= self.max_size:
+                break
+            evicted.append((key,))
+            size -= entry_size
+        self._db.executemany('DELETE FROM outputs WHERE key = ?', evicted)
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM outputs').fetchone()[0]
+
+    def close(self):
+        self._db.close()
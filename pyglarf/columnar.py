@@ -0,0 +1,518 @@
+"""Array-backed storage of GLARF trees.
+
+A ColumnarForest stores every node and leaf of a forest as one row of a few
+parallel integer arrays, instead of one Python list, with its attribute
+dictionary, per node.  Labels and leaf strings are interned in a shared
+string table.  Rows are numbered in preorder, so every subtree is a range of
+consecutive rows.
+
+Trees are accessed through ColumnarTree views, created on the fly, which are
+read-only and support the navigation and extraction methods of GlarfTree:
+`head`, `index`, `attributes`, `print_flat`, `rels`, `nps` and the like.
+The extraction methods work on the arrays directly and only create views
+for the nodes they return.  Phrases sharing an INDEX are returned by
+`phrase_by_id` as a ColumnarPhrases view, in place of a new GlarfTree.
+
+"""
+
+# License: BSD
+
+from array import array
+from collections import defaultdict
+
+from pyglarf.glarf_tree import GlarfTree, Tree, _TreeQueries
+from pyglarf.glarf_tree import excluded_tags, glarf_pos_tags
+from pyglarf.glarf_tree import _classify_label, PHRASE, POS, ATTRIBUTE
+from pyglarf.glarf_tree import EMPTY_CATEGORY
+from pyglarf.glarf_forest import _ForestLookups
+
+_label_classes = [PHRASE, POS, ATTRIBUTE, EMPTY_CATEGORY]
+_class_codes = dict((label_class, code)
+                    for code, label_class in enumerate(_label_classes))
+
+
+class ColumnarForest(_ForestLookups):
+    """A forest of GLARF trees stored as parallel arrays.
+
+    Every row is either a node, with a label, or a leaf, with a string.  The
+    arrays, indexed by row, are:
+
+    labels: string table index of the label, -1 for leaves
+    leaves: string table index of the leaf string, -1 for nodes
+    parents: row of the parent, -1 for roots
+    first_children: row of the first child, -1 if none
+    next_siblings: row of the next sibling, -1 if none
+    ends: row following the last descendant
+    heights: height of the subtree, as in `GlarfTree.height`
+    classes: label class, as a position in `_label_classes`
+
+    Parameters
+    ----------
+    trees, iterable of GlarfTrees, optional:
+        trees to store, see `add`.
+
+    Examples
+    --------
+    >>> forest = ColumnarForest.from_glarf(glarf_out, tuple_out)
+    >>> for tree in forest:
+    ...     print list(tree.rels())
+    """
+    def __init__(self, trees=()):
+        self.strings = []
+        self._string_ids = {}
+        self.labels = array('i')
+        self.leaves = array('i')
+        self.parents = array('i')
+        self.first_children = array('i')
+        self.next_siblings = array('i')
+        self.ends = array('i')
+        self.heights = array('i')
+        self.classes = array('b')
+        self.roots = array('i')
+        self._phrase_tables = {}
+        self._cross_phrases = {}
+        for tree in trees:
+            self.add(tree)
+
+    @classmethod
+    def from_glarf(cls, glarf_parses, glarf_tuples=None):
+        """Parse Glarf output strings, one at a time, into a new forest.
+
+        The parameters are those of GlarfForest.
+        """
+        forest = cls()
+        if not glarf_tuples:
+            glarf_tuples = [None for _ in glarf_parses]
+        for s, t in zip(glarf_parses, glarf_tuples):
+            forest.add(GlarfTree.glarf_parse(s, t))
+        return forest
+
+    def _string_id(self, s):
+        string_id = self._string_ids.get(s)
+        if string_id is None:
+            string_id = self._string_ids[s] = len(self.strings)
+            self.strings.append(s)
+        return string_id
+
+    def add(self, tree):
+        """Append a GlarfTree to the forest, returns its position"""
+        string_id = self._string_id
+        labels, leaves, parents = self.labels, self.leaves, self.parents
+        first_children, next_siblings = self.first_children, self.next_siblings
+        ends, heights, classes = self.ends, self.heights, self.classes
+        last_children = {}
+        self.roots.append(len(labels))
+        stack = [(tree, -1)]
+        while stack:
+            item, parent = stack.pop()
+            if item is None:  # all the descendants of `parent` were added
+                ends[parent] = len(labels)
+                continue
+            row = len(labels)
+            if parent >= 0:
+                previous = last_children.get(parent, -1)
+                if previous < 0:
+                    first_children[parent] = row
+                else:
+                    next_siblings[previous] = row
+                last_children[parent] = row
+            parents.append(parent)
+            first_children.append(-1)
+            next_siblings.append(-1)
+            ends.append(row + 1)
+            if isinstance(item, Tree):
+                labels.append(string_id(item.node))
+                leaves.append(-1)
+                heights.append(item.height())
+                classes.append(_class_codes[_classify_label(item.node,
+                                                            item.height())])
+                stack.append((None, row))
+                stack.extend((child, row) for child in reversed(item))
+            else:
+                labels.append(-1)
+                leaves.append(string_id(item))
+                heights.append(1)
+                classes.append(-1)
+        return len(self.roots) - 1
+
+    def __len__(self):
+        return len(self.roots)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in xrange(*index.indices(len(self)))]
+        return ColumnarTree(self, self.roots[index])
+
+    def __iter__(self):
+        for index in xrange(len(self)):
+            yield self[index]
+
+    def n_rows(self):
+        """Number of nodes and leaves stored"""
+        return len(self.labels)
+
+    def _item(self, row):
+        """Leaf string or tree view of a row"""
+        leaf = self.leaves[row]
+        if leaf >= 0:
+            return self.strings[leaf]
+        return ColumnarTree(self, row)
+
+    def _child_rows(self, row):
+        next_siblings = self.next_siblings
+        child = self.first_children[row]
+        while child >= 0:
+            yield child
+            child = next_siblings[child]
+
+    def _leaf_children(self, row):
+        """Strings of the leaf children of a row"""
+        strings, leaves = self.strings, self.leaves
+        return [strings[leaves[child]] for child in self._child_rows(row)
+                if leaves[child] >= 0]
+
+    def _pos_rows(self, row):
+        """Rows of the PTB leaves of the subtree at `row`, in preorder"""
+        classes = self.classes
+        pos = _class_codes[POS]
+        return (node for node in xrange(row, self.ends[row])
+                if classes[node] == pos)
+
+    def _cat_range(self, row):
+        """Same as `GlarfTree.cat_range`"""
+        leaves = [k for pos_row in self._pos_rows(row)
+                  for k in self._leaf_children(pos_row)[1:]]
+        if not leaves:
+            return ''
+        label = self.strings[self.labels[row]]
+        if self.heights[row] == 2:
+            return '%s %s-%s' % (label, leaves[1], leaves[-1])
+        first = self._item(self.first_children[row])
+        return '%s+%s %s-%s' % (label, first.node, leaves[1], leaves[-1])
+
+    def _flat_pos(self, row, indices, lemma, pos):
+        """Same as `GlarfTree.print_flat` on a PTB leaf"""
+        children = self._leaf_children(row)
+        my_form, my_lemma = children[:2]
+        output = str(my_form)
+        if lemma:
+            output += '/%s' % my_lemma
+        if pos:
+            output += '/%s' % self.strings[self.labels[row]]
+        if indices:
+            output += '/%s' % '+'.join(children[2:])
+        return output
+
+    def _flat_phrase(self, pos_rows, child_rows, indices, lemma, pos,
+                     structure):
+        """Same as `GlarfTree.print_flat` on a phrase with the given PTB
+        leaves and children"""
+        output = ' '.join(self._flat_pos(row, indices, lemma, pos)
+                          for row in pos_rows)
+        if structure:
+            labels = self.labels
+            output += ' (%s)' % ', '.join(filter(None, (
+                self._cat_range(row) for row in child_rows
+                if labels[row] >= 0)))
+        return output
+
+    def _phrase_table(self, row):
+        """INDEX -> phrases table of the subtree at `row`, built on first use.
+
+        Same as `GlarfTree._build_index`: phrases carrying an INDEX, empty
+        categories excluded, in preorder.
+        """
+        phrases = self._phrase_tables.get(row)
+        if phrases is not None:
+            return phrases
+        strings, labels = self.strings, self.labels
+        first_children, next_siblings = self.first_children, self.next_siblings
+        phrases = defaultdict(list)
+        for node in xrange(row, self.ends[row]):
+            if labels[node] < 0:
+                continue
+            ids = []
+            empty_category = False
+            child = first_children[node]
+            while child >= 0:
+                label = labels[child]
+                if label >= 0:
+                    if strings[label] == 'INDEX':
+                        first = first_children[child]
+                        if first >= 0:
+                            ids.append(self._item(first))
+                    elif strings[label] == 'EC-TYPE':
+                        empty_category = True
+                child = next_siblings[child]
+            if not empty_category:
+                for id_nr in set(ids):
+                    phrases[id_nr].append(ColumnarTree(self, node))
+        phrases = self._phrase_tables[row] = dict(phrases)
+        return phrases
+
+
+class ColumnarTree(_TreeQueries):
+    """Read-only view of a tree, or subtree, of a ColumnarForest.
+
+    Views behave like GlarfTrees for navigation and extraction: children
+    are accessed by iteration or indexing and are either views or leaf
+    strings.  Two views are equal if they show the same row of the same
+    forest.
+    """
+    __slots__ = ('_forest', '_row')
+
+    def __init__(self, forest, row):
+        self._forest = forest
+        self._row = row
+
+    @property
+    def node(self):
+        return self._forest.strings[self._forest.labels[self._row]]
+
+    def __iter__(self):
+        forest = self._forest
+        strings, leaves = forest.strings, forest.leaves
+        next_siblings = forest.next_siblings
+        child = forest.first_children[self._row]
+        while child >= 0:
+            leaf = leaves[child]
+            yield strings[leaf] if leaf >= 0 else ColumnarTree(forest, child)
+            child = next_siblings[child]
+
+    def __len__(self):
+        next_siblings = self._forest.next_siblings
+        child = self._forest.first_children[self._row]
+        n_children = 0
+        while child >= 0:
+            n_children += 1
+            child = next_siblings[child]
+        return n_children
+
+    def __nonzero__(self):
+        return self._forest.first_children[self._row] >= 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice) or index < 0:
+            return list(self)[index]
+        next_siblings = self._forest.next_siblings
+        child = self._forest.first_children[self._row]
+        while index and child >= 0:
+            child = next_siblings[child]
+            index -= 1
+        if child < 0:
+            raise IndexError('index out of range')
+        return self._forest._item(child)
+
+    def __eq__(self, other):
+        return (isinstance(other, ColumnarTree) and
+                self._forest is other._forest and self._row == other._row)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((id(self._forest), self._row))
+
+    def __repr__(self):
+        return '<ColumnarTree %s at row %d>' % (self.node, self._row)
+
+    def height(self):
+        return self._forest.heights[self._row]
+
+    def label_class(self):
+        return _label_classes[self._forest.classes[self._row]]
+
+    def subtrees(self, filter=None):
+        """Views of the subtree and of all its descendants, in preorder"""
+        forest = self._forest
+        labels = forest.labels
+        for row in xrange(self._row, forest.ends[self._row]):
+            if labels[row] >= 0:
+                tree = ColumnarTree(forest, row)
+                if filter is None or filter(tree):
+                    yield tree
+
+    def leaves(self):
+        strings, leaves = self._forest.strings, self._forest.leaves
+        return [strings[leaves[row]]
+                for row in xrange(self._row, self._forest.ends[self._row])
+                if leaves[row] >= 0]
+
+    def parent(self, subtree):
+        """Return the view directly dominating `subtree`, or None."""
+        if (not isinstance(subtree, ColumnarTree) or
+                subtree._forest is not self._forest or
+                not self._row < subtree._row < self._forest.ends[self._row]):
+            return None
+        return ColumnarTree(self._forest, self._forest.parents[subtree._row])
+
+    def _phrase_table(self):
+        return self._forest._phrase_table(self._row)
+
+    def _phrase_group(self, node, phrases):
+        return ColumnarPhrases(self._forest, node,
+                               [phrase._row for phrase in phrases])
+
+    def attributes(self, excluded=excluded_tags):
+        if excluded is not excluded_tags:
+            return _TreeQueries.attributes(self, excluded)
+        forest = self._forest
+        strings, labels = forest.strings, forest.labels
+        classes = forest.classes
+        attribute = _class_codes[ATTRIBUTE]
+        return dict((strings[labels[child]],
+                     ' '.join(forest._leaf_children(child)))
+                    for child in forest._child_rows(self._row)
+                    if classes[child] == attribute)
+
+    def ptb_leaves(self, included=glarf_pos_tags):
+        if included is not glarf_pos_tags:
+            return _TreeQueries.ptb_leaves(self, included)
+        forest = self._forest
+        return (ColumnarTree(forest, row)
+                for row in forest._pos_rows(self._row))
+
+    def cat_range(self):
+        return self._forest._cat_range(self._row)
+
+    def print_flat(self, indices=True, lemma=True, pos=True, structure=True):
+        forest, row = self._forest, self._row
+        label_class = self.label_class()
+        if label_class == POS:
+            return forest._flat_pos(row, indices, lemma, pos)
+        elif label_class != PHRASE:
+            return ''
+        return forest._flat_phrase(forest._pos_rows(row),
+                                   forest._child_rows(row),
+                                   indices, lemma, pos, structure)
+
+    def nps(self):
+        forest = self._forest
+        labels, leaves = forest.labels, forest.leaves
+        np_label = forest._string_ids.get('NP')
+        ec_type = forest._string_ids.get('EC-TYPE')
+        if np_label is None:
+            return
+        for row in xrange(self._row, forest.ends[self._row]):
+            if labels[row] != np_label:
+                continue
+            if any(labels[child] == ec_type or leaves[child] == ec_type
+                   for child in forest._child_rows(row)):
+                continue
+            np = ColumnarTree(forest, row)
+            yield self._build_np(np), np
+
+    def rels(self):
+        forest = self._forest
+        strings, labels = forest.strings, forest.labels
+        parents = forest.parents
+        first_children = forest.first_children
+        next_siblings = forest.next_siblings
+        for row in xrange(self._row, forest.ends[self._row]):
+            if labels[row] < 0:
+                continue
+            child = first_children[row]
+            while child >= 0:
+                label = labels[child]
+                if label >= 0 and strings[label].startswith('P-ARG'):
+                    break
+                child = next_siblings[child]
+            else:
+                continue
+            # the grandparent, or the root of the view if there is none
+            grandparent = self._row
+            if row != self._row and parents[row] != self._row:
+                grandparent = parents[parents[row]]
+            yield self._build_rel(ColumnarTree(forest, grandparent),
+                                  ColumnarTree(forest, row))
+
+
+class ColumnarPhrases(_TreeQueries):
+    """Read-only view of phrases of a ColumnarForest gathered under a new
+    label, the counterpart of `GlarfTree(node, phrases)`.
+
+    `phrase_by_id` returns one, labelled '', for an INDEX carried by several
+    phrases, and an empty one, labelled '?', for an unknown INDEX.
+    """
+    __slots__ = ('_forest', 'node', '_rows')
+
+    def __init__(self, forest, node, rows):
+        self._forest = forest
+        self.node = node
+        self._rows = rows
+
+    def __iter__(self):
+        forest = self._forest
+        return (ColumnarTree(forest, row) for row in self._rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __nonzero__(self):
+        return bool(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        return ColumnarTree(self._forest, self._rows[index])
+
+    def __eq__(self, other):
+        return (isinstance(other, ColumnarPhrases) and
+                self._forest is other._forest and
+                (self.node, self._rows) == (other.node, other._rows))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((id(self._forest), self.node, tuple(self._rows)))
+
+    def __repr__(self):
+        return '<ColumnarPhrases %r of rows %s>' % (self.node, self._rows)
+
+    def height(self):
+        heights = self._forest.heights
+        return 1 + max([heights[row] for row in self._rows] or [0])
+
+    def label_class(self):
+        return _classify_label(self.node, self.height())
+
+    def subtrees(self, filter=None):
+        if filter is None or filter(self):
+            yield self
+        for tree in self:
+            for subtree in tree.subtrees(filter):
+                yield subtree
+
+    def leaves(self):
+        return [leaf for tree in self for leaf in tree.leaves()]
+
+    def parent(self, subtree):
+        """Return the view directly dominating `subtree`, or None."""
+        if not isinstance(subtree, ColumnarTree):
+            return None
+        if subtree._forest is self._forest and subtree._row in self._rows:
+            return self
+        for tree in self:
+            parent = tree.parent(subtree)
+            if parent is not None:
+                return parent
+        return None
+
+    def _phrase_table(self):
+        phrases = defaultdict(list)
+        for row in self._rows:
+            for id_nr, found in self._forest._phrase_table(row).iteritems():
+                phrases[id_nr].extend(found)
+        return dict(phrases)
+
+    def _phrase_group(self, node, phrases):
+        return ColumnarPhrases(self._forest, node,
+                               [phrase._row for phrase in phrases])
+
+    def print_flat(self, indices=True, lemma=True, pos=True, structure=True):
+        forest = self._forest
+        pos_rows = (pos_row for row in self._rows
+                    for pos_row in forest._pos_rows(row))
+        return forest._flat_phrase(pos_rows, self._rows,
+                                   indices, lemma, pos, structure)
@@ -1,14 +1,84 @@
+from collections import defaultdict, OrderedDict
 from pyglarf import GlarfTree
 import warnings
 
+_missing = object()
 
-class GlarfForest(list):
+
+def _tree_index(value):
+    """(tree_id, id) strings of a TREE+INDEX value such as |0+15|"""
+    return tuple(value.strip('|').split('+'))
+
+
+class _ForestLookups(object):
+    """Cross-sentence lookups shared by GlarfForest and LazyGlarfForest.
+
+    Resolved phrases, including the INDEX values no phrase has, are kept in
+    a map from tree position to a dict keyed by INDEX, so every
+    cross-sentence reference only reaches the target tree once.  Subclasses
+    set `_cross_phrases` to an empty dict.
+    """
+
+    def phrase_by_id(self, tree_id, id):
+        position = int(tree_id)
+        phrases = self._cross_phrases.get(position)
+        phrase = _missing if phrases is None else phrases.get(id, _missing)
+        if phrase is _missing:
+            try:
+                tree = self[position]
+            except IndexError:
+                warnings.warn('TREE+INDEX out of forest range.')
+                return None
+            phrase = tree.phrase_by_id(id)
+            self._cross_phrases.setdefault(position, {})[id] = phrase
+        return phrase
+
+    def resolve_cross_references(self):
+        """Resolve every TREE+INDEX reference of the forest at once.
+
+        All the trees are scanned for references, then each referenced tree
+        is visited once to resolve all the references to it.  Later calls
+        to `phrase_by_id`, such as when extracting relations, are then
+        answered from the map.  In a LazyGlarfForest, this only holds for
+        the trees still in the cache.
+
+        Returns
+        -------
+        references, dict:
+            maps every (tree_id, id) pair found in TREE+INDEX values, as
+            strings, to the phrase it refers to.  References out of the
+            forest are left out.
+        """
+        is_reference = lambda t: t.node == 'TREE+INDEX' and len(t)
+        by_tree = defaultdict(set)
+        for tree in self:
+            for ref in tree.subtrees(is_reference):
+                tree_id, id = _tree_index(ref[0])
+                by_tree[int(tree_id)].add((tree_id, id))
+
+        references = {}
+        for position in sorted(by_tree):
+            if not 0 <= position < len(self):
+                continue
+            tree = self[position]
+            phrases = self._cross_phrases.setdefault(position, {})
+            for tree_id, id in by_tree[position]:
+                if id not in phrases:
+                    phrases[id] = tree.phrase_by_id(id)
+                references[tree_id, id] = phrases[id]
+        return references
+
+
+class GlarfForest(_ForestLookups, list):
     """A forest of GlarfTrees
 
     GlarfForest implements a frendlier interface than building GlarfTrees
     individually. Trees in a forest have a backlink for solving cross-sentence
     arguments.
 
+    All the trees are parsed upon construction.  See LazyGlarfForest for a
+    forest that only parses the trees that are actually used.
+
     Parameters
     ----------
 
@@ -21,6 +91,7 @@ class GlarfForest(list):
     """
 
     def __init__(self, glarf_parses, glarf_tuples=None):
+        self._cross_phrases = {}
         if not glarf_tuples:
             glarf_tuples = [[] for _ in glarf_parses]
         for s, t in zip(glarf_parses, glarf_tuples):
@@ -28,11 +99,67 @@ class GlarfForest(list):
             tree._forest = self
             self.append(tree)
 
-    def phrase_by_id(self, tree_id, id):
-        try:
-            tree = self[int(tree_id)]
-        except IndexError:
-            warnings.warn('TREE+INDEX out of forest range.')
-            return None
 
-        return tree.phrase_by_id(id)
+class LazyGlarfForest(_ForestLookups):
+    """A forest of GlarfTrees parsed on demand
+
+    Only the raw Glarf output is kept.  A tree is parsed when it is indexed
+    or iterated over, and the most recently used trees are kept in a bounded
+    cache.  Cross-sentence arguments are resolved across the whole forest,
+    like in GlarfForest, parsing the referenced trees if needed.  The
+    phrases resolved in a tree are forgotten when it leaves the cache, as
+    they would keep it in memory.
+
+    Parameters
+    ----------
+
+    glarf_parses: sequence of strings,
+        Glarf output strings, as returned by GlarfWrapper.make_* functions.
+        Any object supporting `len` and integer indexing can be used, so the
+        strings can also be read from disk only when they are needed.
+
+    glarf_tuples: sequence of lists, optional
+        Raw text Glarf tuples. Must match length of glarf_parses.
+
+    cache_size: int, default=128
+        Maximum number of parsed trees kept in memory.
+    """
+
+    def __init__(self, glarf_parses, glarf_tuples=None, cache_size=128):
+        if cache_size < 1:
+            raise ValueError('cache_size must be at least 1.')
+        self._glarf_parses = glarf_parses
+        self._glarf_tuples = glarf_tuples
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cross_phrases = {}
+
+    def __len__(self):
+        return len(self._glarf_parses)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in xrange(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('forest index out of range')
+
+        tree = self._cache.pop(index, None)
+        if tree is None:
+            tree = self._parse(index)
+            tree._forest = self
+            if len(self._cache) >= self.cache_size:
+                # least recently used
+                evicted, _ = self._cache.popitem(last=False)
+                self._cross_phrases.pop(evicted, None)
+        self._cache[index] = tree
+        return tree
+
+    def _parse(self, index):
+        tuples = self._glarf_tuples[index] if self._glarf_tuples else None
+        return GlarfTree.glarf_parse(self._glarf_parses[index], tuples)
+
+    def __iter__(self):
+        for index in xrange(len(self)):
+            yield self[index]
@@ -6,13 +6,16 @@
 import re
 from collections import defaultdict
 
-# backport
-try:
-    from nltk.tree import Tree
-except ImportError:
-    from .nltkbackports import Tree
-
+import pyglarf
 from pyglarf import Relation, NounPhrase
+from pyglarf.tuples import HEAD_TOKEN, HEAD_LEMMA, ARG_TOKEN, ARG_LEMMA
+
+# Tree class, see pyglarf.use_tree_backend, which validates the choice
+pyglarf.use_tree_backend(pyglarf.tree_backend)
+if pyglarf.tree_backend == 'nltk':
+    from nltk.tree import Tree
+else:
+    from pyglarf.nltkbackports import Tree
 
 ptb_tags = ['CC', 'CD', 'DT', 'EX', 'FW', 'IN', 'JJ', 'JJR', 'JJS', 'LS', 'MD',
             'NN', 'NNS', 'NNP', 'NNPS', 'PDT', 'POS', 'PRP', 'PRP$', 'RB',
@@ -21,6 +24,17 @@ ptb_tags = ['CC', 'CD', 'DT', 'EX', 'FW', 'IN', 'JJ', 'JJR', 'JJS', 'LS', 'MD',
 glarf_pos_tags = ptb_tags + ['|.|', '|,|', '$', '|#|', '|``|', "|''|", '|:|']
 excluded_tags = glarf_pos_tags + ['EC-TYPE']
 
+# Set for the label checks, hashed once instead of scanning a list.
+_pos_tags = frozenset(glarf_pos_tags)
+
+# glarf_parse interns the labels and the values of these attributes, which
+# take a few values repeated in every tree, so that parsed trees share one
+# copy of each.  Open-class values, such as BASE, SENSE-NAME, FILE-NAME,
+# PTB2-POINTER or REG-*, are left alone.
+_closed_class_attributes = frozenset(['EC-TYPE', 'INDEX', 'NE-TYPE', 'PATTERN',
+                                      'SEM-FEATURE', 'TRANSPARENT',
+                                      'VERB-SENSE'])
+
 leaf_pattern = re.compile(""" \(NIL\)   | # The (NIL) marker is a leaf value
                              ".*?"      | # "Quoted strings" are leaf values
                              \|.*?\|    | # | barred stuff | are leaf values
@@ -29,59 +43,178 @@ leaf_pattern = re.compile(""" \(NIL\)   | # The (NIL) marker is a leaf value
 
 leaf_pattern = ' \(NIL\)|".*?"|\|.*?\||[^\s\(\)]+'
 
+# Tokenizer of GlarfTree.glarf_parse: the one Tree.parse compiles from
+# leaf_pattern, with a group for each of opening, closing and leaf tokens.
+_glarf_token_re = re.compile('\(\s*([^\s\(\)]*)|(\))|(%s)' % leaf_pattern)
+
+# Label classes, see GlarfTree.label_class
+PHRASE = 'phrase'
+POS = 'pos'
+ATTRIBUTE = 'attribute'
+EMPTY_CATEGORY = 'empty-category'
+
+
+def _classify_label(node, height):
+    if height != 2:
+        return PHRASE
+    elif node in _pos_tags:
+        return POS
+    elif node == 'EC-TYPE':
+        return EMPTY_CATEGORY
+    else:
+        return ATTRIBUTE
+
+
+def _intern_leaves(tree):
+    """Intern the leaf strings of a preterminal, in place"""
+    try:
+        tree[:] = map(intern, tree)
+    except TypeError:  # unicode leaves, or an empty subtree
+        pass
+
+
+def _semantic_score(np):
+    """Amount of semantic information of an NP: name pattern, features"""
+    return sum(1 for key, val in np.attrs.iteritems()
+               if key == 'PATTERN' and val == 'NAME' or
+               key in ('SEM-FEATURE', 'NE-TYPE'))
+
+
+def _parse_tuples(raw_tuples_list):
+    """Split the lines of a GLARF tuple block into tuples of fields"""
+    return [tuple(val.strip() for val in t.split('|'))
+            for t in raw_tuples_list] if raw_tuples_list else []
+
+
+def _lemma_table(tuples):
+    """Map token indices to lemmas, using the head and dependent columns"""
+    lemmas = {}
+    for t in tuples:
+        lemmas[t[HEAD_TOKEN]] = t[HEAD_LEMMA]
+        lemmas[t[ARG_TOKEN]] = t[ARG_LEMMA]
+    return lemmas
+
+
+class _TreeBuilder(object):
+    """Builds the nodes of a GlarfTree bottom-up, recording the metadata
+    that GlarfTree would otherwise compute on demand: heights, label
+    classes, the parent map and the INDEX -> phrase table.
+
+    Shared by `GlarfTree.glarf_parse` and the binary decoder of
+    `pyglarf.serialize`, which build the same trees from different inputs.
+    """
+    def __init__(self, cls):
+        self.cls = cls
+        self.parents = {}
+        self.phrases = defaultdict(list)
+
+    def node(self, label, children, order):
+        """Build the node `label` once all its `children` are built.
+
+        `order` is the position of the node in preorder, as nodes are
+        closed in postorder.
+        """
+        if type(label) is str:
+            label = intern(label)
+        tree = self.cls(label, children)
+        parents = self.parents
+        height = 1
+        ids = []
+        empty_category = False
+        for child in children:
+            if isinstance(child, Tree):
+                parents[id(child)] = tree
+                if child._height >= height:
+                    height = child._height + 1
+                if child.node == 'INDEX' and len(child):
+                    ids.append(child[0])
+                elif child.node == 'EC-TYPE':
+                    empty_category = True
+            elif height == 1:
+                height = 2
+        tree._height = height
+        tree._label_class = _classify_label(label, height)
+        if ids and not empty_category:
+            for id_nr in set(ids):
+                self.phrases[id_nr].append((order, tree))
+        return tree
+
+    def finish(self, tree, tuples):
+        """Attach the metadata and `tuples` to the root `tree`"""
+        phrases = self.phrases
+        # phrases were closed in postorder, the table lists them in preorder
+        for id_nr, res in phrases.items():
+            res.sort()
+            phrases[id_nr] = [phrase for _, phrase in res]
+        tree._tuples = tuples
+        tree._parents = self.parents
+        tree._phrases = dict(phrases)
+        return tree
 
-class GlarfTree(Tree):
-    def __init__(self, *args, **kwargs):
-        Tree.__init__(self, *args, **kwargs)
-        self._forest = None
-        self._tuples = None
+
+class _TreeQueries(object):
+    """Navigation and extraction shared by GlarfTree and the read-only views
+    of `pyglarf.columnar`.
+
+    Subclasses provide `node`, iteration and indexing over the children,
+    `height`, `label_class`, `subtrees`, `parent`, `_phrase_table`, the
+    INDEX -> phrases table, and `_phrase_group`, which gathers several
+    phrases under a new label.
+    """
+    __slots__ = ()
 
     def daughters(self):
         """Get the tags of all direct descendants of the tree"""
-        return (tr.node if isinstance(tr, Tree) else tr for tr in self)
+        return (tr.node if isinstance(tr, _TreeQueries) else tr for tr in self)
+
+    def is_preterminal(self):
+        """Whether the children of the node are all leaves"""
+        return self.height() == 2
 
     def attributes(self, excluded=excluded_tags):
         """Return all attribute leaves of a subtree, as a Python dictionary"""
-        return dict([(tr.node, ' '.join(tr)) for tr in filter(lambda t:
-                                                isinstance(t, GlarfTree) and
-                                                t.height() == 2 and
-                                                t.node not in excluded,
-                                                self)])
+        if excluded is excluded_tags:
+            is_attribute = lambda t: (isinstance(t, _TreeQueries) and
+                                      t.label_class() == ATTRIBUTE)
+        else:
+            excluded = frozenset(excluded)
+            is_attribute = lambda t: (isinstance(t, _TreeQueries) and
+                                      t.is_preterminal() and
+                                      t.node not in excluded)
+        return dict([(tr.node, ' '.join(tr)) for tr in filter(is_attribute,
+                                                              self)])
 
     def ptb_leaves(self, included=glarf_pos_tags):
-        return self.subtrees(lambda t: t.height() == 2 and t.node in included)
+        if included is glarf_pos_tags:
+            return self.subtrees(lambda t: t.label_class() == POS)
+        included = frozenset(included)
+        return self.subtrees(lambda t: t.is_preterminal() and
+                             t.node in included)
 
     def phrase_by_id(self, id_nr):
-        res = self.subtrees(lambda tr: any((isinstance(subtr, Tree)
-                                            and subtr.node == 'INDEX'
-                                            and subtr[0] == id_nr
-                                            for subtr in tr))
-                            and not any((isinstance(subtr, Tree)
-                                        and subtr.node == 'EC-TYPE'
-                                        for subtr in tr)))
-        res = list(res)
+        res = self._phrase_table().get(id_nr, [])
         if len(res) == 1:
             result = res[0]
             # try to get its parent
             parent = self.parent(result)
             return parent if parent is not None else result
         elif len(res) > 1:
-            return GlarfTree('', res)
+            return self._phrase_group('', res)
         else:
-            return GlarfTree('?', [])
+            return self._phrase_group('?', [])
 
     def head(self):
         for subtr in self:
-            if isinstance(subtr, Tree) and subtr.node == 'HEAD':
+            if isinstance(subtr, _TreeQueries) and subtr.node == 'HEAD':
                 return subtr
         return None
 
     def index(self):
         for subtr in self:
-            if isinstance(subtr, Tree) and subtr.node == 'INDEX':
+            if isinstance(subtr, _TreeQueries) and subtr.node == 'INDEX':
                 return subtr[0]
         for subtr in self:
-            if isinstance(subtr, Tree) and subtr.node == 'HEAD':
+            if isinstance(subtr, _TreeQueries) and subtr.node == 'HEAD':
                 return subtr.index()
         return 'leaf' + '+'.join(self.ptb_leaves().next()[2:])
         return None
@@ -105,15 +238,16 @@ class GlarfTree(Tree):
         leaves = [k for ks in self.ptb_leaves() for k in ks[1:]]
         if not leaves:
             return ''
-        elif self.height() == 2:
+        elif self.is_preterminal():
             return '%s %s-%s' % (self.node, leaves[1], leaves[-1])
         else:
             return '%s+%s %s-%s' % (self.node, self[0].node, leaves[1],
                                     leaves[-1])
 
     def print_flat(self, indices=True, lemma=True, pos=True, structure=True):
-        if self.height() == 2:
-            if self.node in glarf_pos_tags:
+        label_class = self.label_class()
+        if label_class != PHRASE:
+            if label_class == POS:
                 my_form, my_lemma = self[:2]
                 my_idx = self[2:]
                 output = str(my_form)
@@ -134,13 +268,6 @@ class GlarfTree(Tree):
                                               (t.cat_range() for t in self)))
         return output
 
-    def parent(self, subtree):
-        # XXX: why can't we use trees with backlinks?
-        try:
-            return self.subtrees(lambda tr: subtree in tr).next()
-        except StopIteration:
-            return None
-
     def _build_np(self, np):
         """Construct an NP object"""
         head = np.head()
@@ -153,12 +280,12 @@ class GlarfTree(Tree):
             index = np.index()
         subphrases = {}  # specifiers, complements and relative clauses
         links = {}  # apposites and affiliated links
-        parent = self.subtrees(lambda tr: np in tr).next()
-        role = parent.node
+        parent = self.parent(np)
+        role = parent.node if parent is not None else None
 
         # gather interesting attributes of the NP from its children
         for child in np:
-            if isinstance(child, GlarfTree):
+            if isinstance(child, _TreeQueries):
                 # subtrees:
                 if any(t in child.node for t in ('-POS', 'COMP', 'RELATIVE',
                                                  'ADV')):
@@ -182,7 +309,7 @@ class GlarfTree(Tree):
                                          if idx.node.startswith('INDEX')]
 
         return NounPhrase(index, head, role, name, conj, date, subphrases,
-                          links, np.print_flat(), **attrs)
+                          links, np.print_flat(), lazy=True, **attrs)
 
     def _build_rel(self, parent, pred):
         """Construct a relation from an appropriate Tree."""
@@ -199,7 +326,7 @@ class GlarfTree(Tree):
         support = []
 
         for tr in pred:
-            if not isinstance(tr, GlarfTree):
+            if not isinstance(tr, _TreeQueries):
                 continue
             if tr.node.startswith('AUX'):
                 aux[tr.node] = tr
@@ -246,7 +373,7 @@ class GlarfTree(Tree):
                 support.append((phrase_role, support_type, id_nr, phrase))
 
         for tr in parent:
-            if not isinstance(tr, GlarfTree):
+            if not isinstance(tr, _TreeQueries):
                 continue
             if any(tr.node.startswith(tag) for tag in ('ADV', 'OBJ', 'PRD',
                                                        'L-SBJ', 'PRT')):
@@ -263,75 +390,167 @@ class GlarfTree(Tree):
         return ((self._build_np(np), np) for np in self.subtrees(is_np))
 
     def entities(self):
-        """Extracts NPs and builds a dictionary of entity-attributes"""
-        entities = defaultdict(list)
+        """Extracts NPs and builds a dictionary of entity-attributes
+
+        Every NP is attached to the mention with the most semantic
+        information among itself and the NPs it directly links to.
+        """
         nps_by_id = {}
         entities = {}
         for np, _ in self.nps():
             idx = np.index
             nps_by_id[idx] = np
             entities[idx] = np.short_repr(), []
+        scores = dict((idx, _semantic_score(np))
+                      for idx, np in nps_by_id.iteritems())
+        flat = lambda tree: tree.print_flat(indices=False, lemma=False,
+                                            pos=False, structure=False)
 
         for idx, np in nps_by_id.items():
-            #print "***"
-            #print np.short_repr()
-            #if len(np.name) > 0:
-            #    key = _flat_list(np.name, indices=False)
-            #    entities[key].extend(
-            #        attr.print_flat(indices=False)
-            #        for attr in np.subphrases.values()
-            #    )
-            #elif np.head is not None:
-            # Take the linked np with the most semantic info (???)
-            linked_structures = [nps_by_id.get(sub_idx)
-                                 for _, indices in np.links.items()
-                                 for sub_idx in indices]
-            linked_structures.append(np)
-            linked_structures = filter(lambda x: x is not None, linked_structures)
-
-            # score counts the amount of semantic info, I hope
-            score = lambda np: len(filter(lambda (key, val):
-                                   key == 'PATTERN' and val == 'NAME' or
-                                   key == 'SEM-FEATURE' or
-                                   key == 'NE-TYPE',
-                                   np.attrs.items()))
-
-            linked_structures = sorted(linked_structures, key=score)
-            best = linked_structures[-1]
-            key = best.index
+            # Take the linked np with the most semantic info, np itself on
+            # ties.  The sort is stable, the other ones keep their order.
+            linked = [sub_idx for indices in np.links.values()
+                      for sub_idx in indices if sub_idx in nps_by_id]
+            linked.append(idx)
+            linked.sort(key=scores.__getitem__)
+            key = linked[-1]
             if key == idx:
-                entities[key][1].extend(attr.print_flat(indices=False, lemma=False, pos=False, structure=False)
-                                        for apos in linked_structures[:-1]
-                                        for attr in apos.subphrases.values())
+                entities[key][1].extend(flat(attr) for sub_idx in linked[:-1]
+                                        for attr in nps_by_id[sub_idx]
+                                        .subphrases.values())
             else:
                 head = np.head
-                while isinstance(head, GlarfTree) and head.height() > 2:
-                    entities[key][1].append(head.print_flat(indices=False, lemma=False, pos=False, structure=False))
+                while isinstance(head, _TreeQueries) and head.height() > 2:
+                    entities[key][1].append(flat(head))
                     head = head[0].head()
 
-            entities[key][1].extend(attr.print_flat(indices=False, lemma=False, pos=False, structure=False)
-                                    for attr in np.subphrases.values()
-            )
+            entities[key][1].extend(flat(attr)
+                                    for attr in np.subphrases.values())
         return entities
 
+
+class GlarfTree(_TreeQueries, Tree):
+    """A GLARF tree, usually obtained from `GlarfTree.glarf_parse`.
+
+    Heights, label classes, parent links and the INDEX table are computed
+    once and cached, so trees should not be modified after they are built.
+    """
+    def __init__(self, *args, **kwargs):
+        Tree.__init__(self, *args, **kwargs)
+        self._forest = None
+        self._tuples = None
+        self._phrases = None
+        self._parents = None
+        self._height = None
+        self._label_class = None
+
+    def height(self):
+        """Return the height of the tree, computed only once"""
+        if self._height is None:
+            self._height = Tree.height(self)
+        return self._height
+
+    def label_class(self):
+        """Classify the node as POS, ATTRIBUTE, EMPTY_CATEGORY or PHRASE.
+
+        The first three are preterminals: PTB part-of-speech tags, attribute
+        nodes such as INDEX or BASE and the EC-TYPE marker of empty
+        categories.  Every other node is a PHRASE.
+        """
+        if self._label_class is None:
+            self._label_class = _classify_label(self.node, self.height())
+        return self._label_class
+
+    def _phrase_group(self, node, phrases):
+        return GlarfTree(node, phrases)
+
+    def _phrase_table(self):
+        if self._phrases is None:
+            self._build_index()
+        return self._phrases
+
+    def _build_index(self):
+        """Record node metadata and the INDEX -> phrase table in one pass.
+
+        Heights and label classes are stored on every node.  Parents are
+        keyed by node identity, so structurally equal subtrees are told
+        apart.  Every INDEX value is mapped to the phrases carrying it, in
+        preorder.  Empty categories (phrases with an EC-TYPE) only point to
+        other phrases and are left out of the table.
+
+        `glarf_parse` computes the same information while parsing, this is
+        only needed for trees built by other means.
+        """
+        phrases = defaultdict(list)
+        parents = {}
+        preorder = []
+        stack = [self]
+        while stack:
+            tr = stack.pop()
+            preorder.append(tr)
+            ids = []
+            empty_category = False
+            for child in tr:
+                if isinstance(child, Tree):
+                    parents[id(child)] = tr
+                    if child.node == 'INDEX' and len(child):
+                        ids.append(child[0])
+                    elif child.node == 'EC-TYPE':
+                        empty_category = True
+            if not empty_category:
+                for id_nr in set(ids):
+                    phrases[id_nr].append(tr)
+            stack.extend(child for child in reversed(tr)
+                         if isinstance(child, Tree))
+        # children come before their parents in reverse preorder
+        for tr in reversed(preorder):
+            tr._height = Tree.height(tr)
+            tr._label_class = _classify_label(tr.node, tr._height)
+        self._parents = parents
+        self._phrases = dict(phrases)
+        return self._phrases
+
+    def parent(self, subtree):
+        """Return the tree directly dominating `subtree`, or None."""
+        if self._parents is None:
+            self._build_index()
+        parent = self._parents.get(id(subtree))
+        # guard against ids reused after the tree was modified
+        if parent is not None and any(tr is subtree for tr in parent):
+            return parent
+        return None
+
     def rels(self):
-        with_args = lambda tr: any([daughter.startswith('P-ARG')
-                                    for daughter in tr.daughters()])
-        for pos in self.treepositions():
-            if isinstance(self[pos], GlarfTree) and with_args(self[pos]):
-                yield self._build_rel(self[pos[:-2]], self[pos])
+        """Yield a Relation for every phrase with P-ARG children, in preorder.
+
+        A single depth-first traversal carries the parent and grandparent of
+        every node.  The relation is built in the context of the grandparent
+        of the phrase, or of the root for the top two levels.
+        """
+        stack = [(self, self, self)]  # (tree, parent, grandparent) tuples
+        while stack:
+            tree, parent, grandparent = stack.pop()
+            is_predicate = False
+            children = []
+            for child in tree:
+                if isinstance(child, Tree):
+                    if child.node.startswith('P-ARG'):
+                        is_predicate = True
+                    children.append((child, tree, parent))
+                elif child.startswith('P-ARG'):
+                    is_predicate = True
+            if is_predicate:
+                yield self._build_rel(grandparent, tree)
+            children.reverse()
+            stack.extend(children)
 
     def _initialize_tuples(self, raw_tuples_list):
         """Parse Glarf tuple file and use the information from it"""
-        self._tuples = [tuple(val.strip() for val in t.split('|'))
-                        for t in raw_tuples_list] if raw_tuples_list else []
+        self._tuples = _parse_tuples(raw_tuples_list)
         return self
 
     def _set_lemmas(self):
-        lemmas = {}
-        for t in self._tuples:
-            lemmas[t[7]] = t[9]
-            lemmas[t[19]] = t[21]
+        lemmas = _lemma_table(self._tuples)
         for token in self.ptb_leaves():
             lemma = lemmas.get(token[1], '').lower()
             token.insert(1, lemma)
@@ -339,11 +558,60 @@ class GlarfTree(Tree):
 
     @classmethod
     def glarf_parse(cls, s, raw_tuples_list=None):
-        tree = cls.parse(s, leaf_pattern=leaf_pattern,
-                         remove_empty_top_bracketing=True)
+        """Parse a tree from GLARF's output, with its optional tuples.
+
+        Tokenizing, building the tree, attaching lemmas from the tuples to
+        the PTB leaves and recording the metadata of `_build_index` all
+        happen in a single pass over the string.
+        """
+        tuples = _parse_tuples(raw_tuples_list)
+        lemmas = None
+        builder = _TreeBuilder(cls)
+        build_node = builder.node
+        n_opened = 0
+        top = children = []
+        stack = []  # list of (node, parent's children, preorder) tuples
+        for match in _glarf_token_re.finditer(s):
+            node, close, leaf = match.groups()
+            # Leaf node
+            if leaf is not None:
+                if not stack:
+                    cls._parse_error(s, match, '(')
+                children.append(leaf)
+            # Beginning of a tree/subtree
+            elif node is not None:
+                if not stack and top:
+                    cls._parse_error(s, match, 'end-of-string')
+                stack.append((node, children, n_opened))
+                children = []
+                n_opened += 1
+            # End of a tree/subtree
+            else:
+                if not stack:
+                    cls._parse_error(s, match, 'end-of-string' if top else '(')
+                node, siblings, order = stack.pop()
+                tree = build_node(node, children, order)
+                label_class = tree._label_class
+                if label_class == POS:
+                    if lemmas is None:
+                        lemmas = _lemma_table(tuples)
+                    tree.insert(1, lemmas.get(tree[1], '').lower())
+                elif tree.node in _closed_class_attributes:
+                    _intern_leaves(tree)
+                siblings.append(tree)
+                children = siblings
+
+        # check that we got exactly one complete tree.
+        if stack:
+            cls._parse_error(s, 'end-of-string', ')')
+        elif not top:
+            cls._parse_error(s, 'end-of-string', '(')
+        tree = top[0]
+
+        # get rid of the extra level of bracketing: "((S (NP ...) ...))"
+        if tree.node == '' and len(tree) == 1 and isinstance(tree[0], Tree):
+            del builder.parents[id(tree[0])]
+            tree = tree[0]
         if tree.node == '***ERROR***':
             raise ValueError('Glarf string resulted from parsing failure')
-
-        tree._initialize_tuples(raw_tuples_list)
-        tree._set_lemmas()
-        return tree
+        return builder.finish(tree, tuples)
@@ -0,0 +1,203 @@
+"""Persistent inverted index of the relations and entities of a corpus.
+
+Finding the sentences where a predicate has a given argument should not
+require parsing the whole corpus again.  A RelationIndex stores, in an
+SQLite database, the predicate, argument label, role and argument lemma of
+every relation, and the lemmas of every entity, with the document, tree
+and relation where they occur.  Documents can be added one at a time, from
+parsed trees or straight from GLARF tuples.
+
+"""
+
+# License: BSD
+
+import sqlite3
+
+from pyglarf.tuples import tree_relations, tuple_relations
+
+_schema = """
+CREATE TABLE IF NOT EXISTS documents
+    (id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+CREATE TABLE IF NOT EXISTS relations
+    (predicate TEXT, arg_label TEXT, role TEXT, arg TEXT,
+     doc INTEGER, tree INTEGER, rel TEXT);
+CREATE INDEX IF NOT EXISTS relations_by_label
+    ON relations (predicate, arg_label, arg);
+CREATE INDEX IF NOT EXISTS relations_by_role
+    ON relations (predicate, role, arg);
+CREATE INDEX IF NOT EXISTS relations_by_arg ON relations (arg);
+CREATE INDEX IF NOT EXISTS relations_by_doc ON relations (doc);
+CREATE TABLE IF NOT EXISTS entities
+    (lemma TEXT, doc INTEGER, tree INTEGER, entity TEXT);
+CREATE INDEX IF NOT EXISTS entities_by_lemma ON entities (lemma);
+CREATE INDEX IF NOT EXISTS entities_by_doc ON entities (doc);
+"""
+
+
+def _entity_lemmas(np):
+    """Upper-cased lemmas, or forms, of the name or head of a NounPhrase"""
+    trees = np.name or ([np.head] if np.head is not None else [])
+    for tree in trees:
+        for leaf in tree.ptb_leaves():
+            yield (leaf[1] if len(leaf) > 2 else leaf[0]).upper()
+
+
+class RelationIndex(object):
+    """On-disk inverted index of relations and entities.
+
+    Relations are indexed by argument: every argument of a predicate is one
+    posting, mapping the BASE of the predicate, the argument label (ARG0,
+    ARGM-LOC...), the grammatical role (SBJ, OBJ...) and the lemma of the
+    head of the argument to the document, the tree and the relation.  The
+    relation is identified by the token index of its predicate, which is
+    `Relation.index` for trees and the `head_token` column of the tuples,
+    so both sources give the same postings, see `pyglarf.tuples`.
+
+    Entities are indexed by the lemmas of their name, or of their head.
+
+    Lemmas and predicates are stored and queried in upper case.
+
+    Parameters
+    ----------
+    path, string:
+        SQLite database file, created if it does not exist.
+
+    Examples
+    --------
+    >>> with RelationIndex('corpus.db') as index:
+    ...     index.add_document('doc1', GlarfForest(glarf_out, tuples))
+    ...     index.search('ACQUIRE', ARG0='YAHOO', ARG1='OVERTURE')
+    [('doc1', 0, '5')]
+    """
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.text_factory = str
+        with self._db:
+            self._db.executescript(_schema)
+
+    def _replace_document(self, name):
+        """Id of a new, empty, document `name`, replacing any older one"""
+        row = self._db.execute('SELECT id FROM documents WHERE name = ?',
+                               (name,)).fetchone()
+        if row is not None:
+            for table in ('relations', 'entities'):
+                self._db.execute('DELETE FROM %s WHERE doc = ?' % table, row)
+            return row[0]
+        return self._db.execute('INSERT INTO documents (name) VALUES (?)',
+                                (name,)).lastrowid
+
+    def _insert_relations(self, doc, relations):
+        self._db.executemany('INSERT INTO relations '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             ((r.head.upper(), r.arg_label, r.role,
+                               r.arg.upper(), doc, r.tree, r.head_token)
+                              for r in relations))
+
+    def add_document(self, name, trees):
+        """Index the relations and entities of parsed trees.
+
+        Parameters
+        ----------
+        name, string:
+            name of the document.  An indexed document with the same name
+            is replaced.
+        trees, iterable of GlarfTrees:
+            the trees of the document in order, usually a GlarfForest,
+            parsed with their tuples so that leaves carry lemmas.
+        """
+        with self._db:
+            doc = self._replace_document(name)
+            for tree_num, tree in enumerate(trees):
+                self._insert_relations(doc, tree_relations(tree, tree_num))
+                # NPs are the mentions keyed by their index in entities()
+                self._db.executemany(
+                    'INSERT INTO entities VALUES (?, ?, ?, ?)',
+                    ((lemma, doc, tree_num, np.index)
+                     for np, _ in tree.nps()
+                     for lemma in set(_entity_lemmas(np))))
+
+    def add_tuples(self, name, blocks):
+        """Index the relations of a document read from its tuples only.
+
+        Entities cannot be read from the tuples, only relations are indexed.
+
+        Parameters
+        ----------
+        name, string:
+            name of the document.  An indexed document with the same name
+            is replaced.
+        blocks, iterable of (tree_number, tuple_lines):
+            such as the output of `pyglarf.reader.iter_tuple_blocks`.
+        """
+        with self._db:
+            doc = self._replace_document(name)
+            for tree_num, tuple_lines in blocks:
+                self._insert_relations(doc, tuple_relations(tuple_lines,
+                                                            tree_num))
+
+    def search(self, predicate=None, **arguments):
+        """Relations matching a predicate and all the given arguments.
+
+        Parameters
+        ----------
+        predicate, string, optional:
+            BASE of the predicate.
+        arguments:
+            argument labels (ARG0, ARG1...) or grammatical roles (SBJ,
+            OBJ...) and the lemma of the head of the argument.  A lemma of
+            None matches any argument with that label or role.  Labels with
+            dashes, such as ARGM-LOC, can be passed as `**{'ARGM-LOC': x}`.
+
+        Returns
+        -------
+        A sorted list of (document name, tree number, relation index).
+        """
+        if predicate is None and not arguments:
+            raise ValueError('Nothing to search for.')
+        queries, params = [], []
+        for key, lemma in sorted(arguments.items()) or [(None, None)]:
+            conditions = []
+            if predicate is not None:
+                conditions.append('predicate = ?')
+                params.append(predicate.upper())
+            if key is not None:
+                conditions.append('arg_label = ?' if key.startswith('ARG')
+                                  else 'role = ?')
+                params.append(key)
+            if lemma is not None:
+                conditions.append('arg = ?')
+                params.append(lemma.upper())
+            queries.append('SELECT DISTINCT doc, tree, rel FROM relations '
+                           'WHERE ' + ' AND '.join(conditions))
+        rows = self._db.execute(
+            'SELECT name, tree, rel FROM (%s) JOIN documents ON doc = id '
+            'ORDER BY name, tree, CAST(rel AS INTEGER)'
+            % ' INTERSECT '.join(queries), params)
+        return rows.fetchall()
+
+    def entity_mentions(self, lemma):
+        """Sorted list of (document name, tree number, NP index) of the
+        entities whose name or head contains `lemma`"""
+        rows = self._db.execute(
+            'SELECT name, tree, entity FROM entities JOIN documents '
+            'ON doc = id WHERE lemma = ? ORDER BY name, tree, entity',
+            (lemma.upper(),))
+        return rows.fetchall()
+
+    def documents(self):
+        """Names of the indexed documents, in the order they were added"""
+        return [name for name, in self._db.execute(
+            'SELECT name FROM documents ORDER BY id')]
+
+    def __len__(self):
+        return self._db.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
@@ -554,7 +554,30 @@ class Tree(list):
     #////////////////////////////////////////////////////////////
 
     def draw(self):
-        raise NotImplemented('This function is not available without NLTK.')
+        """
+        Open a new window containing a graphical diagram of this tree.
+        NLTK is imported on the first call, and is required.
+        """
+        try:
+            from nltk.draw.tree import draw_trees
+            from nltk.tree import Tree as NLTKTree
+        except ImportError:
+            raise ImportError('Tree.draw requires NLTK.')
+        draw_trees(self.convert_to(NLTKTree))
+
+    def convert_to(self, cls):
+        """
+        Copy this tree into instances of the tree class ``cls``, such as
+        NLTK's Tree.  Tuple leaves are joined with slashes, as in ``pprint``.
+        """
+        children = []
+        for child in self:
+            if isinstance(child, Tree):
+                child = child.convert_to(cls)
+            elif isinstance(child, tuple):
+                child = "/".join(child)
+            children.append(child)
+        return cls(self.node, children)
 
     def __repr__(self):
         childstr = ", ".join(repr(c) for c in self)
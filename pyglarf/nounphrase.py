@@ -11,10 +11,25 @@ def _flat_list(l, indices=True, lemma=True, pos=True, structure=False):
 
 
 class NounPhrase(object):
-    """Describes an NP."""
+    """Describes an NP.
+
+    NPs are slotted records, without a per-instance `__dict__`.  `as_tuple`
+    returns their fields in the order of `_fields`.
+
+    The calculated attributes `rec_head_`, the most specific head, and
+    `rec_conj_`, the heads of the conjuncts, only exist if the NP has a head,
+    resp. conjuncts.  With the keyword argument `lazy=True`, they are
+    computed on first access instead of on construction.  The other keyword
+    arguments are the attributes of the NP.
+    """
+    _fields = ('index', 'head', 'role', 'name', 'conj', 'date', 'subphrases',
+               'links', 'full_flat', 'attrs')
+    __slots__ = _fields + ('_rec_head', '_rec_conj')
+
     def __init__(self, index, head, role, name, conj, date, subphrases, links,
                  full_flat, **kwargs):
         assert index is not None
+        lazy = kwargs.pop('lazy', False)
         self.index = index
         self.head = head
         self.role = role
@@ -25,21 +40,55 @@ class NounPhrase(object):
         self.links = links
         self.full_flat = full_flat
         self.attrs = kwargs
+        self._rec_head = None
+        self._rec_conj = None
 
-        # Calculated attributes
-        if self.head:
-            self.rec_head_ = self.head.most_specific_head()
-            assert self.rec_head_.index is not None
+        # Calculated attributes, computed now by accessing them
+        if not lazy:
+            if self.head:
+                self.rec_head_
+            if self.conj:
+                self.rec_conj_
 
-        if self.conj:
-            self.rec_conj_ = []
+    @property
+    def rec_head_(self):
+        if not self.head:
+            raise AttributeError('rec_head_')
+        if self._rec_head is None:
+            self._rec_head = self.head.most_specific_head()
+            assert self._rec_head.index is not None
+        return self._rec_head
+
+    @property
+    def rec_conj_(self):
+        if not self.conj:
+            raise AttributeError('rec_conj_')
+        if self._rec_conj is None:
+            rec_conj = []
             for t in self.conj:
                 if t.node.startswith('CONJUNCTION'):
-                    self.rec_conj_.append(t[0])
+                    rec_conj.append(t[0])
                 elif t.node.startswith('CONJ'):
-                    self.rec_conj_.append(t[0].head().most_specific_head()
-                                          if t[0].head() is not None
-                                          else t[0])
+                    rec_conj.append(t[0].head().most_specific_head()
+                                    if t[0].head() is not None
+                                    else t[0])
+            self._rec_conj = rec_conj
+        return self._rec_conj
+
+    def as_tuple(self):
+        """Fields of the NP, in the order of `_fields`"""
+        return tuple(getattr(self, key) for key in self._fields)
+
+    # slotted objects need these to be pickled with protocols 0 and 1; the
+    # calculated attributes are computed again when needed
+    def __getstate__(self):
+        return dict(zip(self._fields, self.as_tuple()))
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+        self._rec_head = None
+        self._rec_conj = None
 
     def __str__(self):
         repr = StringIO()
@@ -64,7 +113,7 @@ class NounPhrase(object):
 
     def __repr__(self):
         repr_dict = dict([(key, val.__repr__())
-                         for key, val in self.__dict__.items()])
+                         for key, val in zip(self._fields, self.as_tuple())])
         return ("""NounPhrase(index=%(index)s, head=%(head)s, role=%(role)s, \
 name=%(name)s, conj=%(conj)s, date=%(date)s, subphrases=%(subphrases)s, \
 links=%(links)s, full_flat=%(full_flat)s, **%(attrs)s)""" % repr_dict)
@@ -0,0 +1,145 @@
+"""Parallel processing of large batches over several Glarf working directories.
+
+A batch is split into shards of consecutive sentences (or paragraphs).  Each
+of `n_jobs` workers owns a GlarfWrapper, hence an isolated working
+directory, and processes shards one after the other.  Glarf runs in
+subprocesses, so a pool of threads is enough to keep several cores busy.
+
+Every shard is processed as a separate Glarf document, so cross-sentence
+references (TREE+INDEX) never cross shards.  The tree numbers, offsets and
+references in the outputs of a shard are then shifted to its place in the
+batch, so the outputs are numbered as those of a single Glarf run.
+
+"""
+
+# License: BSD
+
+from multiprocessing.pool import ThreadPool
+from Queue import Queue
+
+from pyglarf.wrapper import GlarfWrapper
+from pyglarf.wrapper import _input_offsets, _outputs, _padded_records
+from pyglarf.wrapper import _rebase_record
+
+
+class BatchError(RuntimeError):
+    """Raised when some shards of a parallel batch failed.
+
+    Attributes
+    ----------
+    failures, list of (shard, (start, stop), exception):
+        the index of each failed shard, the range of input items it covers
+        and the exception that was raised while processing it.
+
+    results, list:
+        for every shard, its four output lists, numbered from the start of
+        the shard, or None if it failed.
+    """
+    def __init__(self, failures, results):
+        self.failures = failures
+        self.results = results
+        RuntimeError.__init__(self, 'Glarf failed on %d out of %d shards: %s'
+                              % (len(failures), len(results),
+                                 ', '.join('%d (items %d-%d)' % (shard,
+                                                                 start,
+                                                                 stop - 1)
+                                           for shard, (start, stop), _
+                                           in failures)))
+
+
+def _run_batch(method, items, n_jobs, shard_size, wrapper_params):
+    if isinstance(items, str):
+        items = [items]
+    items = list(items)
+    shards = [items[start:start + shard_size]
+              for start in xrange(0, len(items), shard_size)]
+    if not shards:
+        return [], [], [], []
+    n_jobs = max(1, min(n_jobs, len(shards)))
+
+    wrappers = Queue()
+    opened = []
+    pool = ThreadPool(n_jobs)
+    try:
+        for _ in xrange(n_jobs):
+            opened.append(GlarfWrapper(**wrapper_params).__enter__())
+            wrappers.put(opened[-1])
+
+        def run(shard):
+            gw = wrappers.get()
+            try:
+                return getattr(gw, method)(shard), None
+            except Exception as e:
+                return None, e
+            finally:
+                wrappers.put(gw)
+
+        runs = pool.map(run, shards)
+    finally:
+        pool.close()
+        pool.join()
+        for gw in opened:
+            gw.__exit__(None, None, None)
+
+    failures = []
+    start = 0
+    for shard_idx, (shard, (result, error)) in enumerate(zip(shards, runs)):
+        if error is not None:
+            failures.append((shard_idx, (start, start + len(shard)), error))
+        start += len(shard)
+    if failures:
+        raise BatchError(failures, [result for result, _ in runs])
+
+    records = []
+    offsets = _input_offsets(items)
+    start = 0
+    for shard, (result, _) in zip(shards, runs):
+        tree_base = len(records)
+        records.extend(_rebase_record(record, lambda t: t + tree_base,
+                                      offsets[start])
+                       for record in _padded_records(result))
+        start += len(shard)
+    return _outputs(records)
+
+
+def make_sentences_parallel(sentences, n_jobs=2, shard_size=100,
+                            **wrapper_params):
+    """Parse and analyze a large sequence of sentences in parallel.
+
+    Parameters
+    ----------
+    sentences, iterable or string:
+        The sequence of sentences (strings) that Glarf will process.
+
+    n_jobs, int, default=2:
+        Number of Glarf pipelines running at the same time.
+
+    shard_size, int, default=100:
+        Number of sentences sent to Glarf at once.
+
+    **wrapper_params:
+        Passed to every GlarfWrapper, such as `path` or `server`.
+
+    Returns
+    -------
+    The four lists returned by `GlarfWrapper.make_sentences`, in the order
+    of the input, with the tree numbers and offsets of a single run.
+
+    Raises
+    ------
+    BatchError, if Glarf failed on some of the shards.  The outputs of the
+    other shards are available in its `results` attribute.
+    """
+    return _run_batch('make_sentences', sentences, n_jobs, shard_size,
+                      wrapper_params)
+
+
+def make_paragraphs_parallel(paragraphs, n_jobs=2, shard_size=10,
+                             **wrapper_params):
+    """Parse and analyze a large sequence of paragraphs in parallel.
+
+    Shards are made of whole paragraphs.  See `make_sentences_parallel` for
+    the parameters and `GlarfWrapper.make_paragraphs` for the outputs.
+    """
+    return _run_batch('make_paragraphs', paragraphs, n_jobs, shard_size,
+                      wrapper_params)
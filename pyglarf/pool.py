@@ -0,0 +1,105 @@
+"""Reusable pool of prepared Glarf working directories.
+
+Setting up a GlarfWrapper copies the Glarf scripts into a fresh directory,
+and exiting it deletes the directory.  A WorkdirPool keeps the directories
+around instead: on release, only the inputs and outputs in their `tmp/`
+folder are removed, and the next wrapper using the pool gets a directory
+that is ready to go.
+
+"""
+
+# License: BSD
+
+import os
+import shutil
+import threading
+import time
+
+from pyglarf.wrapper import PATH, _make_workdir
+
+
+class WorkdirPool(object):
+    """Pool of working directories prepared for a Glarf installation.
+
+    A pool can be shared by wrappers running in different threads, such as
+    the workers of `pyglarf.parallel`.
+
+    Parameters
+    ----------
+    path, string:
+        the root of the local Glarf installation.
+    max_idle, int, optional:
+        maximum number of directories kept between uses, the others are
+        deleted on release.  By default, all of them are kept.
+
+    Attributes
+    ----------
+    hits, misses, int:
+        number of directories handed out from the pool, resp. set up anew.
+    setup_time, float:
+        total time spent setting up directories, in seconds.
+
+    Examples
+    --------
+    >>> pool = WorkdirPool()
+    >>> for request in requests:
+    ...     with GlarfWrapper(pool=pool) as gw:
+    ...         outputs = gw.make_sentences(request)
+    >>> pool.close()
+    """
+    def __init__(self, path=PATH, max_idle=None):
+        self.path = path
+        self.max_idle = max_idle
+        self.hits = 0
+        self.misses = 0
+        self.setup_time = 0.0
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @property
+    def setup_time_saved(self):
+        """Estimated setup time saved by reusing directories, in seconds"""
+        if not self.misses:
+            return 0.0
+        return self.hits * self.setup_time / self.misses
+
+    def acquire(self):
+        """Return a prepared working directory, setting one up if needed"""
+        with self._lock:
+            if self._idle:
+                self.hits += 1
+                return self._idle.pop()
+        tstart = time.time()
+        wd = _make_workdir(self.path)
+        with self._lock:
+            self.misses += 1
+            self.setup_time += time.time() - tstart
+        return wd
+
+    def release(self, wd):
+        """Clean the inputs and outputs of `wd` and return it to the pool"""
+        tmp = os.path.join(wd, 'tmp')
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.mkdir(tmp)
+        with self._lock:
+            if self.max_idle is None or len(self._idle) < self.max_idle:
+                self._idle.append(wd)
+                return
+        shutil.rmtree(wd)
+
+    def __len__(self):
+        """Number of idle directories"""
+        return len(self._idle)
+
+    def close(self):
+        """Delete the idle directories"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for wd in idle:
+            shutil.rmtree(wd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
@@ -0,0 +1,428 @@
+"""Reading GLARF output files.
+
+GLARF writes all the trees of a document to one `.ns-autopb101e` file and
+all their tuples to one `.ns-2005-fast-ace-n-tuple101e` file.  GlarfReader
+memory-maps both, builds an index of where each tree and each tuple block
+starts, and only reads the parts that are asked for.  `iter_glarf_trees` and
+`iter_tuple_blocks` read them sequentially, one tree or block at a time,
+trees being split by a `GlarfSplitter`.
+Tuple blocks can be gathered into a `pyglarf.tuples.TupleTable`.
+
+"""
+
+# License: BSD
+
+import mmap
+import os
+import re
+
+from pyglarf import GlarfTree
+from pyglarf.glarf_forest import LazyGlarfForest
+from pyglarf.tuples import TupleTable
+
+# Trees are pretty-printed with their top bracketing at the start of a line,
+# every nested line is indented.
+_tree_start_re = re.compile(r'^\(\(', re.M)
+# Size of the pieces of the mapped file GlarfReader splits at once
+_index_chunk_size = 2 ** 20
+_tree_num_re = re.compile(r'\(TREE-NUM ([0-9]+)\)')
+# Tuple blocks start with a line such as ";;Tuples for Tree 152"
+_tuple_header_re = re.compile(r';;([^\n]*)')
+
+
+# Characters the exact scanner of GlarfSplitter stops at.  Outside strings,
+# parentheses are only looked at one by one when they could close the tree.
+_string_start_re = re.compile(r'["|\\]')
+_string_special_re = {'"': re.compile(r'["\\]'), '|': re.compile(r'[|\\]')}
+_paren_re = re.compile(r'[()]')
+_non_space_re = re.compile(r'\S')
+# The fast path only looks at parentheses and string delimiters, and
+# removes the strings, which have no escapes
+_not_syntax = ''.join(chr(c) for c in xrange(256) if chr(c) not in '()"|')
+_string_re = re.compile(r'"[^"]*"|\|[^|]*\|')
+# Nesting depth above which the fast path gives up
+_max_fast_depth = 100
+
+
+def _is_single_tree(text):
+    """Whether `text`, starting with "((", is one balanced tree and nothing
+    else, checked without a Python loop over its characters.
+
+    Returns False when the fast check cannot tell.
+    """
+    # escapes are left to the exact scanner
+    if text[-1] != ')' or '\\' in text:
+        return False
+    code = _string_re.sub('', text.translate(None, _not_syntax))
+    # a delimiter left is an unterminated string, which could hold the
+    # last parenthesis
+    if '"' in code or '|' in code:
+        return False
+    # the parentheses inside the outermost pair must balance without ever
+    # closing it: removing the innermost pairs repeatedly leaves nothing
+    inner = code[1:-1]
+    for _ in xrange(_max_fast_depth):
+        if not inner:
+            return True
+        reduced = inner.replace('()', '')
+        if len(reduced) == len(inner):
+            return False
+        inner = reduced
+    return False
+
+
+class GlarfSplitter(object):
+    """Incremental splitter of GLARF output into top-level trees.
+
+    Trees are delimited by balanced parentheses, not counting the ones in
+    "quoted" and |barred| strings, so parentheses in strings such as
+    `(SENSE-NAME "GET, (ACQUIRE")` or leaves such as `|(|` do not upset it.
+    Backslashes escape the next character, like in Lisp.  Chunks can be cut
+    anywhere, even in the middle of a string.
+
+    GLARF starts every tree on a new line, so the text from one line
+    starting with "((" to the next is checked at once, with string
+    operations.  Only when that check fails, for instance when two trees
+    share a line, is the text scanned character by character.  Either way,
+    a tree is returned once the next one starts, or by `close`.
+
+    Failed parses, written by GLARF as ((***ERROR***)), are trees like the
+    others.  Anything else that is not a balanced tree raises a ValueError.
+
+    Parameters
+    ----------
+    offsets, bool, default=False:
+        whether to return `(offset, tree)` pairs instead of trees, `offset`
+        being the position of the tree in the output.
+
+    Examples
+    --------
+    >>> splitter = GlarfSplitter()
+    >>> splitter.feed('((S (NP |(|) (SENSE-NAME "A (B")))\\n((**')
+    ['((S (NP |(|) (SENSE-NAME "A (B")))']
+    >>> splitter.feed('*ERROR***))\\n')
+    []
+    >>> splitter.close()
+    ['((***ERROR***))']
+    """
+    def __init__(self, offsets=False):
+        self.offsets = offsets
+        self._lines = []  # text since the last line starting with "(("
+        self._newline = True  # whether the output read so far ends a line
+        self._offset = 0  # position of self._lines in the output
+        # state of the exact scanner
+        self._pieces = []  # parts of the current tree from previous text
+        self._depth = 0
+        self._quote = None  # delimiter of the current string
+        self._escaped = False  # whether the next character is escaped
+        self._tree_offset = None  # position of the current tree
+
+    def feed(self, chunk):
+        """Returns the list of the new trees known to be complete, those
+        followed by the start of another tree"""
+        trees = []
+        previous = 0
+        for match in _tree_start_re.finditer(chunk):
+            start = match.start()
+            if start == 0 and not self._newline:
+                continue
+            self._lines.append(chunk[previous:start])
+            trees.extend(self._split(''.join(self._lines)))
+            self._lines = []
+            previous = start
+        self._lines.append(chunk[previous:])
+        if chunk:
+            self._newline = chunk[-1] == '\n'
+        return trees
+
+    def close(self):
+        """Returns the last trees, checking that the output did not end in
+        the middle of one"""
+        trees = self._split(''.join(self._lines))
+        self._lines = []
+        if self._depth:
+            self._error('unterminated tree', self._tree_offset)
+        return trees
+
+    def _split(self, text):
+        if not (self._depth or self._escaped):
+            tree = text.rstrip()
+            if tree.startswith('((') and _is_single_tree(tree):
+                offset = self._offset
+                self._offset += len(text)
+                return [(offset, tree) if self.offsets else tree]
+        return self._scan(text)
+
+    def _scan(self, text):
+        """Exact scanner, for the text the fast path could not split"""
+        trees = []
+        depth, quote = self._depth, self._quote
+        start = 0 if depth else None
+        pos = 0
+        if self._escaped and text:
+            pos, self._escaped = 1, False
+        end = len(text)
+        while pos < end:
+            if quote is not None:
+                match = _string_special_re[quote].search(text, pos)
+                if match is None:
+                    break
+            elif depth:
+                match = _string_start_re.search(text, pos)
+                stop = end if match is None else match.start()
+                closing = text.count(')', pos, stop)
+                if closing < depth:
+                    depth += text.count('(', pos, stop) - closing
+                else:
+                    for paren in _paren_re.finditer(text, pos, stop):
+                        depth += 1 if paren.group() == '(' else -1
+                        if not depth:
+                            break
+                    if not depth:
+                        pos = paren.end()
+                        self._pieces.append(text[start:pos])
+                        tree = ''.join(self._pieces)
+                        trees.append((self._tree_offset, tree)
+                                     if self.offsets else tree)
+                        self._pieces = []
+                        start = None
+                        continue
+                if match is None:
+                    break
+            else:
+                match = _non_space_re.search(text, pos)
+                if match is None:
+                    break
+                if match.group() != '(':
+                    excerpt = text[match.start():match.start() + 20]
+                    self._error('unexpected %r outside of a tree'
+                                % excerpt.split('\n')[0],
+                                self._offset + match.start())
+                start = match.start()
+                self._tree_offset = self._offset + start
+                depth = 1
+                pos = match.end()
+                continue
+            pos = match.end()
+            char = match.group()
+            if char == '\\':
+                if pos < end:
+                    pos += 1
+                else:
+                    self._escaped = True
+            elif quote is None:
+                quote = char
+            else:
+                quote = None
+        if start is not None:
+            self._pieces.append(text[start:])
+        self._depth, self._quote = depth, quote
+        self._offset += end
+        return trees
+
+    def _error(self, message, offset):
+        raise ValueError('Malformed GLARF output: %s at offset %d.'
+                         % (message, offset))
+
+
+def split_glarf_trees(text):
+    """List of the trees of GLARF output, see `GlarfSplitter`"""
+    splitter = GlarfSplitter()
+    return splitter.feed(text) + splitter.close()
+
+
+def iter_glarf_trees(chunks):
+    """Yield the raw trees of a `.ns-autopb101e` file, one at a time.
+
+    Parameters
+    ----------
+    chunks, iterable of strings:
+        the contents of the file in order, such as an open file object,
+        cut in lines or blocks of any size.
+    """
+    return _split_chunks(GlarfSplitter(), chunks)
+
+
+def _split_chunks(splitter, chunks):
+    for chunk in chunks:
+        for tree in splitter.feed(chunk):
+            yield tree
+    for tree in splitter.close():
+        yield tree
+
+
+def _tuple_block(text):
+    tuple_lines = text.splitlines()
+    # First line looks like "Tuples for Tree 152"
+    return int(tuple_lines[0].rsplit(' ', 1)[1]), tuple_lines[1:]
+
+
+def iter_tuple_blocks(lines):
+    """Yield `(tree_number, tuple_lines)` for each block of a tuple file.
+
+    Blocks are split on ";;" like in `GlarfWrapper`, so the numbers are
+    increasing and trees without tuples are skipped.
+
+    Parameters
+    ----------
+    lines, iterable of strings:
+        the lines of the file, such as an open file object.
+    """
+    block = None
+    for line in lines:
+        pieces = line.split(';;')
+        if block is not None:
+            block.append(pieces[0])
+        for piece in pieces[1:]:
+            if block is not None:
+                yield _tuple_block(''.join(block))
+            block = [piece]
+    if block is not None:
+        yield _tuple_block(''.join(block))
+
+
+def _map_file(path):
+    """Memory-map a file for reading, returns None for empty files"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None  # empty files cannot be mapped
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class GlarfReader(object):
+    """Random-access reader for the tree and tuple files written by GLARF.
+
+    The files are memory-mapped and scanned once to record the offsets of
+    the trees, split by a `GlarfSplitter` and looked up by TREE-NUM, and of the tuple blocks, by the number in their
+    "Tuples for Tree N" header.  Individual trees and tuple blocks are then
+    served without reading the rest of the files.
+
+    A reader is a sequence of the raw tree strings in file order, as
+    returned by GlarfWrapper, so it can be used directly as the source of a
+    LazyGlarfForest.  Failed parses, written by GLARF as ((***ERROR***)),
+    have no TREE-NUM and take the number following the previous tree.
+
+    Parameters
+    ----------
+    glarf_path, string:
+        path to a `.ns-autopb101e` file.
+    tuple_path, string, optional:
+        path to the matching `.ns-2005-fast-ace-n-tuple101e` file.
+
+    Examples
+    --------
+    >>> with GlarfReader('doc.sgm.sent.ns-autopb101e',
+    ...                  'doc.sgm.sent.ns-2005-fast-ace-n-tuple101e') as reader:
+    ...     tree = reader.parse(1520)
+    """
+    def __init__(self, glarf_path, tuple_path=None):
+        self.glarf_path = glarf_path
+        self.tuple_path = tuple_path
+        self._glarf = _map_file(glarf_path)
+        self._tuple_map = (_map_file(tuple_path)
+                           if tuple_path is not None else None)
+        self._index_trees()
+        self._index_tuples()
+
+    def _index_trees(self):
+        self._spans = []
+        self._tree_nums = []
+        self._positions = {}  # TREE-NUM -> position in file
+        if self._glarf is None:
+            return
+        glarf = self._glarf
+        chunks = (glarf[pos:pos + _index_chunk_size]
+                  for pos in xrange(0, len(glarf), _index_chunk_size))
+        splitter = GlarfSplitter(offsets=True)
+        tree_num = -1
+        for start, tree in _split_chunks(splitter, chunks):
+            match = _tree_num_re.search(tree)
+            tree_num = int(match.group(1)) if match else tree_num + 1
+            self._positions[tree_num] = len(self._spans)
+            self._spans.append((start, start + len(tree)))
+            self._tree_nums.append(tree_num)
+
+    def _index_tuples(self):
+        self._tuple_spans = {}  # tree number -> span of the block
+        if self._tuple_map is None:
+            return
+        header = None
+        for next_header in _tuple_header_re.finditer(self._tuple_map):
+            if header is not None:
+                self._add_tuple_block(header, next_header.start())
+            header = next_header
+        if header is not None:
+            self._add_tuple_block(header, len(self._tuple_map))
+
+    def _add_tuple_block(self, header, end):
+        # First line looks like "Tuples for Tree 152"
+        tree_idx = int(header.group(1).rsplit(' ', 1)[1])
+        self._tuple_spans[tree_idx] = (header.end(), end)
+
+    def __len__(self):
+        return len(self._spans)
+
+    def __getitem__(self, position):
+        """Raw string of the tree at `position` in the file"""
+        start, end = self._spans[position]
+        return self._glarf[start:end].strip()
+
+    def __iter__(self):
+        for position in xrange(len(self)):
+            yield self[position]
+
+    def tree_nums(self):
+        """Tree numbers in the file, in file order"""
+        return list(self._tree_nums)
+
+    def tree(self, tree_num):
+        """Raw string of the tree with the given TREE-NUM"""
+        return self[self._positions[tree_num]]
+
+    def tuples(self, tree_num):
+        """Raw tuple lines of a tree, or None if GLARF wrote no tuples"""
+        if tree_num not in self._tuple_spans:
+            return None
+        start, end = self._tuple_spans[tree_num]
+        return self._tuple_map[start:end].splitlines()[1:]
+
+    def parse(self, tree_num):
+        """Parse the tree with the given TREE-NUM, along with its tuples"""
+        return GlarfTree.glarf_parse(self.tree(tree_num),
+                                     self.tuples(tree_num))
+
+    def tuple_table(self):
+        """Read all the tuple blocks into a TupleTable, in tree order"""
+        table = TupleTable()
+        for tree_num in sorted(self._tuple_spans):
+            table.add_block(tree_num, self.tuples(tree_num))
+        return table
+
+    def forest(self, cache_size=128):
+        """Build a LazyGlarfForest reading its trees from this reader"""
+        return LazyGlarfForest(self, _TupleBlocks(self),
+                               cache_size=cache_size)
+
+    def close(self):
+        for mapped in (self._glarf, self._tuple_map):
+            if mapped is not None:
+                mapped.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+class _TupleBlocks(object):
+    """Tuple blocks of a GlarfReader, aligned with its trees"""
+
+    def __init__(self, reader):
+        self.reader = reader
+
+    def __len__(self):
+        return len(self.reader)
+
+    def __getitem__(self, position):
+        return self.reader.tuples(self.reader._tree_nums[position])
@@ -24,7 +24,15 @@ class Relation(object):
 
     attrs, dict:
         Any supplementary extracted attributes such as word sense or voice.
+
+    Relations are slotted records, without a per-instance `__dict__`, as
+    corpora yield millions of them.  `as_tuple` returns their fields in the
+    order of `_fields`.
     """
+    _fields = ('index', 'head', 'aux', 'args', 'support', 'advs', 'attrs',
+               'flat_repr')
+    __slots__ = _fields
+
     def __init__(self, index, head=None, aux=None, args=None, support=None,
                  advs=None, flat_repr=True, **kwargs):
         self.index = index
@@ -68,9 +76,21 @@ class Relation(object):
                            tree.print_flat() if self.flat_repr else tree)
         return repr.getvalue()
 
+    def as_tuple(self):
+        """Fields of the relation, in the order of `_fields`"""
+        return tuple(getattr(self, key) for key in self._fields)
+
+    # slotted objects need these to be pickled with protocols 0 and 1
+    def __getstate__(self):
+        return dict(zip(self._fields, self.as_tuple()))
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+
     def __repr__(self):
         repr_dict = dict([(key, val.__repr__())
-                         for key, val in self.__dict__.items()])
+                         for key, val in zip(self._fields, self.as_tuple())])
         return ("""Relation(index=%(index)s, head=%(head)s, aux=%(aux)s, \
 args=%(args)s, support=%(support)s, advs=%(advs)s, flat_repr=%(flat_repr)s, \
 **%(attrs)s)""" % repr_dict)
@@ -0,0 +1,235 @@
+"""Compact binary storage of parsed GlarfTrees.
+
+A corpus processed by GLARF can be parsed once, saved with `save_forest`
+and reloaded many times with `load_forest`, in about half the time it takes
+to parse the GLARF output again, from files several times smaller than
+pickled forests.
+
+File layout
+-----------
+All integers are little-endian.  The header is the magic string ``PGLF``
+followed by the format version, the number of trees and the number of
+distinct strings, as unsigned 32-bit integers.  It is followed by six
+sections, each made of its length as an unsigned 32-bit integer and its
+content:
+
+* the string table: every distinct label, leaf (including lemmas) and tuple
+  field, stored once and separated by NUL bytes;
+* the start of every tree in the structure, plus its end (int32);
+* the structure: the trees in preorder, where a node is written as
+  ``2 * label`` followed by its number of children and a leaf as
+  ``2 * string + 1``, labels and strings being positions in the string
+  table (int32);
+* the start of the tuples of every tree in the tuple list, plus its end
+  (int32);
+* the start of the fields of every tuple, plus its end (int32);
+* the fields of the tuples, as positions in the string table (int32).
+
+"""
+
+# License: BSD
+
+import struct
+import sys
+from array import array
+
+from pyglarf.glarf_tree import GlarfTree, Tree, _TreeBuilder
+from pyglarf.glarf_forest import GlarfForest, LazyGlarfForest
+
+MAGIC = 'PGLF'
+VERSION = 1
+
+_header = struct.Struct('<4sIII')
+_length = struct.Struct('<I')
+
+
+class _Encoder(object):
+    """Encodes trees into the sections of the file format"""
+
+    def __init__(self):
+        self.string_ids = {}
+        self.strings = []
+        self.tree_offsets = array('i', [0])
+        self.codes = array('i')
+        self.tuple_offsets = array('i', [0])
+        self.field_offsets = array('i', [0])
+        self.fields = array('i')
+
+    def _string_id(self, s):
+        string_id = self.string_ids.get(s)
+        if string_id is None:
+            if '\0' in s:
+                raise ValueError('Cannot store strings containing NUL bytes.')
+            string_id = self.string_ids[s] = len(self.strings)
+            self.strings.append(s)
+        return string_id
+
+    def add(self, tree):
+        codes = self.codes
+        string_id = self._string_id
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Tree):
+                codes.append(string_id(node.node) << 1)
+                codes.append(len(node))
+                stack.extend(reversed(node))
+            else:
+                codes.append(string_id(node) << 1 | 1)
+        self.tree_offsets.append(len(codes))
+
+        for tup in tree._tuples or ():
+            self.fields.extend(string_id(field) for field in tup)
+            self.field_offsets.append(len(self.fields))
+        self.tuple_offsets.append(len(self.field_offsets) - 1)
+
+    def sections(self):
+        yield '\0'.join(self.strings)
+        for ints in (self.tree_offsets, self.codes, self.tuple_offsets,
+                     self.field_offsets, self.fields):
+            if sys.byteorder == 'big':
+                ints = array('i', ints)
+                ints.byteswap()
+            yield ints.tostring()
+
+
+class _EncodedTrees(object):
+    """The decoded sections of a file, building the trees one at a time"""
+
+    def __init__(self, data):
+        magic, version, n_trees, n_strings = _header.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError('Not a pyglarf binary file.')
+        if version != VERSION:
+            raise ValueError('Unsupported format version: %d.' % version)
+        sections = []
+        pos = _header.size
+        for _ in xrange(6):
+            length, = _length.unpack_from(data, pos)
+            pos += _length.size
+            sections.append(data[pos:pos + length])
+            pos += length
+
+        self.strings = sections[0].split('\0') if n_strings else []
+        (self.tree_offsets, self.codes, self.tuple_offsets,
+         self.field_offsets, self.fields) = ints = [array('i')
+                                                    for _ in xrange(5)]
+        for section, decoded in zip(sections[1:], ints):
+            decoded.fromstring(section)
+            if sys.byteorder == 'big':
+                decoded.byteswap()
+        self.n_trees = n_trees
+
+    def __len__(self):
+        return self.n_trees
+
+    def build(self, index):
+        """Build the tree at `index`, with its tuples and node metadata"""
+        strings = self.strings
+        codes = self.codes
+        pos, end = self.tree_offsets[index], self.tree_offsets[index + 1]
+        builder = _TreeBuilder(GlarfTree)
+        build_node = builder.node
+        n_opened = 0
+        top = children = []
+        stack = []  # list of (label, parent's children, remaining, preorder)
+        remaining = 1
+        while pos < end:
+            code = codes[pos]
+            if code & 1:
+                children.append(strings[code >> 1])
+                remaining -= 1
+                pos += 1
+            else:
+                stack.append((strings[code >> 1], children, remaining - 1,
+                              n_opened))
+                children = []
+                remaining = codes[pos + 1]
+                n_opened += 1
+                pos += 2
+            while not remaining and stack:
+                label, siblings, remaining, order = stack.pop()
+                siblings.append(build_node(label, children, order))
+                children = siblings
+
+        fields = self.fields
+        field_offsets = self.field_offsets
+        tuples = [tuple(strings[field] for field
+                        in fields[field_offsets[k]:field_offsets[k + 1]])
+                  for k in xrange(self.tuple_offsets[index],
+                                  self.tuple_offsets[index + 1])]
+        return builder.finish(top[0], tuples)
+
+
+class BinaryGlarfForest(LazyGlarfForest):
+    """A forest of GlarfTrees decoded on demand from a binary file.
+
+    Returned by `load_forest(path, lazy=True)`, see LazyGlarfForest.
+    """
+
+    def __init__(self, encoded, cache_size=128):
+        LazyGlarfForest.__init__(self, encoded, cache_size=cache_size)
+
+    def _parse(self, index):
+        return self._glarf_parses.build(index)
+
+
+def save_forest(trees, path):
+    """Save GlarfTrees in the binary format.
+
+    Parameters
+    ----------
+    trees, iterable of GlarfTrees:
+        usually a GlarfForest or a LazyGlarfForest.  The tuples of the trees
+        are saved along with them.
+
+    path, string:
+        file to write.
+    """
+    encoder = _Encoder()
+    for tree in trees:
+        encoder.add(tree)
+    with open(path, 'wb') as f:
+        f.write(_header.pack(MAGIC, VERSION, len(encoder.tree_offsets) - 1,
+                             len(encoder.strings)))
+        for section in encoder.sections():
+            f.write(_length.pack(len(section)))
+            f.write(section)
+
+
+def load_forest(path, lazy=False, cache_size=128):
+    """Load GlarfTrees saved by `save_forest`.
+
+    The file is read at once.  Labels and leaves are shared between all the
+    trees, one string object per distinct value.
+
+    Building millions of nodes triggers many garbage collections, which
+    find nothing to free.  Callers loading large forests can save about a
+    third of the time by wrapping the call in `gc.disable()` and
+    `gc.enable()`.
+
+    Parameters
+    ----------
+    path, string:
+        file to read.
+
+    lazy, bool, default=False:
+        whether to build the trees only when they are used.
+
+    cache_size, int, default=128:
+        maximum number of trees kept in memory by a lazy forest.
+
+    Returns
+    -------
+    A GlarfForest, or a BinaryGlarfForest if `lazy` is True.
+    """
+    with open(path, 'rb') as f:
+        encoded = _EncodedTrees(f.read())
+    if lazy:
+        return BinaryGlarfForest(encoded, cache_size=cache_size)
+    forest = GlarfForest([])
+    for index in xrange(len(encoded)):
+        tree = encoded.build(index)
+        tree._forest = forest
+        forest.append(tree)
+    return forest
@@ -0,0 +1,245 @@
+"""Optional timing and counters for GlarfWrapper and GlarfTree.
+
+A Stats object records the wall time spent in every stage of the pipeline,
+the number of times each stage ran and a few counters, such as bytes read
+or parse failures.  GlarfWrapper fills it when given one.  The extraction
+methods of GlarfTree are only timed while the Stats object instruments
+them, so they run at full speed otherwise.  Instrumenting patches the
+class, so only one Stats object can do it at a time, and only the calls
+made by the thread that started it are recorded.
+
+"""
+
+# License: BSD
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from thread import get_ident
+from time import time
+
+from pyglarf.glarf_tree import GlarfTree
+
+# methods timed by Stats.instrument
+TREE_METHODS = ('glarf_parse', 'phrase_by_id', 'rels', 'nps', 'entities',
+                'print_flat')
+_generator_methods = frozenset(['rels', 'nps'])
+
+# the Stats object instrumenting the methods, if any
+_instrumenting = None
+_instrument_lock = threading.Lock()
+
+
+class Stats(object):
+    """Wall time and counts of the stages of the Glarf pipeline.
+
+    Stages recorded by GlarfWrapper:
+
+    workdir: preparing the working directory, `copy-glarf-scripts`
+    glarf: running Glarf, or waiting for the persistent backend
+    read: reading the output files
+    split: splitting the outputs into one string per sentence
+    parse: building GlarfTrees, for `iter_*(trees=True)`
+
+    and by the methods of GlarfTree while instrumented, see `TREE_METHODS`.
+    Times are inclusive: the time of `rels` includes the `phrase_by_id`
+    lookups it makes.
+
+    Counters are `sentences`, `paragraphs` (sent to Glarf), `trees` (read
+    from the outputs), `glarf_errors` (((***ERROR***)) outputs),
+    `parse_failures`, `bytes_read`, and `glarf_parse_failures` while
+    instrumented.
+
+    Parameters
+    ----------
+    callback, callable, optional:
+        called as `callback(stage, seconds)` every time a stage ends.
+
+    Attributes
+    ----------
+    times, dict:
+        total wall time of every stage, in seconds.
+    calls, dict:
+        number of times every stage ran.
+    counters, dict:
+        values of the counters.
+
+    Examples
+    --------
+    >>> stats = Stats()
+    >>> with GlarfWrapper(stats=stats) as gw:
+    ...     trees = list(gw.iter_sentences(sentences, trees=True))
+    >>> with stats.instrument():
+    ...     rels = [list(tree.rels()) for tree in trees]
+    >>> print stats.report()
+    """
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.times = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self._patched = []
+        self._thread = None  # ident of the instrumented thread
+
+    def add_time(self, stage, seconds):
+        self.times[stage] += seconds
+        self.calls[stage] += 1
+        if self.callback is not None:
+            self.callback(stage, seconds)
+
+    def count(self, counter, n=1):
+        self.counters[counter] += n
+
+    @contextmanager
+    def timer(self, stage):
+        """Context manager recording the time spent in its block"""
+        start = time()
+        try:
+            yield self
+        finally:
+            self.add_time(stage, time() - start)
+
+    def timed_iter(self, stage, iterable):
+        """Yield from `iterable`, recording the time spent producing the
+        items as one run of `stage`"""
+        elapsed = 0.
+        iterator = iter(iterable)
+        try:
+            while True:
+                start = time()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    elapsed += time() - start
+                    return
+                elapsed += time() - start
+                yield item
+        finally:
+            self.add_time(stage, elapsed)
+
+    def _timed_method(self, name, func):
+        if name in _generator_methods:
+            @wraps(func)
+            def timed(*args, **kwargs):
+                if get_ident() != self._thread:
+                    return func(*args, **kwargs)
+                return self.timed_iter(name, func(*args, **kwargs))
+        else:
+            @wraps(func)
+            def timed(*args, **kwargs):
+                if get_ident() != self._thread:
+                    return func(*args, **kwargs)
+                start = time()
+                try:
+                    return func(*args, **kwargs)
+                except ValueError:
+                    if name == 'glarf_parse':
+                        self.count('glarf_parse_failures')
+                    raise
+                finally:
+                    self.add_time(name, time() - start)
+        return timed
+
+    def instrument(self, cls=GlarfTree, methods=TREE_METHODS):
+        """Time the given methods of `cls`, until `restore` is called.
+
+        Only the calls made by the current thread are timed.  Raises
+        RuntimeError if methods are already instrumented, by this Stats
+        object or another one.
+
+        Returns the Stats object, which can be used as a context manager
+        restoring the methods on exit.
+        """
+        global _instrumenting
+        with _instrument_lock:
+            if _instrumenting is not None:
+                raise RuntimeError('GlarfTree methods are already '
+                                   'instrumented by %s Stats object.' %
+                                   ('this' if _instrumenting is self
+                                    else 'another'))
+            _instrumenting = self
+        self._thread = get_ident()
+        try:
+            self._patch(cls, methods)
+        except:
+            self.restore()
+            raise
+        return self
+
+    def _patch(self, cls, methods):
+        for name in methods:
+            for klass in cls.__mro__:
+                if name in klass.__dict__:
+                    original = klass.__dict__[name]
+                    break
+            else:
+                raise AttributeError('%s has no method %s'
+                                     % (cls.__name__, name))
+            if isinstance(original, classmethod):
+                timed = classmethod(self._timed_method(name,
+                                                       original.__func__))
+            else:
+                timed = self._timed_method(name, original)
+            self._patched.append((cls, name, cls.__dict__.get(name)))
+            setattr(cls, name, timed)
+
+    def restore(self):
+        """Undo `instrument`"""
+        global _instrumenting
+        while self._patched:
+            cls, name, original = self._patched.pop()
+            if original is None:
+                delattr(cls, name)
+            else:
+                setattr(cls, name, original)
+        with _instrument_lock:
+            if _instrumenting is self:
+                _instrumenting = None
+        self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.restore()
+
+    def reset(self):
+        self.times.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+    def as_dict(self):
+        """Plain dict of the times, calls and counters"""
+        return {'times': dict(self.times), 'calls': dict(self.calls),
+                'counters': dict(self.counters)}
+
+    def report(self):
+        """Table of the stages and counters, as a string"""
+        lines = ['%-20s %10s %10s' % ('stage', 'seconds', 'calls')]
+        for stage, seconds in sorted(self.times.items(), key=lambda item:
+                                     -item[1]):
+            lines.append('%-20s %10.4f %10d' % (stage, seconds,
+                                                self.calls[stage]))
+        for counter, value in sorted(self.counters.items()):
+            lines.append('%-20s %10d' % (counter, value))
+        return '\n'.join(lines)
+
+
+class _NoTimer(object):
+    """Context manager doing nothing, for disabled stats"""
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, type, value, traceback):
+        return False
+
+
+_no_timer = _NoTimer()
+
+
+def timer(stats, stage):
+    """`stats.timer(stage)`, or a context manager doing nothing if `stats`
+    is None"""
+    return _no_timer if stats is None else stats.timer(stage)
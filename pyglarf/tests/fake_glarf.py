@@ -0,0 +1,118 @@
+"""A stand-in GLARF installation for testing GlarfWrapper.
+
+`make_fake_glarf` creates a directory laid out like a GLARF installation,
+whose scripts write simple but well-formed outputs: one tree per sentence,
+with one NN leaf per word.  Sentences containing the word ERROR get a
+((***ERROR***)) tree and no tuples, like real parse failures, sentences
+containing the word REF get an argument referring to the previous tree
+(TREE+INDEX), and inputs containing the word CRASH make the backend fail.  Startup cost is simulated
+by sleeping, and every startup is logged to `startups.log` in the
+installation directory.
+"""
+
+import os
+import stat
+import sys
+import tempfile
+
+BACKEND = r'''#!%(python)s
+import os
+import re
+import sys
+import time
+
+GLARF = %(glarf)r
+
+
+def startup():
+    time.sleep(%(startup)r)
+    with open(os.path.join(GLARF, 'startups.log'), 'a') as log:
+        log.write('%%d\n' %% os.getpid())
+
+
+def process(type):
+    text = open('tmp/tmp.sgm').read()
+    if re.search(r'\bCRASH\b', text):
+        sys.exit(1)
+    if type == 'a':
+        sentences = re.findall('<sentence>(.*?)</sentence>', text)
+    else:
+        sentences = [s.strip() + '.' for par in re.findall('<P>(.*?)</P>',
+                                                           text)
+                     for s in par.split('.') if s.strip()]
+    jet, parse, glarf, tuples = [], [], [], []
+    offset = 0
+    for i, sentence in enumerate(sentences):
+        words = sentence.split()
+        jet.append('%%d %%s' %% (offset, sentence))
+        parse.append('(S1 (S %%s))' %% ' '.join('(NN %%s)' %% w
+                                                 for w in words))
+        if 'ERROR' in words:
+            glarf.append('((***ERROR***))')
+        else:
+            ref = ''
+            if 'REF' in words and i > 0:
+                ref = ' (P-ARG1 (NP (TREE+INDEX |%%d+0|)))' %% (i - 1)
+            glarf.append('((S %%s%%s (TREE-NUM %%d) (FILE-NAME "tmp") '
+                         '(INDEX 0) (SENTENCE-OFFSET %%d)))' %% (
+                             ' '.join('(W%%d (NN %%s %%d))' %% (k, w, k)
+                                      for k, w in enumerate(words)),
+                             ref, i, offset))
+            tuples.append(';;Tuples for Tree %%d' %% i)
+            tuples.extend(' | '.join(['W%%d' %% k] * 2 + ['NIL'] * 3 +
+                                     [w, str(offset), str(k), 'NN',
+                                      w.upper()] + ['NIL'] * 15)
+                          for k, w in enumerate(words))
+        offset += len(sentence) + 1
+    outputs = (('.sent', jet), ('.sent.chout', ['# parser output'] + parse),
+               ('.sent.ns-autopb101e', glarf),
+               ('.sent.ns-2005-fast-ace-n-tuple101e', tuples))
+    for ext, lines in outputs:
+        with open('tmp/tmp.sgm' + ext, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+
+if __name__ == '__main__':
+    startup()
+    if sys.argv[1] == '--server':
+        sys.stdout.write('READY\n')
+        sys.stdout.flush()
+        for request in iter(sys.stdin.readline, ''):
+            process(request.split()[0])
+            sys.stdout.write('OK\n')
+            sys.stdout.flush()
+    else:
+        process(os.path.basename(sys.argv[0])[-1])
+'''
+
+COPY_SCRIPTS = '''#!/bin/sh
+cp "$GLARF"/bin/* "$1"
+'''
+
+
+def _write_script(path, content):
+    with open(path, 'w') as f:
+        f.write(content)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+
+def make_fake_glarf(startup=0.0):
+    """Create a stand-in GLARF installation, returns its path."""
+    path = tempfile.mkdtemp()
+    os.mkdir(os.path.join(path, 'commands-2010'))
+    os.mkdir(os.path.join(path, 'bin'))
+    _write_script(os.path.join(path, 'commands-2010', 'copy-glarf-scripts'),
+                  COPY_SCRIPTS)
+    backend = BACKEND % {'python': sys.executable, 'glarf': path,
+                         'startup': startup}
+    for name in ('make-all-glarf-a', 'make-all-glarf-b', 'glarf-server'):
+        _write_script(os.path.join(path, 'bin', name), backend)
+    return path
+
+
+def n_startups(path):
+    """Number of times the backend of a fake installation started."""
+    log = os.path.join(path, 'startups.log')
+    if not os.path.exists(log):
+        return 0
+    return len(open(log).read().splitlines())
@@ -0,0 +1,109 @@
+import cPickle
+import os
+import shutil
+
+from nose.tools import assert_equal, assert_true
+
+from pyglarf import GlarfWrapper
+from pyglarf.cache import GlarfCache
+from pyglarf.tests.fake_glarf import make_fake_glarf, n_startups
+
+sentences = ["John died in Boston.", "It ERROR fails.", "Hello, world."]
+
+
+def test_cached_sentences():
+    """Test that only cache misses are sent to Glarf"""
+    path = make_fake_glarf()
+    more_sentences = ["The market fell."] + sentences
+    try:
+        cache = GlarfCache(os.path.join(path, 'cache.db'))
+        with GlarfWrapper(path) as gw:
+            expected = gw.make_sentences(sentences)
+            expected_more = gw.make_sentences(more_sentences)
+        with GlarfWrapper(path, cache=cache) as gw:
+            assert_equal(gw.make_sentences(sentences), expected)
+            assert_equal(n_startups(path), 3)
+            assert_equal((cache.hits, cache.misses), (0, 3))
+            assert_equal(gw.make_sentences(sentences), expected)
+            assert_equal(n_startups(path), 3)  # Glarf was not run
+            assert_equal((cache.hits, cache.misses), (3, 3))
+
+            # cached trees are renumbered after the new sentence
+            assert_equal(gw.make_sentences(more_sentences), expected_more)
+            assert_equal(n_startups(path), 4)
+            assert_equal(len(cache), 4)
+
+        # another installation does not share the entries
+        with GlarfWrapper(path, cache=cache, version='other') as gw:
+            gw.make_sentences(sentences[:1])
+            assert_equal(n_startups(path), 5)
+        cache.close()
+    finally:
+        shutil.rmtree(path)
+
+
+def test_cached_references():
+    """Test that sentences referring to other trees are not cached"""
+    path = make_fake_glarf()
+    batch = ["John died.", "He REF left.", "Hello, world."]
+    try:
+        cache = GlarfCache(os.path.join(path, 'cache.db'))
+        with GlarfWrapper(path) as gw:
+            expected = gw.make_sentences(batch)
+        assert_true('(TREE+INDEX |0+0|)' in expected[2][1])
+        with GlarfWrapper(path, cache=cache) as gw:
+            gw.make_sentences(batch[2:])
+            assert_equal(gw.make_sentences(batch), expected)
+            assert_equal(len(cache), 2)
+            assert_equal(cache.get(gw._cache_key('sentence', batch[1])), None)
+        cache.close()
+    finally:
+        shutil.rmtree(path)
+
+
+def test_cached_trailing_failure():
+    """Test that a failed last sentence has no tuples, like without cache"""
+    path = make_fake_glarf()
+    batch = ["John died.", "It ERROR fails."]
+    try:
+        cache = GlarfCache(os.path.join(path, 'cache.db'))
+        with GlarfWrapper(path) as gw:
+            expected = gw.make_sentences(batch)
+        assert_equal(len(expected[3]), 1)
+        with GlarfWrapper(path, cache=cache) as gw:
+            assert_equal(gw.make_sentences(batch), expected)
+            assert_equal(gw.make_sentences(batch), expected)  # from cache
+            assert_equal(cache.hits, 2)
+        cache.close()
+    finally:
+        shutil.rmtree(path)
+
+
+def test_cached_paragraphs():
+    path = make_fake_glarf()
+    try:
+        cache = GlarfCache(os.path.join(path, 'cache.db'))
+        with GlarfWrapper(path, cache=cache) as gw:
+            outputs = gw.make_paragraphs(' '.join(sentences))
+            assert_equal(gw.make_paragraphs(' '.join(sentences)), outputs)
+        assert_equal(n_startups(path), 1)
+    finally:
+        shutil.rmtree(path)
+
+
+def test_eviction():
+    """Test that the least recently used entries are evicted first"""
+    path = make_fake_glarf()
+    try:
+        entry_size = len(cPickle.dumps(['x' * 50], cPickle.HIGHEST_PROTOCOL))
+        cache = GlarfCache(os.path.join(path, 'cache.db'),
+                           max_size=3 * entry_size)
+        for i in range(10):
+            cache.put(str(i), ['x' * 50])
+            cache.get('0')  # keep the first entry in use
+        assert_equal(cache.get('0'), ['x' * 50])
+        assert_equal(cache.get('1'), None)
+        assert_equal(cache.get('9'), ['x' * 50])
+        assert_equal(len(cache), 3)
+    finally:
+        shutil.rmtree(path)
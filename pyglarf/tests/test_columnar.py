@@ -0,0 +1,59 @@
+from nose.tools import assert_equal, assert_true
+
+from pyglarf import GlarfForest, GlarfTree
+from pyglarf.columnar import ColumnarForest, ColumnarPhrases
+from pyglarf.tests.test_glarf_tree import test_sentence
+from pyglarf.tests.test_glarf_forest import glarf_parses, glarf_tuples
+from pyglarf.tests.test_glarf_forest import _check_cross_sentence
+
+
+def test_columnar_matches_glarf_tree():
+    forest = GlarfForest(glarf_parses, glarf_tuples)
+    columnar = ColumnarForest(forest)
+    assert_equal(len(columnar), 3)
+    for tree, view in zip(forest, columnar):
+        assert_equal(view.node, tree.node)
+        assert_equal(len(view), len(tree))
+        assert_equal(view.leaves(), tree.leaves())
+        assert_equal(view.attributes(), tree.attributes())
+        assert_equal(view.print_flat(), tree.print_flat())
+        assert_equal(map(str, view.rels()), map(str, tree.rels()))
+        assert_equal([str(np) for np, _ in view.nps()],
+                     [str(np) for np, _ in tree.nps()])
+    _check_cross_sentence(columnar)
+
+
+def test_columnar_views():
+    columnar = ColumnarForest.from_glarf(glarf_parses, glarf_tuples)
+    tree = columnar[1]
+    sbj = tree[0]
+    np = sbj[0]
+    assert_equal((sbj.node, np.node), ('SBJ', 'NP'))
+    assert_equal(tree.parent(np), sbj)
+    assert_true(tree.parent(tree) is None)
+    assert_equal(np.head()[0].node, 'NN')
+    assert_equal(np.head()[0][:2], ['man', 'man'])
+    assert_equal(tree[-1], tree[len(tree) - 1])
+    assert_equal(np.index(), '2')
+    assert_equal(tree.phrase_by_id('2'), sbj)
+
+
+def test_columnar_phrase_groups():
+    """Ambiguous and unknown INDEX values give views matching GlarfTree"""
+    tree = GlarfTree.glarf_parse(test_sentence.replace('(INDEX 14)',
+                                                       '(INDEX 10)'))
+    view = ColumnarForest([tree])[0]
+    for id_nr in ('10', '42'):
+        group, expected = view.phrase_by_id(id_nr), tree.phrase_by_id(id_nr)
+        assert_true(isinstance(group, ColumnarPhrases))
+        assert_equal((group.node, len(group), bool(group)),
+                     (expected.node, len(expected), bool(expected)))
+        assert_equal(group.height(), expected.height())
+        assert_equal(group.leaves(), expected.leaves())
+        assert_equal(group.print_flat(), expected.print_flat())
+    group = view.phrase_by_id('10')
+    assert_equal([np.node for np in group], ['NP', 'NP'])
+    assert_true(group.parent(group[1]) is group)
+    assert_equal(group.parent(group[0][0]), group[0])
+    assert_equal(view.head_by_id('10').print_flat(),
+                 tree.head_by_id('10').print_flat())
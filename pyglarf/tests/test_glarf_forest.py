@@ -0,0 +1,68 @@
+from nose.tools import assert_equal, assert_true
+
+from pyglarf import GlarfForest, LazyGlarfForest
+from pyglarf.tests.test_glarf_tree import test_sentence, tuple_sentence
+from pyglarf.tests.test_glarf_tree import tuple_lines
+
+# "It grew.", whose subject points to Overture in test_sentence
+cross_sentence = """\
+((S (SBJ (NP (HEAD (PRP It 0)) (INDEX 2)))
+  (PRD (VP (HEAD (VG (HEAD (VBD grew 1))
+                     (P-ARG1 (NP (EC-TYPE PB) (TREE+INDEX |0+15|)))
+                     (INDEX 3) (BASE GROW)))))
+  (PUNCTUATION (|.| |.| 2)) (TREE-NUM 2) (INDEX 0) (SENTENCE-OFFSET 60)))
+"""
+
+glarf_parses = [test_sentence, tuple_sentence, cross_sentence]
+glarf_tuples = [None, tuple_lines, None]
+
+
+def _check_cross_sentence(forest):
+    rel, = forest[2].rels()
+    roles, _, ids, _ = rel.args['P-ARG1']
+    assert_equal(roles, ['OBJ'])
+    assert_equal(ids, ['0/15'])
+
+
+def test_forest():
+    forest = GlarfForest(glarf_parses, glarf_tuples)
+    assert_equal(len(forest), 3)
+    _check_cross_sentence(forest)
+
+
+def test_lazy_forest():
+    forest = LazyGlarfForest(glarf_parses, glarf_tuples, cache_size=2)
+    assert_equal(len(forest), 3)
+    assert_equal(len(forest._cache), 0)
+    assert_equal(forest[1], GlarfForest(glarf_parses, glarf_tuples)[1])
+    assert_true(forest[-2] is forest[1])
+    _check_cross_sentence(forest)
+    # tree 1 is the least recently used, it was evicted
+    assert_equal(sorted(forest._cache), [0, 2])
+    assert_equal(len(list(forest)), 3)
+    assert_true(all(tree._forest is forest for tree in forest))
+
+
+def test_resolve_cross_references():
+    forest = LazyGlarfForest(glarf_parses, glarf_tuples, cache_size=2)
+    references = forest.resolve_cross_references()
+    assert_equal(references.keys(), [('0', '15')])
+    assert_true(references['0', '15'] is forest.phrase_by_id('0', '15'))
+    assert_equal(references['0', '15'].node, 'OBJ')
+    assert_equal(list(forest._cache), [2, 0])
+    _check_cross_sentence(forest)
+    # resolved from the map, tree 0 is not used again
+    assert_equal(list(forest._cache), [0, 2])
+
+
+def test_cross_phrases_evicted():
+    forest = LazyGlarfForest(glarf_parses, glarf_tuples, cache_size=1)
+    assert_equal(forest.phrase_by_id('0', '15').node, 'OBJ')
+    # INDEX values without a phrase are remembered too
+    missing = forest.phrase_by_id('0', '999')
+    assert_equal(missing.node, '?')
+    assert_true(forest.phrase_by_id('0', '999') is missing)
+    forest[1]
+    assert_equal(forest._cross_phrases, {})
+    _check_cross_sentence(forest)
+    assert_equal(forest._cross_phrases.keys(), [0])
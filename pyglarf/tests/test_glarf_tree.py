@@ -1,6 +1,9 @@
-from nose.tools import raises, assert_equal
+from nose.tools import raises, assert_equal, assert_true
 
 from pyglarf import GlarfTree
+from pyglarf.glarf_tree import PHRASE, POS, ATTRIBUTE, EMPTY_CATEGORY
+from pyglarf.glarf_tree import leaf_pattern
+from pyglarf.nltkbackports import Tree
 
 # A slightly modified tree from ns-autopb101e
 # where I added a random unmatched paranthesis in
@@ -54,6 +57,27 @@ test_sentence = """\
 
 """
 
+# GLARF output for "A man arrived.", with its tuples
+tuple_sentence = """\
+((S
+  (SBJ (NP (Q-POS (DT A 0)) (HEAD (NN man 1)) (PTB2-POINTER |0+1|) (INDEX 2)))
+  (PRD
+   (VP
+    (HEAD
+     (VG (HEAD (VBD arrived 2)) (P-ARG1 (NP (EC-TYPE PB) (INDEX 2))) (INDEX 3)
+      (BASE ARRIVE) (VERB-SENSE 1) (SENSE-NAME "MOVE, COME TO")))
+    (PTB2-POINTER |2+1|)))
+  (PUNCTUATION (|.| |.| 3)) (PTB2-POINTER |0+2|) (TREE-NUM 0) (FILE-NAME "tmp")
+  (INDEX 0) (SENTENCE-OFFSET 0)))
+"""
+
+tuple_lines = ['SBJ | SBJ | ARG1 | NIL | NIL | arrived | 6 | 2 | VBD | ARRIVE | '
+               'NIL | NIL | NIL | 1 | NIL | NIL | NIL | man | 2 | 1 | NN | MAN | '
+               'NIL | NIL | NIL ',
+               'Q-POS | Q-POS | NIL | NIL | NIL | man | 2 | 1 | NN | MAN | NIL | '
+               'NIL | NIL | NIL | NIL | NIL | NIL | A | 0 | 0 | DT | A | NIL | '
+               'NIL | NIL ']
+
 
 def test_successful_parse():
     """Test that glarf_parse succeeds..."""
@@ -78,3 +102,76 @@ def test_leaves():
 def test_error_parse():
     """Test that GLARF error parses raise exceptions"""
     GlarfTree.glarf_parse("((***ERROR***))")
+
+
+def test_phrase_by_id():
+    """Test INDEX lookups, which skip empty categories"""
+    tree = GlarfTree.glarf_parse(test_sentence)
+    assert_equal(tree.phrase_by_id('15').node, 'OBJ')
+    assert_equal(tree.phrase_by_id('1').node, 'S-UNIT')
+    assert_equal(tree.phrase_by_id('0'), tree)
+    assert_equal(tree.phrase_by_id('42').node, '?')
+
+
+def test_parent():
+    """Test that parents are resolved by identity, not by equality"""
+    obj_np = GlarfTree('NP', [GlarfTree('INDEX', ['1'])])
+    tree = GlarfTree('S', [GlarfTree('SBJ', [GlarfTree('NP', [GlarfTree(
+                     'INDEX', ['1'])])]), GlarfTree('OBJ', [obj_np])])
+    assert_equal(tree.parent(obj_np).node, 'OBJ')
+    assert_equal(tree.parent(tree), None)
+    assert_equal(tree.parent(GlarfTree('NP', [])), None)
+
+
+def test_node_metadata():
+    """Test the heights and label classes cached by the parse pass"""
+    tree = GlarfTree.glarf_parse(test_sentence)
+    for subtree in tree.subtrees():
+        assert_equal(subtree.height(), Tree.height(subtree))
+    assert_equal(tree.label_class(), PHRASE)
+    assert_equal(tree.ptb_leaves().next().label_class(), POS)
+    arg = tree.phrase_by_id('18')[0][1]  # (P-ARGM-LOC (PP (EC-TYPE PB) ...
+    assert_equal(arg[0][0].label_class(), EMPTY_CATEGORY)
+    assert_equal(arg[0][1].label_class(), ATTRIBUTE)
+    assert_true(arg[0][1].is_preterminal())
+    assert_true(not arg[0].is_preterminal())
+    # explicit tag lists select preterminals with is_preterminal
+    assert_equal([t[0] for t in tree.ptb_leaves(included=['NNP'])],
+                 ['Yahoo', 'Overture'])
+    assert_equal(tree[2][0].attributes(excluded=['INDEX']),
+                 {'SEM-FEATURE': 'COMMUNICATOR', 'NE-TYPE': 'ORGANIZATION',
+                  'PTB2-POINTER': '|3+1|'})
+
+
+def test_parse_matches_generic_parser():
+    """Test glarf_parse against Tree.parse followed by lemma attachment"""
+    for s, tuples in ((test_sentence, None), (tuple_sentence, tuple_lines)):
+        tree = GlarfTree.glarf_parse(s, tuples)
+        expected = GlarfTree.parse(s, leaf_pattern=leaf_pattern,
+                                   remove_empty_top_bracketing=True)
+        expected._initialize_tuples(tuples)._set_lemmas()._build_index()
+        assert_equal(tree, expected)
+        assert_equal(tree._tuples, expected._tuples)
+        assert_equal(tree._phrases, expected._phrases)
+        for subtree, other in zip(tree.subtrees(), expected.subtrees()):
+            assert_equal(tree.parent(subtree), expected.parent(other))
+            assert_equal(subtree.label_class(), other.label_class())
+            assert_equal(subtree.height(), other.height())
+    assert_equal(tree.print_flat(indices=False, pos=False, structure=False),
+                 'A/a man/man arrived/arrive |.|/')
+
+
+def test_interned_labels():
+    """Test that labels and closed-class values are shared between trees"""
+    tree = GlarfTree.glarf_parse(test_sentence)
+    other = GlarfTree.glarf_parse(tuple_sentence, tuple_lines)
+    assert_true(tree.node is other.node)
+    ec_type = lambda t: t.node == 'EC-TYPE'
+    assert_true(next(tree.subtrees(ec_type))[0] is
+                next(other.subtrees(ec_type))[0])
+    # open-class values are not interned
+    file_name = next(tree.subtrees(lambda t: t.node == 'FILE-NAME'))[0]
+    assert_true(intern(''.join(file_name)) is not file_name)
+    # unicode strings cannot be interned but are still parsed
+    assert_equal(GlarfTree.glarf_parse(unicode(tuple_sentence), tuple_lines),
+                 other)
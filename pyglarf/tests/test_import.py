@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+
+from nose.tools import assert_equal, assert_raises
+
+import pyglarf
+from pyglarf import GlarfTree
+from pyglarf.nltkbackports import Tree
+from pyglarf.tests.test_glarf_tree import tuple_sentence
+
+
+def run(statements, **environ):
+    """Output of `statements` run in a fresh interpreter"""
+    return subprocess.check_output(
+        [sys.executable, '-c', statements],
+        env=dict(os.environ, **environ),
+        stderr=open(os.devnull, 'w')).strip()
+
+
+def test_lazy_import():
+    loaded = ("import sys; print sorted(m for m in sys.modules "
+              "if m.startswith(('pyglarf.', 'nltk')) and sys.modules[m])")
+    assert_equal(run('import pyglarf; ' + loaded), '[]')
+    assert_equal(run('from pyglarf import GlarfTree; ' + loaded),
+                 str(['pyglarf.glarf_tree', 'pyglarf.nltkbackports',
+                      'pyglarf.nltkbackports.tree', 'pyglarf.nounphrase',
+                      'pyglarf.relation', 'pyglarf.tuples']))
+    assert_equal(run('import pyglarf; print pyglarf.GlarfWrapper'),
+                 "<class 'pyglarf.wrapper.GlarfWrapper'>")
+
+
+def test_tree_backend():
+    assert_equal(pyglarf.tree_backend, 'backport')
+    assert_raises(ValueError, pyglarf.use_tree_backend, 'nltk')
+    assert_raises(ValueError, pyglarf.use_tree_backend, 'foo')
+    pyglarf.use_tree_backend('backport')
+    assert_raises(AttributeError, getattr, pyglarf, 'Foo')
+    assert_raises(subprocess.CalledProcessError, run,
+                  'import pyglarf.glarf_tree', PYGLARF_TREE_BACKEND='foo')
+
+
+def test_convert_to():
+    tree = GlarfTree.glarf_parse(tuple_sentence)
+    copy = tree.convert_to(Tree)
+    assert_equal(type(copy), Tree)
+    assert_equal(copy, tree)
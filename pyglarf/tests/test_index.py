@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+
+from nose.tools import assert_equal, raises, with_setup
+
+from pyglarf import GlarfForest
+from pyglarf.index import RelationIndex
+from pyglarf.tests.test_glarf_forest import glarf_parses, glarf_tuples
+from pyglarf.tests.test_glarf_tree import tuple_lines
+from pyglarf.tests.test_nounphrase import apposite
+
+paths = {}
+
+
+def setup_dir():
+    paths['dir'] = tempfile.mkdtemp()
+    paths['index'] = os.path.join(paths['dir'], 'index.db')
+
+
+def remove_dir():
+    shutil.rmtree(paths['dir'])
+
+
+@with_setup(setup_dir, remove_dir)
+def test_search():
+    with RelationIndex(paths['index']) as index:
+        index.add_document('doc', GlarfForest(glarf_parses, glarf_tuples))
+        index.add_document('apposite', [apposite])
+        index.add_tuples('tuples', [(4, tuple_lines)])
+    with RelationIndex(paths['index']) as index:
+        assert_equal(index.documents(), ['doc', 'apposite', 'tuples'])
+        assert_equal(index.search('arrive', ARG1='man'),
+                     [('doc', 1, '2'), ('tuples', 4, '2')])
+        assert_equal(index.search(SBJ='MAN'), index.search('ARRIVE'))
+        assert_equal(index.search('BE', ARG1='WIFE', PRD='BEAUTIFUL'),
+                     [('apposite', 0, '5')])
+        assert_equal(index.search('BE', ARG1='WIFE', PRD='UGLY'), [])
+        assert_equal(index.search('ACQUIRE', ARG0=None, **{'ARGM-LOC': None}),
+                     [('doc', 0, '5')])
+        assert_equal(index.entity_mentions('mary'), [('apposite', 0, '5')])
+        assert_equal(index.entity_mentions('man'), [('doc', 1, '2')])
+
+        # documents are replaced when added again
+        index.add_tuples('doc', [])
+        assert_equal(len(index), 3)
+        assert_equal(index.search('ARRIVE'), [('tuples', 4, '2')])
+        assert_equal(index.entity_mentions('man'), [])
+
+
+@raises(ValueError)
+def test_empty_search():
+    RelationIndex(':memory:').search()
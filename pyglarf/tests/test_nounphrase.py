@@ -1,4 +1,8 @@
-from nose.tools import assert_equal
+import cPickle
+import pickle
+import re
+
+from nose.tools import assert_equal, assert_false, assert_true
 # My wife, Mary, is beautiful.
 
 from pyglarf import GlarfTree
@@ -46,3 +50,54 @@ def test_correct_nps():
 
 def test_apposite():
     assert_equal(nps[0].links['APPOSITE'][0], nps[2].index)
+
+
+def test_lazy_calculated_attributes():
+    np = nps[0]
+    assert_true(np._rec_head is None)  # not computed by nps()
+    assert_equal(np.rec_head_, np.head.most_specific_head())
+    assert_true(np._rec_head is not None)
+    assert_false(hasattr(nps[2], 'rec_head_'))  # Mary has no head
+    assert_false(hasattr(np, 'rec_conj_'))
+    assert_false(hasattr(np, '__dict__'))
+    assert_true('lazy' not in np.attrs)
+    attrs_line = str(nps[2]).splitlines()[1]
+    for attr in ('PATTERN: NAME', 'PTB2-POINTER: |3+1|',
+                 'SEM-FEATURE: NHUMAN'):
+        assert_true(attr in attrs_line)
+
+
+def test_as_tuple():
+    np = nps[2]
+    assert_equal(np.as_tuple()[np._fields.index('index')], '5')
+    assert_equal(dict(zip(np._fields, np.as_tuple()))['attrs'], np.attrs)
+    rel, = apposite.rels()
+    assert_equal(rel.as_tuple()[:2], ('5', 'BE'))
+
+
+def _unordered_str(record):
+    """Lines of str(record), the attributes of a line in any order"""
+    return [sorted(re.split(r'[\[\],]\s*', line))
+            for line in str(record).splitlines()]
+
+
+def test_pickle():
+    rel, = apposite.rels()
+    for dumps, loads in ((pickle.dumps, pickle.loads),
+                         (cPickle.dumps, cPickle.loads)):
+        for protocol in (0, 2):
+            for record in (rel, nps[0], nps[2]):
+                copy = loads(dumps(record, protocol))
+                assert_equal(type(copy), type(record))
+                assert_equal(copy.as_tuple(), record.as_tuple())
+                assert_equal(_unordered_str(copy), _unordered_str(record))
+    copy = pickle.loads(pickle.dumps(nps[0]))
+    assert_equal(copy.rec_head_, nps[0].rec_head_)
+
+
+def test_entities():
+    assert_equal(apposite.entities(),
+                 {'4': ('My/i/PRP$/0 wife/wife/NN/1', []),
+                  '5': ('Mary/mary/NNP/3', ['My wife', 'wife']),
+                  'leaf1': ('wife/wife/NN/1', ['My'])})
+
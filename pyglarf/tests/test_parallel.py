@@ -0,0 +1,53 @@
+import shutil
+
+from nose.tools import assert_equal, assert_true
+
+from pyglarf import GlarfWrapper
+from pyglarf.parallel import make_sentences_parallel, BatchError
+from pyglarf.parallel import make_paragraphs_parallel
+from pyglarf.tests.fake_glarf import make_fake_glarf
+
+sentences = ["John died in Boston.", "Mary was born.", "It ERROR fails.",
+             "The market REF fell.", "Prices rose sharply.", "Hello, world.",
+             "This ERROR too."]
+
+
+def test_parallel_order():
+    """Test that shards are reassembled as the outputs of a single run"""
+    path = make_fake_glarf()
+    try:
+        with GlarfWrapper(path) as gw:
+            expected = gw.make_sentences(sentences)
+            expected_pars = gw.make_paragraphs(sentences)
+        outputs = make_sentences_parallel(sentences, n_jobs=3, shard_size=2,
+                                          path=path)
+        outputs_pars = make_paragraphs_parallel(sentences, n_jobs=3,
+                                                shard_size=2, path=path)
+    finally:
+        shutil.rmtree(path)
+    jet_par, parse_par, glarf_par, tuples_par = outputs
+    assert_equal([line.split(' ', 1)[1] for line in jet_par], sentences)
+    # the reference in the second shard points to its first tree
+    assert_true('(TREE+INDEX |2+0|)' in glarf_par[3])
+    assert_equal(outputs, expected)
+    assert_equal(outputs_pars, expected_pars)
+    # the last sentence failed, it has no tuples
+    assert_equal(len(tuples_par), 6)
+
+
+def test_parallel_failures():
+    """Test that failed shards are reported individually"""
+    path = make_fake_glarf()
+    try:
+        make_sentences_parallel(sentences[:4] + ['It will CRASH.'],
+                                n_jobs=2, shard_size=2, path=path)
+    except BatchError as e:
+        assert_equal([(shard, span) for shard, span, _ in e.failures],
+                     [(2, (4, 5))])
+        assert_true(isinstance(e.failures[0][2], RuntimeError))
+        assert_equal(e.results[2], None)
+        assert_equal(len(e.results[0][0]), 2)
+    else:
+        raise AssertionError('BatchError not raised')
+    finally:
+        shutil.rmtree(path)
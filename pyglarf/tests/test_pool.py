@@ -0,0 +1,51 @@
+import os
+import shutil
+
+from nose.tools import assert_equal, assert_false, assert_true, raises
+
+from pyglarf import GlarfWrapper
+from pyglarf.pool import WorkdirPool
+from pyglarf.tests.fake_glarf import make_fake_glarf
+
+sentences = ["John died in Boston.", "Hello, world."]
+
+
+def test_pool_reuses_workdirs():
+    """Test that workdirs are handed out again with an empty tmp/"""
+    path = make_fake_glarf()
+    try:
+        with GlarfWrapper(path) as gw:
+            expected = gw.make_sentences(sentences)
+        with WorkdirPool(path) as pool:
+            with GlarfWrapper(path, pool=pool) as gw:
+                assert_equal(gw.make_sentences(sentences), expected)
+                wd = gw.wd
+            assert_true(os.path.exists(os.path.join(wd, 'make-all-glarf-a')))
+            assert_equal(os.listdir(os.path.join(wd, 'tmp')), [])
+            with GlarfWrapper(path, pool=pool) as gw:
+                assert_equal(gw.wd, wd)
+                assert_equal(gw.make_sentences(sentences), expected)
+            assert_equal((pool.hits, pool.misses), (1, 1))
+            assert_true(pool.setup_time_saved > 0)
+            assert_equal(len(pool), 1)
+        assert_false(os.path.exists(wd))
+    finally:
+        shutil.rmtree(path)
+
+
+def test_pool_max_idle():
+    path = make_fake_glarf()
+    try:
+        pool = WorkdirPool(path, max_idle=0)
+        with GlarfWrapper(path, pool=pool) as gw:
+            wd = gw.wd
+        assert_false(os.path.exists(wd))
+        assert_equal(len(pool), 0)
+    finally:
+        shutil.rmtree(path)
+
+
+@raises(ValueError)
+def test_pool_other_installation():
+    with GlarfWrapper('/other/glarf', pool=WorkdirPool('/some/glarf')):
+        pass
@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+
+from nose.tools import assert_equal, assert_raises, with_setup
+
+from pyglarf import reader as reader_module
+from pyglarf.reader import GlarfReader, GlarfSplitter, iter_glarf_trees
+from pyglarf.reader import split_glarf_trees
+from pyglarf.wrapper import _split_glarf_tuples
+from pyglarf.tests.test_glarf_tree import test_sentence, tuple_lines
+from pyglarf.tests.test_glarf_forest import cross_sentence
+from pyglarf.tests.test_glarf_forest import _check_cross_sentence
+
+glarf_text = test_sentence + '((***ERROR***))\n' + cross_sentence
+tuple_text = (';;Tuples for Tree 0\n' + '\n'.join(tuple_lines) +
+              '\n;;Tuples for Tree 2\n')
+# two trees on a line, and a parenthesis at the start of a string line
+odd_text = '((A (TREE-NUM 4) |((|)) ((B))\n((C (D "x\n((")))\n'
+paths = {}
+
+
+def setup_files():
+    paths['dir'] = tempfile.mkdtemp()
+    for name, text in (('glarf', glarf_text), ('tuple', tuple_text),
+                       ('empty', ''), ('odd', odd_text),
+                       ('malformed', '((A))\n(B))\n')):
+        paths[name] = os.path.join(paths['dir'], name)
+        with open(paths[name], 'w') as f:
+            f.write(text)
+
+
+def remove_files():
+    shutil.rmtree(paths['dir'])
+
+
+@with_setup(setup_files, remove_files)
+def test_reader():
+    with GlarfReader(paths['glarf'], paths['tuple']) as reader:
+        assert_equal(len(reader), 3)
+        assert_equal(reader.tree_nums(), [0, 1, 2])
+        assert_equal(reader[0], test_sentence.strip())
+        assert_equal(reader[1], '((***ERROR***))')
+        assert_equal(reader.tree(2), cross_sentence.strip())
+        assert_equal([reader.tuples(i) for i in range(3)],
+                     _split_glarf_tuples(tuple_text))
+        assert_equal(reader.parse(0).node, 'S')
+        table = reader.tuple_table()
+        assert_equal(table.column('tree'), [0, 0])
+        assert_equal(table.column('role'), ['SBJ', 'Q-POS'])
+
+
+@with_setup(setup_files, remove_files)
+def test_reader_forest():
+    with GlarfReader(paths['glarf'], paths['tuple']) as reader:
+        _check_cross_sentence(reader.forest(cache_size=1))
+
+
+@with_setup(setup_files, remove_files)
+def test_reader_split():
+    """Test that the reader splits trees like GlarfSplitter"""
+    chunk_size = reader_module._index_chunk_size
+    try:
+        for size in (3, chunk_size):
+            reader_module._index_chunk_size = size
+            with GlarfReader(paths['odd']) as reader:
+                assert_equal(list(reader), split_glarf_trees(odd_text))
+                assert_equal(reader.tree_nums(), [4, 5, 6])
+    finally:
+        reader_module._index_chunk_size = chunk_size
+    assert_raises(ValueError, GlarfReader, paths['malformed'])
+
+
+@with_setup(setup_files, remove_files)
+def test_empty_files():
+    with GlarfReader(paths['empty'], paths['empty']) as reader:
+        assert_equal(len(reader), 0)
+        assert_equal(reader.tuples(0), None)
+
+
+def test_split_glarf_trees():
+    trees = [test_sentence.strip(), '((***ERROR***))', cross_sentence.strip()]
+    assert_equal(split_glarf_trees(glarf_text), trees)
+    # every chunking gives the same trees
+    for size in (1, 2, 5, 64):
+        chunks = (glarf_text[i:i + size]
+                  for i in range(0, len(glarf_text), size))
+        assert_equal(list(iter_glarf_trees(chunks)), trees)
+    # trees on one line, parentheses in strings, escapes
+    text = r'((A (B |(|) "x)" |"|)) ((C "\"(" |\|)|))'
+    assert_equal(split_glarf_trees(text + '\n'),
+                 ['((A (B |(|) "x)" |"|))', r'((C "\"(" |\|)|))'])
+    assert_equal(split_glarf_trees(' \n'), [])
+    # offsets, from both the fast path and the exact scanner
+    for text in (glarf_text, odd_text):
+        splitter = GlarfSplitter(offsets=True)
+        pairs = splitter.feed(text) + splitter.close()
+        assert_equal([tree for _, tree in pairs], split_glarf_trees(text))
+        assert_equal([text[offset:offset + len(tree)]
+                      for offset, tree in pairs],
+                     split_glarf_trees(text))
+
+
+def test_split_glarf_trees_errors():
+    for text in ('((A)) B', '((A)))', '((A) (B', '((A "(', '((A))\\'):
+        assert_raises(ValueError, split_glarf_trees, text)
+    splitter = GlarfSplitter()
+    assert_equal(splitter.feed('((A))\n((B |(|'), ['((A))'])
+    assert_raises(ValueError, splitter.close)
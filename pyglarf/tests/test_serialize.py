@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+
+from nose.tools import assert_equal, assert_true, raises, with_setup
+
+from pyglarf import GlarfForest
+from pyglarf.serialize import save_forest, load_forest
+from pyglarf.tests.test_glarf_forest import glarf_parses, glarf_tuples
+from pyglarf.tests.test_glarf_forest import _check_cross_sentence
+
+paths = {}
+
+
+def setup_dir():
+    paths['dir'] = tempfile.mkdtemp()
+    paths['forest'] = os.path.join(paths['dir'], 'forest.bin')
+
+
+def remove_dir():
+    shutil.rmtree(paths['dir'])
+
+
+@with_setup(setup_dir, remove_dir)
+def test_roundtrip():
+    forest = GlarfForest(glarf_parses, glarf_tuples)
+    save_forest(forest, paths['forest'])
+    for lazy in (False, True):
+        loaded = load_forest(paths['forest'], lazy=lazy)
+        assert_equal(len(loaded), 3)
+        for tree, loaded_tree in zip(forest, loaded):
+            assert_equal(loaded_tree, tree)
+            assert_equal(loaded_tree._tuples, tree._tuples)
+            assert_equal(loaded_tree._phrases, tree._phrases)
+            assert_true(loaded_tree._forest is loaded)
+        _check_cross_sentence(loaded)
+        assert_equal(map(str, loaded[1].rels()), map(str, forest[1].rels()))
+
+
+@with_setup(setup_dir, remove_dir)
+def test_shared_strings():
+    save_forest(GlarfForest(glarf_parses, glarf_tuples), paths['forest'])
+    labels = [subtree.node for tree in load_forest(paths['forest'])
+              for subtree in tree.subtrees()]
+    assert_equal(len(set(map(id, labels))), len(set(labels)))
+
+
+@with_setup(setup_dir, remove_dir)
+@raises(ValueError)
+def test_not_binary():
+    with open(paths['forest'], 'w') as f:
+        f.write(glarf_parses[0])
+    load_forest(paths['forest'])
@@ -0,0 +1,79 @@
+import shutil
+import threading
+
+from nose.tools import assert_equal, assert_raises, assert_true
+
+from pyglarf import GlarfTree, GlarfWrapper
+from pyglarf.stats import Stats
+from pyglarf.tests.fake_glarf import make_fake_glarf
+from pyglarf.tests.test_glarf_tree import tuple_sentence, tuple_lines
+from pyglarf.tests.test_wrapper import fake_sentences
+
+
+def test_instrument():
+    stages = []
+    stats = Stats(callback=lambda stage, seconds: stages.append(stage))
+    originals = dict(GlarfTree.__dict__)
+    with stats.instrument():
+        tree = GlarfTree.glarf_parse(tuple_sentence, tuple_lines)
+        rel, = tree.rels()
+        tree.entities()
+        assert_raises(ValueError, GlarfTree.glarf_parse, '((***ERROR***))')
+    assert_equal(stats.calls['glarf_parse'], 2)
+    assert_equal(stats.calls['rels'], 1)
+    assert_equal(stats.calls['phrase_by_id'], 1)
+    assert_equal(stats.calls['nps'], 1)  # from entities()
+    assert_equal(stats.counters, {'glarf_parse_failures': 1})
+    assert_equal(stages[:2], ['glarf_parse', 'phrase_by_id'])
+    assert_true(stats.times['rels'] >= stats.times['phrase_by_id'])
+    # the methods are restored
+    assert_equal(dict(GlarfTree.__dict__), originals)
+    list(tree.rels())
+    assert_equal(stats.calls['rels'], 1)
+
+
+def test_instrument_once():
+    """Test that methods are only patched by one Stats object at a time"""
+    stats, other = Stats(), Stats()
+    originals = dict(GlarfTree.__dict__)
+    with stats.instrument():
+        assert_raises(RuntimeError, stats.instrument)
+        assert_raises(RuntimeError, other.instrument)
+        other.restore()  # does not touch the methods of stats
+        # calls from other threads are not recorded
+        thread = threading.Thread(target=GlarfTree.glarf_parse,
+                                  args=(tuple_sentence, tuple_lines))
+        thread.start()
+        thread.join()
+        assert_equal(stats.calls['glarf_parse'], 0)
+        GlarfTree.glarf_parse(tuple_sentence, tuple_lines)
+        assert_equal(stats.calls['glarf_parse'], 1)
+    assert_equal(dict(GlarfTree.__dict__), originals)
+    # a failed instrument leaves nothing patched
+    assert_raises(AttributeError, other.instrument,
+                  methods=('rels', 'no_such_method'))
+    assert_equal(dict(GlarfTree.__dict__), originals)
+    with other.instrument():
+        pass
+    assert_equal(dict(GlarfTree.__dict__), originals)
+
+
+def test_wrapper_stats():
+    path = make_fake_glarf()
+    stats = Stats()
+    try:
+        with GlarfWrapper(path, stats=stats) as gw:
+            gw.make_sentences(fake_sentences)
+            list(gw.iter_sentences(fake_sentences, trees=True))
+    finally:
+        shutil.rmtree(path)
+    assert_equal(sorted(stats.times),
+                 ['glarf', 'parse', 'read', 'split', 'workdir'])
+    assert_equal(stats.calls['glarf'], 2)
+    assert_equal(stats.calls['parse'], len(fake_sentences))
+    counters = dict(stats.counters)
+    assert_true(counters.pop('bytes_read') > 0)
+    assert_equal(counters, {'sentences': 2 * len(fake_sentences),
+                            'trees': 2 * len(fake_sentences),
+                            'glarf_errors': 2, 'parse_failures': 1})
+    assert_true(stats.report().startswith('stage'))
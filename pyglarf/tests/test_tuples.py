@@ -0,0 +1,71 @@
+from nose.tools import assert_equal, assert_raises
+
+from pyglarf import GlarfTree
+from pyglarf.glarf_tree import _parse_tuples, _lemma_table
+from pyglarf.tests.test_glarf_forest import cross_sentence
+from pyglarf.tests.test_glarf_tree import test_sentence
+from pyglarf.tests.test_glarf_tree import tuple_sentence, tuple_lines
+from pyglarf.tuples import TupleTable, TupleRelation, FIELDS
+from pyglarf.tuples import tuple_relations, tree_relations
+
+
+def test_tuple_table():
+    table = TupleTable([(1, tuple_lines + ['']), (3, tuple_lines[:1])])
+    tuples = _parse_tuples(tuple_lines)
+    assert_equal(len(table), 3)
+    assert_equal(list(table), tuples + tuples[:1])
+    assert_equal(table[-1], tuples[0])
+    assert_equal(table.column('head_lemma'), ['ARRIVE', 'MAN', 'ARRIVE'])
+    assert_equal(table.column('tree'), [1, 1, 3])
+    assert_equal(table.column(FIELDS[6]), ['6', '2', '6'])
+    # every column can be referred to by position
+    assert_equal(FIELDS[6], 'head_offset')
+    assert_equal(table.column('field6'), ['6', '2', '6'])
+    assert_equal(table.column('field13'), ['1', 'NIL', '1'])
+    assert_equal(len(set(FIELDS)), 25)
+
+
+def test_filtering():
+    table = TupleTable([(1, tuple_lines), (3, tuple_lines[:1])])
+    assert_equal(list(table.rows(role='SBJ')), [0, 2])
+    assert_equal(list(table.rows(role='SBJ', tree=3)), [2])
+    assert_equal(list(table.rows(head_pos='NN', arg_pos='DT')), [1])
+    assert_equal(list(table.rows(role=['SBJ', 'Q-POS'])), [0, 1, 2])
+    assert_equal(list(table.rows(role='OBJ')), [])
+    assert_equal(list(table.rows()), [0, 1, 2])
+    subjects = table.where(role='SBJ', head_lemma='ARRIVE')
+    assert_equal(subjects.column('arg_lemma'), ['MAN', 'MAN'])
+    assert_equal(subjects.column('tree'), [1, 3])
+    assert_raises(ValueError, table.rows, lemma='MAN')
+
+
+def test_lemma_tables():
+    table = TupleTable([(1, tuple_lines), (3, tuple_lines[:1])])
+    lemmas = table.lemma_tables()
+    assert_equal(sorted(lemmas), [1, 3])
+    assert_equal(lemmas[1], _lemma_table(_parse_tuples(tuple_lines)))
+    assert_equal(lemmas[3], {'2': 'ARRIVE', '1': 'MAN'})
+
+
+def test_tuple_relations():
+    """Test that tuples and rels() give the same records for A man arrived"""
+    expected = [TupleRelation(3, 'ARRIVE', '2', 'ARG1', 'SBJ', 'MAN', '1')]
+    assert_equal(tuple_relations(tuple_lines, 3), expected)
+    assert_equal(list(TupleTable([(3, tuple_lines)]).relations()), expected)
+    tree = GlarfTree.glarf_parse(tuple_sentence, tuple_lines)
+    assert_equal(tree_relations(tree, 3), expected)
+    assert_equal(tuple_relations(None), [])
+
+
+def test_tree_relations():
+    """Test the records of several arguments, and of a cross-sentence one"""
+    # without tuples, the leaves have no lemmas
+    tree = GlarfTree.glarf_parse(test_sentence)
+    assert_equal([(r.head, r.arg_label, r.role, r.arg, r.arg_token)
+                  for r in tree_relations(tree)],
+                 [('ACQUIRE', 'ARG0', 'SBJ', '', '3'),
+                  ('ACQUIRE', 'ARG1', 'OBJ', '', '6'),
+                  ('ACQUIRE', 'ARG3', 'COMP', '', '7'),
+                  ('ACQUIRE', 'ARGM-LOC', 'ADV', '', '0')])
+    # the subject of "It grew." is in another sentence
+    assert_equal(tree_relations(GlarfTree.glarf_parse(cross_sentence)), [])
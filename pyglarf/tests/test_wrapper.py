@@ -1,11 +1,22 @@
-from nose.tools import assert_equal
+import errno
+import os
+import shutil
+from time import time
+
+from nose.tools import assert_equal, assert_raises, assert_true
 from pyglarf import GlarfWrapper
+from pyglarf.pool import WorkdirPool
+from pyglarf.wrapper import _as_tree, _zip_records
+from pyglarf.tests.fake_glarf import make_fake_glarf, n_startups
 
 test_sentences = ["Seven years after the bandages last came off, actor "
                   "Brendan Fraser returns in The Mummy: Tomb of the Dragon "
                   "Emperor as archaeologist Rick O'Connell, this time "
                   "retired, and with a grown-up son Alex.", "Hello, world."]
 
+fake_sentences = ["John died in Boston.", "This ERROR sentence fails.",
+                  "Hello, world."]
+
 
 def test_split():
     """Test correct splitting of Glarf output
@@ -22,3 +33,114 @@ def test_split():
     assert_equal(len(tuples), 2)
     assert_equal(glarfed[0], '((***ERROR***))')
     assert_equal(tuples[0], None)  # just a convention
+
+
+def test_fake_glarf():
+    """Test the wrapper against a stand-in Glarf installation"""
+    path = make_fake_glarf()
+    try:
+        with GlarfWrapper(path) as gw:
+            plain, parsed, glarfed, tuples = gw.make_sentences(fake_sentences)
+        assert_equal(plain[2], '48 Hello, world.')
+        assert_equal(parsed[0], '(S1 (S (NN John) (NN died) (NN in) '
+                                '(NN Boston.)))')
+        assert_equal(glarfed[1], '((***ERROR***))')
+        assert_equal([t and len(t) for t in tuples], [4, None, 2])
+    finally:
+        shutil.rmtree(path)
+
+
+def test_persistent_server():
+    """Test that the persistent backend only starts once"""
+    startup = 0.5
+    path = make_fake_glarf(startup=startup)
+    try:
+        with GlarfWrapper(path) as gw:
+            expected = gw.make_sentences(fake_sentences)
+            expected_pars = gw.make_paragraphs(' '.join(fake_sentences))
+        assert_equal(n_startups(path), 2)
+
+        with GlarfWrapper(path, server='./glarf-server --server') as gw:
+            for _ in range(3):
+                assert_equal(gw.make_sentences(fake_sentences), expected)
+            assert_equal(gw.make_paragraphs(' '.join(fake_sentences)),
+                         expected_pars)
+        assert_equal(n_startups(path), 3)
+    finally:
+        shutil.rmtree(path)
+
+
+def test_iter_sentences():
+    """Test that streamed records match the batch outputs"""
+    path = make_fake_glarf()
+    try:
+        with GlarfWrapper(path) as gw:
+            expected = gw.make_sentences(fake_sentences)
+            records = list(gw.iter_sentences(iter(fake_sentences)))
+            assert_equal(records, zip(*expected))
+            # tree numbers restart with each chunk
+            trees = list(gw.iter_sentences(fake_sentences * 2, chunk_size=2,
+                                           trees=True))
+        assert_equal([t and t.attributes()['TREE-NUM'] for t in trees],
+                     ['0', None, '0', '1', None, '1'])
+        assert_equal(trees[5].attributes()['SENTENCE-OFFSET'], '27')
+        assert_equal(n_startups(path), 5)
+    finally:
+        shutil.rmtree(path)
+
+
+def test_server_startup_failure():
+    """Test that a backend failing to start leaves nothing behind"""
+    path = make_fake_glarf()
+    try:
+        with WorkdirPool(path) as pool:
+            gw = GlarfWrapper(path, pool=pool,
+                              server='echo $$ > pid; echo NOPE; exec sleep 60')
+            with assert_raises(RuntimeError):
+                with gw:
+                    pass
+            assert_equal(len(pool), 1)  # the workdir went back to the pool
+            assert_equal(gw._server, None)
+            pid = int(open(os.path.join(pool._idle[0], 'pid')).read())
+            # the backend was killed and reaped
+            with assert_raises(OSError) as cm:
+                os.kill(pid, 0)
+            assert_equal(cm.exception.errno, errno.ESRCH)
+            with assert_raises(OSError):
+                os.fstat(gw.log[0])
+            os.remove(gw.log[1])
+    finally:
+        shutil.rmtree(path)
+
+
+def test_server_shutdown_timeout():
+    """Test that a backend ignoring the end of its input gets terminated"""
+    path = make_fake_glarf()
+    try:
+        gw = GlarfWrapper(path, server='echo READY; exec sleep 60')
+        gw.shutdown_timeout = 0.2
+        with gw:
+            server, wd = gw._server, gw.wd
+            tstart = time()
+        assert_true(time() - tstart < 5)
+        assert_true(server.returncode is not None)
+        assert_true(not os.path.exists(wd))
+        os.remove(gw.log[1])
+    finally:
+        shutil.rmtree(path)
+
+
+def test_records():
+    """Test that only Glarf errors are turned into missing trees"""
+    assert_equal(_as_tree(('0 It.', '(S1)', '((***ERROR***))', None)), None)
+    with assert_raises(ValueError):
+        _as_tree(('0 It.', '(S1)', '((S (NN It 0))', None))
+
+    jet, parses, trees = ['0 A.', '3 B.'], ['(S1)'] * 2, ['((A))', '((B))']
+    assert_equal(list(_zip_records(jet, parses, trees, [['t']])),
+                 [('0 A.', '(S1)', '((A))', ['t']),
+                  ('3 B.', '(S1)', '((B))', None)])
+    with assert_raises(RuntimeError):
+        list(_zip_records(jet, parses, trees[:1], []))
+    with assert_raises(RuntimeError):
+        list(_zip_records(jet, parses, trees, [None, None, ['t']]))
@@ -0,0 +1,348 @@
+"""Columnar tables of GLARF tuples.
+
+Every line of a `.ns-2005-fast-ace-n-tuple101e` file is a tuple of 25
+fields separated by bars, describing one dependency: the role, the head and
+the argument with their forms, token indices, POS tags and lemmas.  A
+TupleTable stores all the tuples of a corpus as positions in a shared
+string table, in one flat integer array, and answers queries such as "all
+the SBJ arguments of the lemma ARRIVE" through per-column postings instead
+of scanning Python tuples.
+
+Columns are named after `FIELDS`.  Only the columns whose contents are
+known are named: the three roles, and the form, offset, token index, POS
+tag and lemma of the head and of the argument.  The meaning of the other
+twelve, columns 3-4, 10-16 and 22-24, is not documented with the GLARF
+output pyglarf was written against, and they are NIL in its examples, but
+for column 13, which seems to hold the sense number of verbs.  Rather than
+guess, they are only named by position, such as `field13`.  Every column,
+named or not, can be referred to as `fieldN`, N being its position, and
+these names will not change if more columns get names.
+
+Tuples also hold the predicate-argument structure of the sentences:
+`tuple_relations` and `TupleTable.relations` extract it without parsing the
+GLARF trees at all, see TupleRelation.
+
+"""
+
+# License: BSD
+
+from array import array
+from collections import defaultdict, namedtuple
+from itertools import izip
+
+N_FIELDS = 25
+
+# positions of the named columns, see the module documentation
+ROLE, SURFACE_ROLE, LOGIC_ROLE = 0, 1, 2
+HEAD_FORM, HEAD_OFFSET, HEAD_TOKEN, HEAD_POS, HEAD_LEMMA = 5, 6, 7, 8, 9
+ARG_FORM, ARG_OFFSET, ARG_TOKEN, ARG_POS, ARG_LEMMA = 17, 18, 19, 20, 21
+
+_names = {ROLE: 'role', SURFACE_ROLE: 'surface_role',
+          LOGIC_ROLE: 'logic_role',
+          HEAD_FORM: 'head_form', HEAD_OFFSET: 'head_offset',
+          HEAD_TOKEN: 'head_token', HEAD_POS: 'head_pos',
+          HEAD_LEMMA: 'head_lemma',
+          ARG_FORM: 'arg_form', ARG_OFFSET: 'arg_offset',
+          ARG_TOKEN: 'arg_token', ARG_POS: 'arg_pos', ARG_LEMMA: 'arg_lemma'}
+FIELDS = tuple(_names.get(k, 'field%d' % k) for k in xrange(N_FIELDS))
+_positions = dict(('field%d' % k, k) for k in xrange(N_FIELDS))
+_positions.update((name, k) for k, name in enumerate(FIELDS))
+_relation_fields = 'tree head head_token arg_label role arg arg_token'
+
+
+class TupleRelation(namedtuple('TupleRelation', _relation_fields)):
+    """A predicate, one of its arguments and the role linking them.
+
+    The lightweight counterpart of Relation, one record per argument, read
+    from the tuples where the `logic_role` column is an ARGn label.
+
+    Attributes
+    ----------
+    tree, int:
+        number of the tree.
+    head, head_token, string:
+        lemma and token index of the predicate.
+    arg_label, string:
+        PropBank/NomBank label, such as ARG1.
+    role, string:
+        grammatical role of the argument, such as SBJ.
+    arg, arg_token, string:
+        lemma and token index of the head of the argument.
+
+    `tree_relations` builds records of the same form from
+    `GlarfTree.rels()`, lemmas being compared in upper case.  Both give the
+    same records on simple sentences, but they are not equivalent:
+
+    * the predicate is the lemma column of the tuples, but the BASE of the
+      relation in the trees, and the two can differ;
+    * nominal (NomBank) predicates can be found by one and not the other;
+    * the tree records leave out arguments in other sentences (TREE+INDEX)
+      and arguments without a head token.
+    """
+    __slots__ = ()
+
+
+def _is_arg_label(label):
+    return label.startswith('ARG')
+
+
+def tuple_relations(tuple_lines, tree_num=0):
+    """Relation records of a tree, read from its raw tuple lines.
+
+    Parameters
+    ----------
+    tuple_lines, list of strings:
+        raw tuple lines of a tree, as returned by `GlarfWrapper`.
+    tree_num, int, default=0:
+        number of the tree, stored in the records.
+
+    Returns
+    -------
+    A list of TupleRelation, in the order of the tuples.
+    """
+    relations = []
+    for line in tuple_lines or ():
+        fields = line.split('|')
+        if len(fields) <= ARG_LEMMA:
+            continue
+        arg_label = fields[LOGIC_ROLE].strip()
+        if _is_arg_label(arg_label):
+            relations.append(TupleRelation(
+                tree_num, fields[HEAD_LEMMA].strip(),
+                fields[HEAD_TOKEN].strip(), arg_label,
+                fields[ROLE].strip(), fields[ARG_LEMMA].strip(),
+                fields[ARG_TOKEN].strip()))
+    return relations
+
+
+def tree_relations(tree, tree_num=0):
+    """Relation records of `GlarfTree.rels()`, for comparison with tuples.
+
+    Records are built for every phrase of every P-ARGn argument of the
+    tree, cross-sentence arguments excepted.  The argument is represented
+    by the last token of its most specific head, and the predicate by the
+    BASE of the relation.  Lemmas are upper-cased, like in the tuples.
+
+    Parameters
+    ----------
+    tree, GlarfTree:
+        parsed with its tuples, so that leaves carry lemmas.
+    tree_num, int, default=0:
+        number of the tree, stored in the records.
+
+    Returns
+    -------
+    A list of TupleRelation.
+    """
+    relations = []
+    for rel in tree.rels():
+        for arg_label, (_, _, ids, phrases) in sorted(rel.args.iteritems()):
+            for id_nr, phrase in zip(ids, phrases):
+                # skip TREE+INDEX and unresolved arguments
+                if '/' in id_nr or not phrase:
+                    continue
+                leaves = list(phrase.most_specific_head().ptb_leaves())
+                if not leaves:
+                    continue
+                leaf = leaves[-1]
+                relations.append(TupleRelation(
+                    tree_num, rel.head.upper(), rel.index, arg_label[2:],
+                    phrase.node, leaf[1].upper() if len(leaf) > 2 else '',
+                    leaf[-1]))
+    return relations
+
+
+class TupleTable(object):
+    """The tuples of many trees, stored column by column.
+
+    Fields are stored as positions in `strings`, row after row, in the flat
+    array `codes`.  The tree number of every row is stored in `trees`.  The
+    columns are named after `FIELDS`; a column is sliced out of `codes` the
+    first time it is used, and its postings (value -> rows) are built the
+    first time it is filtered on.
+
+    Parameters
+    ----------
+    blocks, iterable of (tree_number, tuple_lines), optional:
+        tuple blocks to store, see `add_block`.
+
+    Examples
+    --------
+    >>> with open('doc.sgm.sent.ns-2005-fast-ace-n-tuple101e') as f:
+    ...     table = TupleTable(iter_tuple_blocks(f))
+    >>> subjects = table.where(role='SBJ', head_lemma='ARRIVE')
+    >>> subjects.column('arg_lemma')
+    ['MAN']
+    """
+    def __init__(self, blocks=()):
+        self.strings = []
+        self._string_ids = {}
+        self.codes = array('i')
+        self.trees = array('i')
+        self._columns = {}
+        self._postings = {}
+        for tree_num, tuple_lines in blocks:
+            self.add_block(tree_num, tuple_lines)
+
+    def add_block(self, tree_num, tuple_lines):
+        """Append the tuples of tree number `tree_num`.
+
+        Parameters
+        ----------
+        tree_num, int:
+            number of the tree, as in the "Tuples for Tree N" header.
+
+        tuple_lines, list of strings:
+            raw tuple lines, as returned by `GlarfWrapper` or
+            `pyglarf.reader.iter_tuple_blocks`.  Blank lines are skipped and
+            missing trailing fields are stored as empty strings.
+        """
+        strings, string_ids = self.strings, self._string_ids
+        get = string_ids.get
+        codes = []
+        for line in tuple_lines:
+            # Fields are normally separated by ' | '.  The string table only
+            # holds stripped fields without bars, so if all the pieces are
+            # known strings they are the fields of the line.
+            row = map(get, line.strip().split(' | '))
+            if len(row) == N_FIELDS and None not in row:
+                codes.extend(row)
+                continue
+            fields = line.split('|')
+            if len(fields) == 1 and not line.strip():
+                continue
+            if len(fields) > N_FIELDS:
+                raise ValueError('Tuple with more than %d fields: %r'
+                                 % (N_FIELDS, line))
+            fields.extend([''] * (N_FIELDS - len(fields)))
+            for field in fields:
+                field = field.strip()
+                if field not in string_ids:
+                    string_ids[field] = len(strings)
+                    strings.append(intern(field)
+                                   if type(field) is str else field)
+                codes.append(string_ids[field])
+        self.codes.fromlist(codes)
+        self.trees.fromlist([tree_num] * (len(codes) // N_FIELDS))
+        self._columns = {}
+        self._postings = {}
+
+    def __len__(self):
+        return len(self.codes) // N_FIELDS
+
+    def __getitem__(self, row):
+        """The fields of a row, as in `GlarfTree._tuples`"""
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError('table index out of range')
+        strings = self.strings
+        start = row * N_FIELDS
+        return tuple(strings[code]
+                     for code in self.codes[start:start + N_FIELDS])
+
+    def __iter__(self):
+        for row in xrange(len(self)):
+            yield self[row]
+
+    def column_codes(self, name):
+        """Array of the string table positions of a column"""
+        codes = self._columns.get(name)
+        if codes is None:
+            codes = self._columns[name] = self.codes[_positions[name]::
+                                                     N_FIELDS]
+        return codes
+
+    def column(self, name):
+        """List of the values of a column, `tree` for the tree numbers"""
+        if name == 'tree':
+            return self.trees.tolist()
+        return map(self.strings.__getitem__, self.column_codes(name))
+
+    def _posting_list(self, name, value):
+        postings = self._postings.get(name)
+        if postings is None:
+            postings = defaultdict(lambda: array('i'))
+            values = self.trees if name == 'tree' else self.column_codes(name)
+            for row, code in enumerate(values):
+                postings[code].append(row)
+            postings = self._postings[name] = dict(postings)
+        code = value if name == 'tree' else self._string_ids.get(value)
+        return postings.get(code, ())
+
+    def rows(self, **conditions):
+        """Rows matching all the conditions, in increasing order.
+
+        Parameters
+        ----------
+        conditions:
+            column names, or `tree`, and the values they must take.  A
+            list, tuple or set of values matches any of them.
+
+        Examples
+        --------
+        >>> table.rows(role=('SBJ', 'OBJ'), head_pos='VBD')
+        array('i', [0, 5, 12])
+        """
+        matches = None
+        for name, values in conditions.iteritems():
+            if name != 'tree' and name not in _positions:
+                raise ValueError('Unknown tuple column: %s' % name)
+            if not isinstance(values, (list, tuple, set, frozenset)):
+                values = (values,)
+            rows = set()
+            for value in values:
+                rows.update(self._posting_list(name, value))
+            matches = rows if matches is None else matches & rows
+        if matches is None:
+            return array('i', xrange(len(self)))
+        return array('i', sorted(matches))
+
+    def take(self, rows):
+        """New table made of the given rows, sharing the string table"""
+        table = TupleTable()
+        table.strings, table._string_ids = self.strings, self._string_ids
+        codes = self.codes
+        for row in rows:
+            start = row * N_FIELDS
+            table.codes.extend(codes[start:start + N_FIELDS])
+            table.trees.append(self.trees[row])
+        return table
+
+    def where(self, **conditions):
+        """New table of the rows matching the conditions, see `rows`"""
+        return self.take(self.rows(**conditions))
+
+    def relations(self):
+        """Yield the TupleRelation records of all the trees, see
+        `tuple_relations`."""
+        strings = self.strings
+        arg_labels = set(code for code, label in enumerate(strings)
+                         if _is_arg_label(label))
+        columns = [self.column_codes(name) for name in
+                   ('head_lemma', 'head_token', 'logic_role', 'role',
+                    'arg_lemma', 'arg_token')]
+        for (tree_num, head, head_token, arg_label, role, arg,
+                arg_token) in izip(self.trees, *columns):
+            if arg_label in arg_labels:
+                yield TupleRelation(tree_num, strings[head],
+                                    strings[head_token], strings[arg_label],
+                                    strings[role], strings[arg],
+                                    strings[arg_token])
+
+    def lemma_tables(self):
+        """Map tree numbers to token index -> lemma tables.
+
+        Head and argument lemmas of every tuple are aligned to their token
+        indices, the same way GlarfTree attaches lemmas to its leaves.
+        """
+        strings = self.strings
+        tables = defaultdict(dict)
+        columns = [self.column_codes(name) for name in
+                   ('head_token', 'head_lemma', 'arg_token', 'arg_lemma')]
+        for tree_num, head, head_lemma, arg, arg_lemma in izip(self.trees,
+                                                               *columns):
+            lemmas = tables[tree_num]
+            lemmas[strings[head]] = strings[head_lemma]
+            lemmas[strings[arg]] = strings[arg_lemma]
+        return dict(tables)
@@ -3,6 +3,22 @@
 Requires Glarf, sbcl, perl but takes care of the environment variables, as long
 as sbcl and perl are where they should.
 
+Persistent mode
+---------------
+Every `make-all-glarf-*` run starts the Jet, parser and Lisp stages anew and
+reloads their models.  To avoid paying this on every call, GlarfWrapper can
+instead drive a long-running backend, given as the `server` command.  The
+command is started once, in the working directory, and talks to the wrapper
+through a line protocol on its standard streams:
+
+* once its models are loaded, it writes ``READY``;
+* for each request, it reads a line such as ``a N`` or ``b N P``, processes
+  ``tmp/tmp.sgm`` like ``make-all-glarf-a tmp N`` (resp. ``-b``) would,
+  writing the same output files, then writes ``OK``, or ``ERROR`` followed
+  by a message;
+* it exits when its standard input is closed.  A backend still running
+  `shutdown_timeout` seconds later is terminated.
+
 """
 
 # Author: Vlad Niculae <vlad@vene.ro>
@@ -11,13 +27,46 @@ as sbcl and perl are where they should.
 import os
 import re
 import shutil
+import sys
 import tempfile
+import time
+
+from itertools import izip, izip_longest
+from subprocess import call, Popen, PIPE
+
+from pyglarf.glarf_tree import GlarfTree
+from pyglarf.reader import iter_glarf_trees, iter_tuple_blocks
+from pyglarf.reader import split_glarf_trees
+from pyglarf.stats import timer
+from pyglarf.tuples import HEAD_OFFSET, ARG_OFFSET
 
-from subprocess import call
+# tree numbers and offsets in Glarf trees, after their prefix
+_tree_num_re = re.compile(r'(\(TREE-NUM |\(TREE\+INDEX \|)([0-9]+)')
+_sentence_offset_re = re.compile(r'(\(SENTENCE-OFFSET )([0-9]+)')
+_tree_ref_re = re.compile(r'\(TREE\+INDEX \|([0-9]+)\+')
 
 PATH = '/Users/vene/fbk/kits/glarf'
 
 
+def _set_environment(path):
+    os.environ['GLARF'] = path
+    os.environ['GLARF_JET'] = os.path.join(path, 'JET')
+    if '.' not in os.environ['PATH'].split(':'):
+        os.environ['PATH'] += ':.'
+
+
+def _make_workdir(path):
+    """Create a working directory with the scripts of the Glarf at `path`"""
+    _set_environment(path)
+    wd = tempfile.mkdtemp()
+    successful_copy = call(['copy-glarf-scripts ' + wd], shell=True,
+                           cwd=os.path.join(path, 'commands-2010'))
+    assert successful_copy == 0
+
+    os.mkdir(os.path.join(wd, 'tmp'))
+    return wd
+
+
 def _split_glarf_tuples(txt_tuples):
     """Splits raw tuple file into array of arrays, handling missing trees"""
     tp_dict = {}
@@ -28,7 +77,142 @@ def _split_glarf_tuples(txt_tuples):
         tuples = tuple_lines[1:]
         tp_dict[tree_idx] = tuples
     # Build array from int-keyed dict, filling missing values with None
-    return [tp_dict.get(k, None) for k in xrange(max(tp_dict.keys()) + 1)]
+    return [tp_dict.get(k, None) for k in xrange(max(tp_dict.keys() or [-1])
+                                                 + 1)]
+
+
+def _split_records(outputs, n_sentences):
+    """Split the four outputs into one record per sentence.
+
+    Returns None if Glarf did not produce exactly one output per sentence.
+    """
+    jet_out, parse_out, glarf_out, tuple_out = outputs
+    if (len(jet_out) != n_sentences or len(parse_out) != n_sentences or
+            len(glarf_out) != n_sentences or len(tuple_out) > n_sentences):
+        return None
+    tuple_out = tuple_out + [None] * (n_sentences - len(tuple_out))
+    return zip(jet_out, parse_out, glarf_out, tuple_out)
+
+
+def _record_offset(record):
+    """Offset of the sentence of a record, read from its Jet output"""
+    return int(record[0].split(' ', 1)[0])
+
+
+def _rebase_record(record, tree_of, offset_shift):
+    """Copy of a record moved to another place in a document.
+
+    Tree numbers, in TREE-NUM and TREE+INDEX values, are mapped by the
+    function `tree_of`, and character offsets, in the Jet output,
+    SENTENCE-OFFSET and the offset columns of the tuples, are shifted by
+    `offset_shift`.
+    """
+    jet, parse, glarf, tuples = record
+    offset, text = jet.split(' ', 1)
+    jet = '%d %s' % (int(offset) + offset_shift, text)
+    glarf = _tree_num_re.sub(
+        lambda m: m.group(1) + str(tree_of(int(m.group(2)))), glarf)
+    glarf = _sentence_offset_re.sub(
+        lambda m: m.group(1) + str(int(m.group(2)) + offset_shift), glarf)
+    if tuples is not None:
+        tuples = [_shift_tuple(line, offset_shift) for line in tuples]
+    return jet, parse, glarf, tuples
+
+
+def _shift_tuple(line, offset_shift):
+    fields = line.split('|')
+    for k in (HEAD_OFFSET, ARG_OFFSET):
+        if k < len(fields) and fields[k].strip().isdigit():
+            value = fields[k].strip()
+            fields[k] = fields[k].replace(
+                value, str(int(value) + offset_shift), 1)
+    return '|'.join(fields)
+
+
+def _input_offsets(items):
+    """Offset of every input, and the offset following the last one.
+
+    Glarf counts the characters of the inputs and one character between
+    consecutive inputs.
+    """
+    offsets = [0]
+    for item in items:
+        offsets.append(offsets[-1] + len(item) + 1)
+    return offsets
+
+
+def _outputs(records):
+    """The four output lists of records, as `make_sentences` returns them:
+    trailing trees without tuples have no entry in the tuples"""
+    outputs = tuple([record[k] for record in records] for k in xrange(4))
+    tuples = outputs[3]
+    while tuples and tuples[-1] is None:
+        tuples.pop()
+    return outputs
+
+
+def _padded_records(outputs):
+    """Records of complete outputs, tuples padded with None"""
+    jet_out, parse_out, glarf_out, tuple_out = outputs
+    tuple_out = tuple_out + [None] * (len(glarf_out) - len(tuple_out))
+    return izip(jet_out, parse_out, glarf_out, tuple_out)
+
+
+def _chunks(items, chunk_size):
+    """Split an iterable into lists of at most chunk_size items"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _iter_parses(lines):
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line
+
+
+def _iter_tuples(lines):
+    """Tuples for every tree in turn, None for trees without tuples, up to
+    the last tree with tuples"""
+    tree_idx = 0
+    for block_idx, tuples in iter_tuple_blocks(lines):
+        while tree_idx < block_idx:
+            yield None
+            tree_idx += 1
+        yield tuples
+        tree_idx += 1
+
+
+def _zip_records(jet, parses, trees, tuples):
+    """Records of the outputs read in parallel, tuples padded with None.
+
+    Raises RuntimeError if the outputs do not have one entry per sentence.
+    """
+    missing = object()
+    for record in izip_longest(jet, parses, trees, tuples, fillvalue=missing):
+        if any(output is missing for output in record[:3]):
+            raise RuntimeError('Glarf outputs have different numbers of '
+                               'sentences.')
+        if record[3] is missing:
+            record = record[:3] + (None,)
+        yield record
+
+
+def _as_tree(record, stats=None):
+    """GlarfTree of an output record, None if Glarf failed on it"""
+    _, _, glarf, tuples = record
+    with timer(stats, 'parse'):
+        if glarf == '((***ERROR***))':
+            if stats is not None:
+                stats.count('parse_failures')
+            return None
+        return GlarfTree.glarf_parse(glarf, tuples)
 
 
 class GlarfWrapper(object):
@@ -44,6 +228,23 @@ class GlarfWrapper(object):
         verbosity degree.
         1: displays the log file on object creation
         2: in addition, prints glarf commands being run
+    server, string, optional:
+        command starting a persistent Glarf backend, see the module
+        documentation for the protocol it must follow.  By default, every
+        call runs the `make-all-glarf-*` scripts.
+    cache, GlarfCache, optional:
+        on-disk cache of outputs.  Only the sentences missing from it are
+        sent to Glarf.
+    version, string, optional:
+        identifies the Glarf installation in cache keys, defaults to its
+        path.  Set it to share a cache between copies of an installation.
+    pool, WorkdirPool, optional:
+        pool of prepared working directories for this installation.  By
+        default, a new directory is set up on entering the wrapper and
+        deleted on exit.
+    stats, Stats, optional:
+        records the time spent in every stage, the bytes read and the
+        number of sentences, trees and failures, see `pyglarf.stats`.
 
     Examples
     --------
@@ -82,58 +283,185 @@ class GlarfWrapper(object):
       (INDEX 0) (SENTENCE-OFFSET 15)))
     ['SBJ | SBJ | ARG0 | NIL | NIL | whistling | 22 | 2 | VBG | WHISTLE | NIL | NIL | NIL | 1 | NIL | NIL | NIL | He | 15 | 0 | PRP | HE | NIL | NIL | NIL ', 'AUX | AUX | NIL | NIL | NIL | whistling | 22 | 2 | VBG | WHISTLE | NIL | NIL | NIL | 1 | NIL | NIL | NIL | was | 18 | 1 | VBD | BE | NIL | NIL | NIL ']
 
-    TODO: if it's too slow, support batch
+    Large batches can be spread over several working directories with
+    `pyglarf.parallel.make_sentences_parallel`.
     """
-    def __init__(self, path=PATH, verbose=0):
+    # seconds the persistent backend gets to exit before it is terminated
+    shutdown_timeout = 10.0
+
+    def __init__(self, path=PATH, verbose=0, server=None, cache=None,
+                 version=None, pool=None, stats=None):
         self.path = path
         self.verbose = verbose
-        self._glarf_regex = re.compile('(\(\(\*\*\*ERROR\*\*\*\)\)|'
-                                       '\(\(.*?\(SENTENCE-OFFSET [0-9]+\)+)',
-                                       re.DOTALL)
+        self.server = server
+        self.cache = cache
+        self.version = version
+        self.pool = pool
+        self.stats = stats
+        self._server = None
 
     def __enter__(self):
-        self.wd = tempfile.mkdtemp()
+        if (self.pool is not None and
+                os.path.abspath(self.pool.path) != os.path.abspath(self.path)):
+            raise ValueError('The workdir pool belongs to another Glarf '
+                             'installation: %s.' % self.pool.path)
         self.log = tempfile.mkstemp()
         if self.verbose >= 1:
             print self.log[1]
-        # set environment variables
-        os.environ['GLARF'] = self.path
-        os.environ['GLARF_JET'] = os.path.join(self.path, 'JET')
-        os.environ['PATH'] += ':.'
-        successful_copy = call(['copy-glarf-scripts ' + self.wd], shell=True,
-                               cwd=os.path.join(self.path, 'commands-2010'))
-        assert successful_copy == 0
-
-        os.mkdir(os.path.join(self.wd, 'tmp'))
-        in_file = os.path.join(self.wd, 'tmp', 'tmp.sgm')
-        self._filenames = {
-            'in': in_file,
-            'jet': in_file + '.sent',
-            'parse': in_file + '.sent.chout',
-            'glarf': in_file + '.sent.ns-autopb101e',
-            'tuple': in_file + '.sent.ns-2005-fast-ace-n-tuple101e'
-        }
+        self.wd = None
+        try:
+            with timer(self.stats, 'workdir'):
+                if self.pool is not None:
+                    _set_environment(self.path)
+                    self.wd = self.pool.acquire()
+                else:
+                    self.wd = _make_workdir(self.path)
+            in_file = os.path.join(self.wd, 'tmp', 'tmp.sgm')
+            self._filenames = {
+                'in': in_file,
+                'jet': in_file + '.sent',
+                'parse': in_file + '.sent.chout',
+                'glarf': in_file + '.sent.ns-autopb101e',
+                'tuple': in_file + '.sent.ns-2005-fast-ace-n-tuple101e'
+            }
+            if self.server is not None:
+                with timer(self.stats, 'glarf'):
+                    self._start_server()
+        except:
+            exc_info = sys.exc_info()
+            self._cleanup(kill=True)
+            raise exc_info[0], exc_info[1], exc_info[2]
         return self
 
     def __exit__(self, type, value, traceback):
-        shutil.rmtree(self.wd)  # delete directory
+        self._cleanup()
+
+    def _cleanup(self, kill=False):
+        """Stops the backend, then releases the working directory and the
+        log file descriptor"""
+        try:
+            if self._server is not None:
+                self._stop_server(kill)
+        finally:
+            self._server = None
+            if self.wd is not None:
+                if self.pool is not None:
+                    self.pool.release(self.wd)
+                else:
+                    shutil.rmtree(self.wd)  # delete directory
+                self.wd = None
+            os.close(self.log[0])
+
+    def _stop_server(self, kill=False):
+        server = self._server
+        if not kill:
+            server.stdin.close()  # asks the backend to exit
+            deadline = time.time() + self.shutdown_timeout
+            while server.poll() is None and time.time() < deadline:
+                time.sleep(0.01)
+        if server.poll() is None:
+            server.terminate()
+        server.wait()
+        for stream in (server.stdin, server.stdout):
+            if not stream.closed:
+                stream.close()
+
+    def _start_server(self):
+        if self.verbose >= 2:
+            print self.server
+        self._server = Popen(self.server, cwd=self.wd, shell=True,
+                             stdin=PIPE, stdout=PIPE, stderr=self.log[0])
+        reply = self._server.stdout.readline().strip()
+        if reply != 'READY':
+            raise RuntimeError('Glarf backend failed to start. Output log '
+                               'can be found in %s.' % self.log[1])
+
+    def _request_server(self, type, args):
+        """Sends a request to the persistent backend and waits for it"""
+        request = '%s %s' % (type, args)
+        if self.verbose >= 2:
+            print request
+
+        # never read the outputs of a previous request
+        for k in ('jet', 'parse', 'glarf', 'tuple'):
+            if os.path.exists(self._filenames[k]):
+                os.remove(self._filenames[k])
+        try:
+            self._server.stdin.write(request + '\n')
+            self._server.stdin.flush()
+            reply = self._server.stdout.readline().strip()
+        except IOError:
+            reply = ''
+        if reply != 'OK':
+            raise RuntimeError('Glarf backend failed (%s). Output log can be '
+                               'found in %s.' % (reply or 'no reply',
+                                                 self.log[1]))
 
     def _invoke_glarf(self, type, args):
         """Invokes $ make-all-glarf-type target_dir args"""
-
-        cmd = 'make-all-glarf-%s tmp %s' % (type, args)
-        if self.verbose >= 2:
-            print cmd
-
-        successful_call = call(cmd, cwd=self.wd, shell=True,
-                               stderr=self.log[0], stdout=self.log[0])
-        # FIXME: returns 0 even when it fails!!
-        if successful_call != 0:
-            raise RuntimeError('Glarf invocation failed. Output log can be '
-                               'found in %s.' % self.log[1])
-
-        return tuple(open(self._filenames[k]).read()
-                     for k in ('jet', 'parse', 'glarf', 'tuple'))
+        with timer(self.stats, 'glarf'):
+            self._run_glarf(type, args)
+
+    def _run_glarf(self, type, args):
+        if self._server is not None:
+            self._request_server(type, args)
+        else:
+            cmd = 'make-all-glarf-%s tmp %s' % (type, args)
+            if self.verbose >= 2:
+                print cmd
+
+            successful_call = call(cmd, cwd=self.wd, shell=True,
+                                   stderr=self.log[0], stdout=self.log[0])
+            # FIXME: returns 0 even when it fails!!
+            if successful_call != 0:
+                raise RuntimeError('Glarf invocation failed. Output log can '
+                                   'be found in %s.' % self.log[1])
+
+    def _read_outputs(self):
+        with timer(self.stats, 'read'):
+            outputs = tuple(open(self._filenames[k]).read()
+                            for k in ('jet', 'parse', 'glarf', 'tuple'))
+        if self.stats is not None:
+            self.stats.count('bytes_read', sum(map(len, outputs)))
+        return outputs
+
+    def _iter_records(self):
+        """Read the output files in parallel, one sentence at a time"""
+        files = [open(self._filenames[k])
+                 for k in ('jet', 'parse', 'glarf', 'tuple')]
+        try:
+            jet_file, parse_file, glarf_file, tuple_file = files
+            records = _zip_records((line.rstrip('\r\n') for line in jet_file),
+                                   _iter_parses(parse_file),
+                                   iter_glarf_trees(glarf_file),
+                                   _iter_tuples(tuple_file))
+            if self.stats is not None:
+                self.stats.count('bytes_read',
+                                 sum(os.fstat(f.fileno()).st_size
+                                     for f in files))
+                records = self._counted(self.stats.timed_iter('read',
+                                                              records))
+            for record in records:
+                yield record
+        finally:
+            for f in files:
+                f.close()
+
+    def _counted(self, records):
+        """Count the trees and Glarf errors of records as they go"""
+        for record in records:
+            self.stats.count('trees')
+            if record[2] == '((***ERROR***))':
+                self.stats.count('glarf_errors')
+            yield record
+
+    def _count_outputs(self, outputs):
+        if self.stats is not None:
+            glarf_out = outputs[2]
+            self.stats.count('trees', len(glarf_out))
+            self.stats.count('glarf_errors',
+                             glarf_out.count('((***ERROR***))'))
+        return outputs
 
     def make_sentences(self, sentences):
         """Parse and analyze a sequence of sentences.
@@ -169,17 +497,72 @@ class GlarfWrapper(object):
         if isinstance(sentences, str):
             sentences = [sentences]
 
+        if self.cache is not None:
+            return self._make_sentences_cached(sentences)
+        return self._make_sentences(sentences)
+
+    def _cache_key(self, kind, text):
+        installation = self.version
+        if installation is None:
+            installation = os.path.abspath(self.path)
+        return self.cache.key(installation, kind, text)
+
+    def _make_sentences_cached(self, sentences):
+        """make_sentences through the cache.
+
+        Records are cached relative to their sentence, as tree 0 at offset
+        0, and moved to their place in the call when they are returned.
+        Records referring to other trees through TREE+INDEX depend on the
+        batch they come from, and are not cached.
+        """
+        sentences = list(sentences)
+        keys = [self._cache_key('sentence', sent) for sent in sentences]
+        cached = [self.cache.get(key) for key in keys]
+        offsets = _input_offsets(sentences)
+        records = [None if record is None else
+                   _rebase_record(record, lambda t: t + i, offsets[i])
+                   for i, record in enumerate(cached)]
+        missing = [i for i, record in enumerate(cached) if record is None]
+        if missing:
+            batch = [sentences[i] for i in missing]
+            outputs = self._make_sentences(batch)
+            new_records = _split_records(outputs, len(missing))
+            if (new_records is None or map(_record_offset, new_records) !=
+                    _input_offsets(batch)[:-1]):
+                # outputs cannot be attributed to sentences, do not cache
+                if len(missing) == len(sentences):
+                    return outputs
+                return self._make_sentences(sentences)
+            batch_tree = lambda t: missing[t] if t < len(missing) else t
+            to_cache = []
+            for j, (i, record) in enumerate(zip(missing, new_records)):
+                offset = _record_offset(record)
+                records[i] = _rebase_record(record, batch_tree,
+                                            offsets[i] - offset)
+                if all(int(t) == j for t in _tree_ref_re.findall(record[2])):
+                    to_cache.append((keys[i], _rebase_record(
+                        record, lambda t: t - j, -offset)))
+            self.cache.put_many(to_cache)
+        return _outputs(records)
+
+    def _write_sentences(self, sentences):
+        if self.stats is not None:
+            self.stats.count('sentences', len(sentences))
         with open(self._filenames['in'], 'w') as infile:
             infile.writelines('<sentence>%s</sentence>\n' % sent
                               for sent in sentences)
 
-        jet_out, parse_out, glarf_out, tuple_out = self._invoke_glarf('a', 'N')
-        return (jet_out.splitlines(),
-                filter(lambda x: not x.startswith('#') and len(x) > 0,
-                       (s.strip() for s in parse_out.splitlines())),
-                filter(len, (s.strip() for s
-                             in re.split(self._glarf_regex, glarf_out))),
-                _split_glarf_tuples(tuple_out))
+    def _make_sentences(self, sentences):
+        self._write_sentences(sentences)
+        self._invoke_glarf('a', 'N')
+        jet_out, parse_out, glarf_out, tuple_out = self._read_outputs()
+        with timer(self.stats, 'split'):
+            outputs = (jet_out.splitlines(),
+                       filter(lambda x: not x.startswith('#') and len(x) > 0,
+                              (s.strip() for s in parse_out.splitlines())),
+                       split_glarf_trees(glarf_out),
+                       _split_glarf_tuples(tuple_out))
+        return self._count_outputs(outputs)
 
     def make_paragraphs(self, paragraphs):
         """Parse and analyze a sequence of paragraphs.
@@ -216,14 +599,91 @@ class GlarfWrapper(object):
         if isinstance(paragraphs, str):
             paragraphs = [paragraphs]
 
+        if self.cache is None:
+            return self._make_paragraphs(paragraphs)
+        # sentences cannot be traced back to their paragraph, and references
+        # can cross paragraphs: the whole call is cached at once
+        key = self._cache_key('paragraphs', '\0'.join(paragraphs))
+        outputs = self.cache.get(key)
+        if outputs is None:
+            outputs = self._make_paragraphs(paragraphs)
+            self.cache.put(key, outputs)
+        return outputs
+
+    def _write_paragraphs(self, paragraphs):
+        if self.stats is not None:
+            self.stats.count('paragraphs', len(paragraphs))
         with open(self._filenames['in'], 'w') as infile:
             infile.writelines(['<TEXT><P>%s</P></TEXT>\n' % par
                               for par in paragraphs])
 
-        jet_out, parse_out, glarf_out, tuple_out = self._invoke_glarf('b',
-                                                                      'N P')
-        return (jet_out.splitlines(),
-                filter(lambda x: not x.startswith('#') and len(x) > 0,
-                       (s.strip() for s in parse_out.splitlines())),
-                [s.strip() for s in re.findall(self._glarf_regex, glarf_out)],
-                _split_glarf_tuples(tuple_out))
+    def _make_paragraphs(self, paragraphs):
+        self._write_paragraphs(paragraphs)
+        self._invoke_glarf('b', 'N P')
+        jet_out, parse_out, glarf_out, tuple_out = self._read_outputs()
+        with timer(self.stats, 'split'):
+            outputs = (jet_out.splitlines(),
+                       filter(lambda x: not x.startswith('#') and len(x) > 0,
+                              (s.strip() for s in parse_out.splitlines())),
+                       split_glarf_trees(glarf_out),
+                       _split_glarf_tuples(tuple_out))
+        return self._count_outputs(outputs)
+
+    def iter_sentences(self, sentences, chunk_size=100, trees=False):
+        """Parse and analyze sentences, yielding the outputs one at a time.
+
+        Sentences are sent to Glarf in chunks, and the outputs of each chunk
+        are read from disk incrementally, so the first records are available
+        as soon as the first chunk is done and memory does not grow with the
+        number of sentences.
+
+        Parameters
+        ----------
+        sentences, iterable or string:
+            The sequence of sentences (strings) that Glarf will process.  It
+            can be a generator, it is only consumed one chunk at a time.
+
+        chunk_size, int, default=100:
+            Number of sentences sent to Glarf at once.  Tree numbers and
+            offsets in the outputs are relative to the chunk.
+
+        trees, bool, default=False:
+            Whether to yield GlarfTrees instead of raw outputs.
+
+        Yields
+        ------
+        (jet, parse, glarf, tuples) for every sentence, as found in the lists
+        returned by `make_sentences`, with tuples None if there are none.
+        If `trees` is True, the GlarfTree built from glarf and tuples, or
+        None if Glarf failed on the sentence.
+        """
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        for chunk in _chunks(sentences, chunk_size):
+            if self.cache is not None:
+                records = _padded_records(self._make_sentences_cached(chunk))
+            else:
+                self._write_sentences(chunk)
+                self._invoke_glarf('a', 'N')
+                records = self._iter_records()
+            for record in records:
+                yield _as_tree(record, self.stats) if trees else record
+
+    def iter_paragraphs(self, paragraphs, chunk_size=10, trees=False):
+        """Parse and analyze paragraphs, yielding the outputs one at a time.
+
+        Like `iter_sentences`, with chunks made of whole paragraphs.  The
+        records are those of the sentences of the paragraphs.  Trees are not
+        part of a forest, so references across sentences are not resolved.
+        """
+        if isinstance(paragraphs, str):
+            paragraphs = [paragraphs]
+        for chunk in _chunks(paragraphs, chunk_size):
+            if self.cache is not None:
+                records = _padded_records(self.make_paragraphs(chunk))
+            else:
+                self._write_paragraphs(chunk)
+                self._invoke_glarf('b', 'N P')
+                records = self._iter_records()
+            for record in records:
+                yield _as_tree(record, self.stats) if trees else record